@@ -0,0 +1,206 @@
+"""
+Processamento em lote de pastas de documentos.
+
+Cada processo do pool mantém seu próprio EasyOCRExtractor já carregado (o modelo
+é carregado uma vez por worker, não uma vez por imagem) e tem o número de
+threads do torch fixado, para que N workers não disputem os mesmos núcleos.
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from . import instrumentation
+
+# Extensões de imagem suportadas
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.tif')
+
+# Extensões tratadas página a página (ver multipage), fora do pool de imagens avulsas
+DOCUMENT_EXTENSIONS = IMAGE_EXTENSIONS + ('.pdf',)
+
+# Extrator do processo worker (um por processo, criado no initializer do pool)
+_worker_extractor = None
+
+
+def list_images(image_folder: str) -> List[str]:
+    """Lista, em ordem alfabética, as imagens suportadas de uma pasta."""
+    return [
+        os.path.join(image_folder, filename)
+        for filename in sorted(os.listdir(image_folder))
+        if filename.lower().endswith(IMAGE_EXTENSIONS)
+    ]
+
+
+def list_documents(folder: str) -> List[str]:
+    """Lista, em ordem alfabética, as imagens e os documentos de várias páginas (PDF/TIFF) de uma pasta."""
+    return [
+        os.path.join(folder, filename)
+        for filename in sorted(os.listdir(folder))
+        if filename.lower().endswith(DOCUMENT_EXTENSIONS)
+    ]
+
+
+def pin_threads(num_threads: int) -> None:
+    """
+    Limita as threads de torch/OpenMP/OpenCV do processo atual.
+
+    Precisa rodar antes do primeiro uso do torch, por isso é chamada no
+    initializer do worker, antes de carregar o leitor.
+    """
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(num_threads)
+
+    import cv2
+    import torch
+
+    cv2.setNumThreads(num_threads)
+    torch.set_num_threads(num_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Só pode ser definido uma vez por processo, antes de qualquer trabalho paralelo
+        pass
+
+
+def _init_worker(languages, use_gpu, quality_thresholds, cache_path, cache_max_bytes, reader_options, num_threads,
+                 instrument=False):
+    global _worker_extractor
+    pin_threads(num_threads)
+    if instrument:
+        # As medições do worker voltam junto com cada resultado (ver _process_one)
+        instrumentation.enable()
+
+    from .ocr_cache import DEFAULT_MAX_BYTES, OCRCache
+    from .text_extraction import EasyOCRExtractor
+
+    # Cada worker abre sua própria conexão; o SQLite cuida da concorrência entre processos
+    cache = OCRCache(cache_path, cache_max_bytes or DEFAULT_MAX_BYTES) if cache_path else None
+    _worker_extractor = EasyOCRExtractor(
+        languages=languages,
+        use_gpu=use_gpu,
+        quality_thresholds=quality_thresholds,
+        cache=cache,
+        lazy=cache is not None,
+        **reader_options,
+    )
+
+
+def _process_one(image_path: str, confidence_threshold: Optional[float], save: bool,
+                 output_dir: str = "censored_images", dpi: Optional[int] = None,
+                 keep_detections: bool = False) -> Dict:
+    from .multipage import DEFAULT_DPI, is_multipage, redacted_output_path
+
+    try:
+        if is_multipage(image_path):
+            # PDF/TIFF: todas as páginas, gravadas no mesmo formato (o cv2.imread só leria a primeira)
+            result = _worker_extractor.extract_multipage(
+                image_path,
+                output_path=redacted_output_path(image_path, output_dir),
+                dpi=dpi or DEFAULT_DPI,
+                confidence_threshold=confidence_threshold,
+            )
+        else:
+            document = _worker_extractor.process(image_path, confidence_threshold)
+            result = document.to_dict()
+            result['output_path'] = document.save_redacted(output_dir) if save else None
+            if keep_detections:
+                result['ocr_detections'] = document.detections
+    except Exception as e:
+        # Um documento com problema não derruba o lote inteiro
+        result = {'image_path': image_path, 'error': str(e)}
+    metrics = instrumentation.active()
+    if metrics is not None:
+        result['_metrics'] = metrics.drain()
+    return result
+
+
+def _collect(result: Dict, metrics) -> Dict:
+    # Soma as medições do worker às do processo principal
+    snapshot = result.pop('_metrics', None)
+    if snapshot is not None and metrics is not None:
+        metrics.merge(snapshot)
+    return result
+
+
+def process_batch(
+    image_paths: Iterable[str],
+    workers: Optional[int] = None,
+    languages: Optional[List[str]] = None,
+    use_gpu: bool = False,
+    quality_thresholds=None,
+    cache_path: Optional[str] = None,
+    cache_max_bytes: Optional[int] = None,
+    confidence_threshold: Optional[float] = None,
+    ordered: bool = True,
+    save: bool = True,
+    output_dir: str = "censored_images",
+    threads_per_worker: Optional[int] = None,
+    dpi: Optional[int] = None,
+    keep_detections: bool = False,
+    **reader_options,
+) -> Iterator[Dict]:
+    """
+    Distribui as imagens entre processos worker e devolve os resultados.
+
+    Args:
+        image_paths (list): Caminhos das imagens (PDF/TIFF são processados página a página)
+        workers (int): Número de processos (padrão: número de núcleos)
+        languages (list): Idiomas do OCR
+        use_gpu (bool): Usar GPU nos workers
+        quality_thresholds (QualityThresholds | str): Limiares do estimador de qualidade
+        cache_path (str): Arquivo SQLite do cache de OCR compartilhado pelos workers
+        cache_max_bytes (int): Tamanho máximo do cache de OCR
+        confidence_threshold (float): Confiança mínima (0.0 a 1.0)
+        ordered (bool): True devolve na ordem de entrada; False, conforme terminam
+        save (bool): Salva a imagem censurada de cada documento
+        output_dir (str): Pasta das imagens censuradas
+        threads_per_worker (int): Threads do torch por worker (padrão: núcleos / workers)
+        dpi (int): Resolução da rasterização dos PDFs e da saída de várias páginas
+        keep_detections (bool): Devolve também as detecções do OCR em 'ocr_detections'
+                                (usadas pelo manifesto; ver job_manifest)
+        **reader_options: Opções extras do `easyocr.Reader`
+
+    Yields:
+        dict: Resumo de cada documento (DocumentResult.to_dict()), ou
+              {'image_path', 'error'} se o documento falhou
+    """
+    image_paths = list(image_paths)
+    if not image_paths:
+        return
+
+    cpu_count = os.cpu_count() or 1
+    workers = max(1, min(workers or cpu_count, len(image_paths)))
+    threads_per_worker = threads_per_worker or max(1, cpu_count // workers)
+
+    # 'spawn' evita herdar o estado de threads do torch do processo pai
+    context = multiprocessing.get_context('spawn')
+    metrics = instrumentation.active()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(
+            languages, use_gpu, quality_thresholds, cache_path, cache_max_bytes,
+            reader_options, threads_per_worker, metrics is not None,
+        ),
+    ) as executor:
+        if ordered:
+            futures = [
+                executor.submit(_process_one, path, confidence_threshold, save, output_dir, dpi, keep_detections)
+                for path in image_paths
+            ]
+            for future in futures:
+                yield _collect(future.result(), metrics)
+        else:
+            futures = {
+                executor.submit(_process_one, path, confidence_threshold, save, output_dir, dpi, keep_detections)
+                for path in image_paths
+            }
+            for future in as_completed(futures):
+                yield _collect(future.result(), metrics)
+
+
+def process_folder(image_folder: str, **kwargs) -> Iterator[Dict]:
+    """Atalho de process_batch para todos os documentos de uma pasta (imagens, PDF e TIFF)."""
+    return process_batch(list_documents(image_folder), **kwargs)
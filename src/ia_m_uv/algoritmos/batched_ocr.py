@@ -0,0 +1,210 @@
+"""
+OCR em lotes: detecção e reconhecimento do EasyOCR dirigidos separadamente.
+
+Em CPU, `Reader.readtext` reconhece as caixas de texto uma por vez (o parâmetro
+batch_size só vale na GPU), então a rede de reconhecimento roda com lotes de 1.
+Aqui os recortes de texto de várias páginas são juntados, agrupados por largura
+(recortes da mesma largura não precisam de preenchimento extra) e reconhecidos
+em lotes de `batch_size`; páginas do mesmo tamanho também passam juntas pelo
+detector. Os resultados voltam para cada página na mesma ordem do `readtext`.
+
+`MicroBatcher` forma esses lotes a partir de chamadas concorrentes (um documento
+por chamada), esperando no máximo `max_wait` segundos para encher o lote.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# Parâmetros do readtext padrão, usados também aqui para dar o mesmo resultado
+DETECT_OPTIONS = dict(
+    min_size=20, text_threshold=0.7, low_text=0.4, link_threshold=0.4,
+    canvas_size=2560, mag_ratio=1.0, slope_ths=0.1, ycenter_ths=0.5,
+    height_ths=0.5, width_ths=0.5, add_margin=0.1,
+)
+RECOGNIZE_OPTIONS = dict(
+    decoder='greedy', beamWidth=5, contrast_ths=0.1, adjust_contrast=0.5, filter_ths=0.003, workers=0,
+)
+
+
+class BatchedReader:
+    def __init__(self, reader, batch_size: int = 32, detect_batch_size: int = 4):
+        """
+        Args:
+            reader (easyocr.Reader): Leitor já carregado (ver ocr_registry)
+            batch_size (int): Recortes de texto por passada do reconhecedor
+            detect_batch_size (int): Páginas do mesmo tamanho por passada do detector
+        """
+        self.reader = reader
+        self.batch_size = max(1, batch_size)
+        self.detect_batch_size = max(1, detect_batch_size)
+        self.stats = {'pages': 0, 'crops': 0, 'detector_calls': 0, 'recognizer_calls': 0}
+
+    def detect_many(self, images: Sequence[np.ndarray]) -> List[Tuple[list, list]]:
+        """Caixas (horizontais, livres) de cada página, com páginas de mesmo tamanho em lote."""
+        boxes: List[Optional[Tuple[list, list]]] = [None] * len(images)
+        by_shape: Dict[tuple, List[int]] = {}
+        for index, image in enumerate(images):
+            by_shape.setdefault(image.shape, []).append(index)
+
+        for indices in by_shape.values():
+            for start in range(0, len(indices), self.detect_batch_size):
+                chunk = indices[start:start + self.detect_batch_size]
+                colour = [cv2.cvtColor(images[i], cv2.COLOR_GRAY2BGR) for i in chunk]
+                batch = colour[0] if len(chunk) == 1 else np.stack(colour)
+                horizontal, free = self.reader.detect(batch, reformat=False, **DETECT_OPTIONS)
+                self.stats['detector_calls'] += 1
+                for i, h, f in zip(chunk, horizontal, free):
+                    boxes[i] = (h, f)
+        return boxes
+
+    def _ignore_char(self) -> str:
+        return ''.join(set(self.reader.character) - set(self.reader.lang_char))
+
+    def _recognize(self, crops: List[tuple], width: int) -> List[tuple]:
+        """Uma passada do reconhecedor sobre recortes já redimensionados para a altura do modelo."""
+        from easyocr.recognition import get_text
+
+        self.stats['recognizer_calls'] += 1
+        return get_text(
+            self.reader.character, self._model_height(), width, self.reader.recognizer,
+            self.reader.converter, crops, self._ignore_char(),
+            batch_size=len(crops), device=self.reader.device, **RECOGNIZE_OPTIONS,
+        )
+
+    @staticmethod
+    def _model_height() -> int:
+        import easyocr.easyocr as easyocr_module
+
+        return easyocr_module.imgH
+
+    def readtext_many(self, images: Sequence[np.ndarray]) -> List[List[tuple]]:
+        """
+        Equivalente a `[reader.readtext(img) for img in images]` (imagens em tons de
+        cinza), com detecção e reconhecimento em lotes.
+
+        Returns:
+            list: Para cada imagem, [(bbox, text, confidence), ...]
+        """
+        return self.recognize_many(images, self.detect_many(images))
+
+    def recognize_many(self, images: Sequence[np.ndarray], boxes: Sequence[Tuple[list, list]]) -> List[List[tuple]]:
+        """
+        Reconhece as caixas já detectadas de cada imagem, com os recortes de todas
+        as imagens agrupados por largura em lotes do reconhecedor.
+
+        Args:
+            images (list): Imagens em tons de cinza
+            boxes (list): Para cada imagem, (caixas horizontais, caixas livres) no formato do `Reader.detect`
+        """
+        from easyocr.utils import get_image_list
+
+        model_height = self._model_height()
+        self.stats['pages'] += len(images)
+
+        # (página, posição na página, largura do lote, recorte)
+        crops = []
+        slots: List[list] = []
+        for page, (image, (horizontal, free)) in enumerate(zip(images, boxes)):
+            position = 0
+            # Mesma ordem do readtext em CPU: primeiro as caixas horizontais, depois as livres
+            for box_h, box_f in [([b], []) for b in horizontal] + [([], [b]) for b in free]:
+                # Cada caixa teria sua própria largura no readtext (a `max_width` que o
+                # get_image_list calcula, ceil(razão) * altura): agrupa por ela
+                box_crops, width = get_image_list(box_h, box_f, image, model_height=model_height)
+                for crop in box_crops:
+                    crops.append((page, position, width, crop))
+                    position += 1
+            slots.append([None] * position)
+        self.stats['crops'] += len(crops)
+
+        by_width: Dict[int, list] = {}
+        for item in crops:
+            by_width.setdefault(item[2], []).append(item)
+        for width, items in by_width.items():
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start:start + self.batch_size]
+                recognized = self._recognize([crop for (_, _, _, crop) in chunk], width)
+                for (page, position, _, _), result in zip(chunk, recognized):
+                    slots[page][position] = result
+        return slots
+
+
+class MicroBatcher:
+    """
+    Junta chamadas concorrentes de um item em lotes: o lote sai quando enche
+    (`batch_size`) ou quando o item mais antigo já esperou `max_wait` segundos.
+    """
+
+    def __init__(self, fn_many: Callable[[list], list], batch_size: int = 16, max_wait: float = 0.05):
+        """
+        Args:
+            fn_many (callable): Processa uma lista de itens e devolve os resultados na mesma ordem
+            batch_size (int): Tamanho máximo do lote
+            max_wait (float): Latência máxima acrescentada a cada item, em segundos
+        """
+        self.fn_many = fn_many
+        self.batch_size = max(1, batch_size)
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._pending: List[Tuple[object, Future, float]] = []  # (item, future, chegada)
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._loop, name="ocr-microbatch", daemon=True)
+        self._thread.start()
+
+    def submit(self, item) -> Future:
+        future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("MicroBatcher encerrado")
+            self._pending.append((item, future, time.monotonic()))
+            self._cond.notify()
+        return future
+
+    def __call__(self, item):
+        """Processa um item (bloqueia até o lote dele ser processado)."""
+        return self.submit(item).result()
+
+    def _take(self) -> Optional[List[Tuple[object, Future, float]]]:
+        with self._cond:
+            while True:
+                if self._pending:
+                    remaining = self._pending[0][2] + self.max_wait - time.monotonic()
+                    if len(self._pending) >= self.batch_size or remaining <= 0 or self._closed:
+                        batch = self._pending[:self.batch_size]
+                        self._pending = self._pending[self.batch_size:]
+                        return batch
+                    self._cond.wait(remaining)
+                elif self._closed:
+                    return None
+                else:
+                    self._cond.wait()
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take()
+            if batch is None:
+                return
+            try:
+                results = self.fn_many([item for item, _, _ in batch])
+            except Exception as e:
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future, _), result in zip(batch, results):
+                future.set_result(result)
+
+    def close(self) -> None:
+        """Processa o que ainda está pendente e encerra a thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
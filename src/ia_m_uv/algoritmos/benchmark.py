@@ -0,0 +1,577 @@
+"""
+Benchmark reprodutível do pipeline sobre documentos sintéticos (ver synthetic_docs).
+
+Mede, com a mesma semente e os mesmos documentos a cada execução:
+- OCR de ponta a ponta (`EasyOCRExtractor.process`): latência p50/p95, documentos
+  por segundo e tempo por etapa (via instrumentation);
+- censura isolada (`text_censor.redact_detections` sobre as detecções do gabarito):
+  tempo por documento, sem o custo do OCR;
+- caminho do Gemini (modo estruturado assíncrono) contra o `FakeGeminiBackend`
+  local: vazão e sobrecarga do cliente, sem rede;
+- recall da censura: fração dos campos sensíveis do gabarito cobertos na imagem
+  censurada e apontados no texto (pelo OCR e, à parte, só pelo detector de padrões);
+- precisão da censura: o quanto do que foi censurado é de fato sensível (os
+  documentos trazem campos parecidos com os sensíveis que não devem ser pegos);
+- pico de memória (RSS) ao fim de cada fase;
+- tempo de importação do CLI (`python -X importtime` num processo novo), que
+  precisa caber no orçamento e não pode carregar torch, easyocr nem o SDK do Gemini.
+
+À parte (`--modos-cpu`), compara precisão e velocidade dos modos de CPU do OCR
+(ver cpu_inference), com diferentes números de threads, contra o leitor do
+EasyOCR sem alterações.
+
+O relatório pode ser comparado com uma linha de base gravada antes; métricas
+que piorarem além da tolerância são apontadas como regressão (código de saída 1).
+
+Exemplo:
+    python -m ia_m_uv.algoritmos.benchmark --documentos 30 --salvar-baseline benchmarks/baseline.json
+    python -m ia_m_uv.algoritmos.benchmark --documentos 30 --baseline benchmarks/baseline.json
+    python -m ia_m_uv.algoritmos.benchmark --so-importacao
+    python -m ia_m_uv.algoritmos.benchmark --modos-cpu padrao fp32 --threads 1 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from . import instrumentation
+from .cpu_inference import CPU_MODES
+from .sensitive_matcher import default_matcher
+from .synthetic_docs import GROUND_TRUTH_FILE, load_ground_truth, write_dataset
+
+# Sentido de cada métrica na comparação com a linha de base
+LOWER_IS_BETTER = 'lower'
+HIGHER_IS_BETTER = 'higher'
+METRIC_DIRECTIONS = {
+    'ocr.p50_ms': LOWER_IS_BETTER,
+    'ocr.p95_ms': LOWER_IS_BETTER,
+    'ocr.docs_per_s': HIGHER_IS_BETTER,
+    'censura.mean_ms': LOWER_IS_BETTER,
+    'gemini.docs_per_s': HIGHER_IS_BETTER,
+    'recall.imagem': HIGHER_IS_BETTER,
+    'recall.texto': HIGHER_IS_BETTER,
+    'recall.padroes': HIGHER_IS_BETTER,
+    'precisao.imagem': HIGHER_IS_BETTER,
+    'precisao.texto': HIGHER_IS_BETTER,
+    'precisao.padroes': HIGHER_IS_BETTER,
+    'memoria.pico_mb': LOWER_IS_BETTER,
+    'importacao.ms': LOWER_IS_BETTER,
+}
+# Métricas de qualidade comparadas por diferença absoluta (as demais, por variação relativa)
+ABSOLUTE_METRICS = ('recall.', 'precisao.')
+
+# Fração da caixa de um campo que precisa estar coberta para contar como censurado
+COVERAGE_THRESHOLD = 0.5
+
+# Importação do CLI: orçamento de tempo e módulos que só podem ser importados pela etapa que os usa
+IMPORT_MODULE = 'ia_m_uv.main'
+IMPORT_BUDGET_MS = 800
+HEAVY_MODULES = ('torch', 'easyocr', 'google.generativeai')
+
+# Referência do `--modos-cpu`: o `easyocr.Reader` sem alterações
+REFERENCE_MODE = 'easyocr'
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo, em MB (None onde o SO não informa)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS, em bytes
+    return round(peak / (1024 * 1024 if platform.system() == 'Darwin' else 1024), 1)
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    return round(float(np.percentile(values, q)), 2) if len(values) else 0.0
+
+
+def _digits(text: str) -> str:
+    return ''.join(ch for ch in text if ch.isalnum()).upper()
+
+
+def field_coverage(redacted: np.ndarray, bbox: Sequence[int]) -> float:
+    """Fração da caixa [x0, y0, x1, y1] pintada de preto na imagem censurada."""
+    x0, y0, x1, y1 = (max(0, int(v)) for v in bbox)
+    region = redacted[y0:y1, x0:x1]
+    return float((region == 0).mean()) if region.size else 0.0
+
+
+def _ratio(hits: int, total: int) -> float:
+    return round(hits / total, 4) if total else 1.0
+
+
+def span_is_sensitive(span: str, truth: Dict) -> bool:
+    """Se um trecho apontado como sensível corresponde (no todo ou em parte) a um campo sensível do gabarito."""
+    span = _digits(span)
+    return bool(span) and any(
+        span in _digits(f['text']) or _digits(f['text']) in span
+        for f in truth['fields'] if f['category'] is not None
+    )
+
+
+def gt_detections(truth: Dict) -> List[tuple]:
+    """Detecções "perfeitas" (as do gabarito), no formato do EasyOCR."""
+    return [
+        ([[x0, y0], [x1, y0], [x1, y1], [x0, y1]], f['text'], 0.99)
+        for f in truth['fields']
+        for x0, y0, x1, y1 in [f['bbox']]
+    ]
+
+
+def _environment() -> Dict:
+    versions = {'python': platform.python_version(), 'numpy': np.__version__, 'opencv': cv2.__version__}
+    for module in ('torch', 'easyocr'):
+        try:
+            versions[module] = __import__(module).__version__
+        except Exception:
+            versions[module] = None
+    return {'platform': platform.platform(), 'cpu_count': os.cpu_count(), 'versions': versions}
+
+
+def measure_import(module: str = IMPORT_MODULE, repeats: int = 3) -> Dict:
+    """
+    Importa `module` em processos novos com `python -X importtime`.
+
+    Returns:
+        dict: {'module': módulo medido, 'ms': menor tempo entre as repetições, 'heavy': módulos de HEAVY_MODULES
+               carregados, 'slowest': os 5 módulos com maior tempo acumulado}
+    """
+    code = f"import time; t = time.perf_counter(); import {module}; print((time.perf_counter() - t) * 1000)"
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    times, loaded = [], {}
+    for _ in range(max(1, repeats)):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                              capture_output=True, text=True, env=env, check=True)
+        times.append(float(proc.stdout.strip().splitlines()[-1]))
+        for line in proc.stderr.splitlines():
+            # "import time:  self [us] | cumulative | nome (indentado pela profundidade)"
+            parts = line.split('|')
+            if line.startswith('import time:') and len(parts) == 3 and parts[1].strip().isdigit():
+                loaded[parts[2].strip()] = int(parts[1])
+    heavy = sorted(m for m in loaded if m in HEAVY_MODULES)
+    slowest = sorted(loaded.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        'module': module,
+        'ms': round(min(times), 1),
+        'heavy': heavy,
+        'slowest': [{'module': name, 'cumulative_ms': round(us / 1000, 1)} for name, us in slowest],
+    }
+
+
+def check_import(result: Dict, budget_ms: float = IMPORT_BUDGET_MS) -> List[str]:
+    """Problemas da importação do CLI: acima do orçamento ou com dependências pesadas carregadas."""
+    problems = []
+    if result['ms'] > budget_ms:
+        problems.append(f"importação de {result['module']} levou {result['ms']} ms (orçamento: {budget_ms} ms)")
+    if result['heavy']:
+        problems.append(f"importação de {result['module']} carregou {', '.join(result['heavy'])}")
+    return problems
+
+
+def bench_ocr(extractor, dataset_dir: str, truths: List[Dict], confidence_threshold: float = 0.3) -> Dict:
+    """
+    OCR de ponta a ponta, documento a documento, com recall e precisão da censura na
+    imagem (campos do gabarito cobertos) e no texto (trechos apontados como sensíveis).
+    """
+    latencies, covered, found, total = [], 0, 0, 0
+    wrongly_covered, spans_total, spans_right = 0, 0, 0
+    start = time.perf_counter()
+    for truth in truths:
+        t0 = time.perf_counter()
+        # Lido como bytes: a decodificação entra na medida, sem cópias em processed_images/
+        with open(os.path.join(dataset_dir, truth['image']), 'rb') as f:
+            document = extractor.process(f.read(), confidence_threshold)
+        redacted = document.redacted_image
+        latencies.append(1000 * (time.perf_counter() - t0))
+
+        spans = {_digits(span.text) for span in document.sensitive_spans}
+        spans_total += len(spans)
+        spans_right += sum(span_is_sensitive(span, truth) for span in spans)
+        for field in truth['fields']:
+            if field['category'] is None:
+                wrongly_covered += field_coverage(redacted, field['bbox']) >= COVERAGE_THRESHOLD
+                continue
+            total += 1
+            covered += field_coverage(redacted, field['bbox']) >= COVERAGE_THRESHOLD
+            found += any(_digits(field['text']) in span for span in spans)
+    elapsed = time.perf_counter() - start
+    return {
+        'p50_ms': _percentile(latencies, 50),
+        'p95_ms': _percentile(latencies, 95),
+        'docs_per_s': round(len(truths) / elapsed, 3) if elapsed else 0.0,
+        'recall_imagem': _ratio(covered, total),
+        'recall_texto': _ratio(found, total),
+        'precisao_imagem': _ratio(covered, covered + wrongly_covered),
+        'precisao_texto': _ratio(spans_right, spans_total),
+    }
+
+
+def bench_redaction(dataset_dir: str, truths: List[Dict], repeats: int = 3) -> Dict:
+    """
+    Censura (detector de padrões + desenho) sobre as detecções do gabarito, sem OCR,
+    com recall e precisão do detector (trechos que caem em campos não sensíveis).
+    """
+    from .text_censor import redact_detections
+
+    matcher = default_matcher()
+    found = total = right = 0
+    wrong = []
+    times = []
+    for truth in truths:
+        image = cv2.imread(os.path.join(dataset_dir, truth['image']), cv2.IMREAD_GRAYSCALE)
+        detections = gt_detections(truth)
+        for _ in range(repeats):
+            redacted = image.copy()
+            t0 = time.perf_counter()
+            _, matches = redact_detections(detections, redacted, matcher)
+            times.append(1000 * (time.perf_counter() - t0))
+        hits = {_digits(m.text) for m in matches}
+        fields = truth['fields']
+        for field in fields:
+            if field['category'] is not None:
+                total += 1
+                found += _digits(field['text']) in hits
+        # Cada detecção do gabarito é um campo: o trecho é acerto se cai num campo sensível
+        for match in matches:
+            if any(fields[region.index]['category'] is not None for region in match.regions):
+                right += 1
+            else:
+                wrong.append(f"{match.category}: {match.text!r}")
+    return {
+        'mean_ms': round(float(np.mean(times)), 3) if times else 0.0,
+        'recall_padroes': _ratio(found, total),
+        'precisao_padroes': _ratio(right, right + len(wrong)),
+        'falsos_positivos': wrong[:20],
+    }
+
+
+def bench_gemini(truths: List[Dict], latency: float = 0.05, concurrency: int = 8) -> Dict:
+    """Modo estruturado assíncrono contra o servidor falso local (sem rede, sem chave)."""
+    from .gemini_async import AsyncGeminiClient, FakeGeminiBackend
+    from .gemini_censor import gemini_censor_structured_async
+
+    matcher = default_matcher()
+
+    def responder(prompt, instruction):
+        # O "modelo" aponta os trechos que o detector de padrões reconhece no texto recebido
+        spans = [{'text': prompt[s:e], 'category': name} for name, s, e in matcher.search_text(prompt)]
+        return json.dumps({'censored': bool(spans), 'reason': 'stub', 'spans': spans, 'rephrased': None})
+
+    backend = FakeGeminiBackend(responder=responder, latency=latency)
+    client = AsyncGeminiClient(backend=backend, max_concurrency=concurrency, max_retries=0)
+    texts = [' '.join(f['text'] for f in truth['fields']) for truth in truths]
+
+    async def run():
+        return await asyncio.gather(*(gemini_censor_structured_async(text, client) for text in texts),
+                                    return_exceptions=True)
+
+    start = time.perf_counter()
+    verdicts = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+    errors = sum(isinstance(v, Exception) for v in verdicts)
+    return {
+        'docs_per_s': round(len(texts) / elapsed, 3) if elapsed else 0.0,
+        'overhead_ms': round(1000 * elapsed / max(1, len(texts)) - 1000 * latency / concurrency, 3),
+        'errors': errors,
+        'requests': backend.requests,
+    }
+
+
+def bench_cpu_modes(
+    dataset_dir: str,
+    truths: List[Dict],
+    modes: Sequence[str] = ('padrao', 'fp32'),
+    thread_counts: Sequence[Optional[int]] = (None,),
+    languages: Optional[List[str]] = None,
+) -> List[Dict]:
+    """
+    Precisão contra velocidade dos modos de CPU (ver cpu_inference) no mesmo conjunto.
+
+    A referência é sempre o leitor do EasyOCR sem alterações (primeira linha,
+    modo 'easyocr', com as threads que o processo já tinha): cada linha traz o
+    ganho de vazão e a perda de recall e de precisão em relação a ele.
+
+    Returns:
+        list: A referência e uma linha por (threads, modo)
+    """
+    from . import ocr_registry
+    from .text_extraction import EasyOCRExtractor
+
+    runs = [(REFERENCE_MODE, None)] + [(mode, threads) for threads in thread_counts for mode in modes]
+    rows, reference = [], None
+    for mode, threads in runs:
+        if mode == REFERENCE_MODE:
+            extractor = EasyOCRExtractor(languages=languages or ['pt'])
+        else:
+            extractor = EasyOCRExtractor(languages=languages or ['pt'], cpu_mode=mode, threads=threads)
+        # Um documento de aquecimento fora da medida (alocações e caches do torch)
+        bench_ocr(extractor, dataset_dir, truths[:1])
+        ocr = bench_ocr(extractor, dataset_dir, truths)
+        # Um leitor por modo no registro: libera antes de carregar o próximo
+        ocr_registry.release(extractor.languages, extractor.use_gpu, **extractor.reader_options)
+        reference = reference or ocr
+        rows.append({
+            'modo': mode,
+            'threads': _torch_threads(),
+            **ocr,
+            'ganho_vazao': round(ocr['docs_per_s'] / reference['docs_per_s'], 3) if reference['docs_per_s'] else None,
+            'perda_recall_imagem': round(reference['recall_imagem'] - ocr['recall_imagem'], 4),
+            'perda_recall_texto': round(reference['recall_texto'] - ocr['recall_texto'], 4),
+            'perda_precisao_texto': round(reference['precisao_texto'] - ocr['precisao_texto'], 4),
+        })
+    return rows
+
+
+def _torch_threads() -> int:
+    import torch
+
+    return torch.get_num_threads()
+
+
+def format_cpu_report(rows: List[Dict]) -> str:
+    """Tabela em texto do relatório de `bench_cpu_modes`."""
+    lines = [f"{'modo':<14}{'threads':>8}{'docs/s':>9}{'p50 ms':>9}{'ganho':>8}{'recall img':>12}{'recall txt':>12}"
+             f"{'prec txt':>10}"]
+    for row in rows:
+        lines.append(
+            f"{row['modo']:<14}{row['threads']:>8}{row['docs_per_s']:>9.2f}{row['p50_ms']:>9.1f}"
+            f"{row['ganho_vazao'] or 0:>7.2f}x{row['recall_imagem']:>12.3f}{row['recall_texto']:>12.3f}"
+            f"{row['precisao_texto']:>10.3f}"
+        )
+    return '\n'.join(lines)
+
+
+def run_benchmark(
+    count: int = 30,
+    seed: int = 0,
+    dataset_dir: Optional[str] = None,
+    languages: Optional[List[str]] = None,
+    use_gpu: bool = False,
+    repeats: int = 3,
+    gemini_latency: float = 0.05,
+    extractor=None,
+) -> Dict:
+    """
+    Roda todas as fases e devolve o relatório.
+
+    Args:
+        count (int): Documentos sintéticos gerados (ignorado se `dataset_dir` já tiver um gabarito)
+        seed (int): Semente do gerador
+        dataset_dir (str): Conjunto já gravado (padrão: gerado numa pasta temporária)
+        languages (list): Idiomas do OCR
+        use_gpu (bool): Usa GPU no OCR
+        repeats (int): Repetições da fase de censura isolada
+        gemini_latency (float): Latência simulada do servidor falso, em segundos
+        extractor (EasyOCRExtractor): Extrator já criado (padrão: um novo, sem cache)
+
+    Returns:
+        dict: {'meta', 'metrics' (plano, comparável com a linha de base), 'stages', 'counters', 'memoria'}
+    """
+    temporary = dataset_dir is None
+    if temporary:
+        dataset_dir = tempfile.mkdtemp(prefix="ia_m_uv_bench_")
+    memory = {}
+    try:
+        if not os.path.exists(os.path.join(dataset_dir, 'ground_truth.jsonl')):
+            write_dataset(dataset_dir, count, seed)
+        truths = load_ground_truth(dataset_dir)
+        memory['geracao'] = peak_rss_mb()
+        # Antes de qualquer fase: mede só a importação, num processo novo
+        import_result = measure_import()
+
+        # Coleta nova, só deste benchmark
+        instrumentation.disable()
+        metrics = instrumentation.enable()
+
+        t0 = time.perf_counter()
+        if extractor is None:
+            from .text_extraction import EasyOCRExtractor
+
+            extractor = EasyOCRExtractor(languages=languages or ['pt'], use_gpu=use_gpu)
+        extractor.warm_up()
+        model_load_s = time.perf_counter() - t0
+        memory['carga_modelo'] = peak_rss_mb()
+
+        ocr = bench_ocr(extractor, dataset_dir, truths)
+        memory['ocr'] = peak_rss_mb()
+        # Tempos por etapa só do OCR de ponta a ponta (as fases seguintes são medidas à parte)
+        summary = metrics.to_dict()
+        instrumentation.disable()
+        redaction = bench_redaction(dataset_dir, truths, repeats)
+        memory['censura'] = peak_rss_mb()
+        gemini = bench_gemini(truths, gemini_latency)
+        memory['gemini'] = peak_rss_mb()
+    finally:
+        if temporary:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+    flat = {
+        'ocr.p50_ms': ocr['p50_ms'],
+        'ocr.p95_ms': ocr['p95_ms'],
+        'ocr.docs_per_s': ocr['docs_per_s'],
+        'censura.mean_ms': redaction['mean_ms'],
+        'gemini.docs_per_s': gemini['docs_per_s'],
+        'recall.imagem': ocr['recall_imagem'],
+        'recall.texto': ocr['recall_texto'],
+        'recall.padroes': redaction['recall_padroes'],
+        'precisao.imagem': ocr['precisao_imagem'],
+        'precisao.texto': ocr['precisao_texto'],
+        'precisao.padroes': redaction['precisao_padroes'],
+        'memoria.pico_mb': max((v for v in memory.values() if v is not None), default=None),
+        'importacao.ms': import_result['ms'],
+    }
+    return {
+        'meta': {
+            'documents': len(truths),
+            'seed': seed,
+            'languages': languages or ['pt'],
+            'gpu': use_gpu,
+            'model_load_s': round(model_load_s, 3),
+            'environment': _environment(),
+        },
+        'metrics': flat,
+        'gemini': gemini,
+        'falsos_positivos': redaction['falsos_positivos'],
+        'importacao': import_result,
+        'stages': summary['stages'],
+        'counters': summary['counters'],
+        'memoria': memory,
+    }
+
+
+def compare(
+    metrics: Dict[str, float],
+    baseline: Dict[str, float],
+    tolerance: float = 0.15,
+    recall_tolerance: float = 0.01,
+) -> List[str]:
+    """
+    Compara as métricas com a linha de base.
+
+    Args:
+        tolerance (float): Piora relativa aceita em tempo, vazão e memória (0.15 = 15%)
+        recall_tolerance (float): Queda absoluta aceita nos recalls e nas precisões
+
+    Returns:
+        list: Descrição de cada regressão (vazia se nada piorou além da tolerância)
+    """
+    regressions = []
+    for name, direction in METRIC_DIRECTIONS.items():
+        current, reference = metrics.get(name), baseline.get(name)
+        if current is None or reference is None:
+            continue
+        if name.startswith(ABSOLUTE_METRICS):
+            worse = reference - current > recall_tolerance
+        elif direction == LOWER_IS_BETTER:
+            worse = current > reference * (1 + tolerance)
+        else:
+            worse = current < reference * (1 - tolerance)
+        if worse:
+            regressions.append(f"{name}: {reference} -> {current}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark do OCR e da censura sobre documentos sintéticos")
+    parser.add_argument('--documentos', type=int, default=30, help="Documentos sintéticos gerados")
+    parser.add_argument('--semente', type=int, default=0, help="Semente do gerador")
+    parser.add_argument('--dataset', help="Pasta com um conjunto já gerado (synthetic_docs)")
+    parser.add_argument('--ocr-idiomas', nargs='+', default=['pt'], help="Idiomas do OCR")
+    parser.add_argument('--ocr-gpu', action='store_true', help="Usa GPU no OCR")
+    parser.add_argument('--repeticoes', type=int, default=3, help="Repetições da fase de censura isolada")
+    parser.add_argument('--saida', help="Grava o relatório completo neste JSON")
+    parser.add_argument('--baseline', help="Linha de base (JSON) para detectar regressões")
+    parser.add_argument('--salvar-baseline', help="Grava as métricas desta execução como linha de base")
+    parser.add_argument('--tolerancia', type=float, default=0.15,
+                        help="Piora relativa aceita em tempo, vazão e memória antes de acusar regressão")
+    parser.add_argument('--orcamento-importacao-ms', type=float, default=IMPORT_BUDGET_MS,
+                        help="Tempo máximo de importação do CLI")
+    parser.add_argument('--so-importacao', action='store_true',
+                        help="Só verifica o tempo de importação do CLI (rápido, sem OCR)")
+    parser.add_argument('--modos-cpu', nargs='+', choices=list(CPU_MODES),
+                        help="Só compara precisão e velocidade destes modos de CPU do OCR com o leitor do EasyOCR sem alterações")
+    parser.add_argument('--threads', nargs='+', type=int, default=None,
+                        help="Com --modos-cpu, threads intra-op a percorrer (padrão: as do processo)")
+    args = parser.parse_args()
+
+    if args.so_importacao:
+        result = measure_import()
+        print(json.dumps(result, indent=2))
+        problems = check_import(result, args.orcamento_importacao_ms)
+        for line in problems:
+            print(f"  [x] {line}")
+        return 1 if problems else 0
+
+    if args.modos_cpu:
+        return comparar_modos_cpu(args)
+
+    report = run_benchmark(
+        count=args.documentos,
+        seed=args.semente,
+        dataset_dir=args.dataset,
+        languages=args.ocr_idiomas,
+        use_gpu=args.ocr_gpu,
+        repeats=args.repeticoes,
+    )
+    print(json.dumps(report['metrics'], indent=2))
+
+    for path, content in ((args.saida, report), (args.salvar_baseline, {'meta': report['meta'], 'metrics': report['metrics']})):
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(content, f, ensure_ascii=False, indent=2)
+            print(f"[✔] Gravado em: {path}")
+
+    regressions = check_import(report['importacao'], args.orcamento_importacao_ms)
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions += compare(report['metrics'], baseline.get('metrics', baseline), args.tolerancia)
+    if regressions:
+        print("Regressões:")
+        for line in regressions:
+            print(f"  [x] {line}")
+        return 1
+    if args.baseline:
+        print("Sem regressões em relação à linha de base.")
+    return 0
+
+
+def comparar_modos_cpu(args) -> int:
+    """Relatório de precisão contra velocidade dos modos de CPU (`--modos-cpu`)."""
+    dataset_dir = args.dataset or tempfile.mkdtemp(prefix="ia_m_uv_bench_")
+    try:
+        if not os.path.exists(os.path.join(dataset_dir, GROUND_TRUTH_FILE)):
+            write_dataset(dataset_dir, args.documentos, args.semente)
+        truths = load_ground_truth(dataset_dir)
+        rows = bench_cpu_modes(dataset_dir, truths, args.modos_cpu, args.threads or [None], args.ocr_idiomas)
+    finally:
+        if args.dataset is None:
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+
+    print(format_cpu_report(rows))
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump({'meta': {'documents': len(truths), 'seed': args.semente, 'environment': _environment()},
+                       'cpu_modes': rows}, f, ensure_ascii=False, indent=2)
+        print(f"[✔] Gravado em: {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
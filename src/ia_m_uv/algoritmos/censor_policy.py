@@ -0,0 +1,205 @@
+"""
+Política de censura em camadas: regras locais primeiro, Gemini só para os casos duvidosos.
+
+As regras locais (sensitive_matcher) já encontram e censuram os dados com formato
+conhecido. O que elas não enxergam são sinais "soltos": um rótulo como "Nome:" ou
+"Endereço:" sem dado reconhecido perto, números longos que não fecharam com nenhum
+padrão, sequências de palavras que parecem um nome completo, palavrões, texto de
+baixa confiança do OCR. Cada sinal soma risco a uma pontuação entre 0 e 1:
+
+- abaixo de `low`: o resultado local basta (limpo ou já censurado);
+- a partir de `high`: o documento é marcado como sensível sem consultar o Gemini;
+- entre os dois (faixa incerta): o texto é escalado para o Gemini.
+"""
+
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from . import instrumentation
+from .sensitive_matcher import SensitiveMatcher, default_matcher
+
+TIER_LOCAL = "local"
+TIER_LOCAL_SENSITIVE = "local_sensivel"
+TIER_ESCALATED = "gemini"
+
+# Rótulos que costumam anteceder um dado pessoal (comparados sem acento e em minúsculas)
+CUE_WORDS = (
+    "nome", "filiacao", "nascimento", "naturalidade", "endereco", "residencia",
+    "rua", "avenida", "bairro", "cep", "rg", "cpf", "cnpj", "identidade",
+    "registro geral", "titulo de eleitor", "cnh", "habilitacao", "passaporte",
+    "matricula", "pis", "nis", "telefone", "celular", "e-mail", "email",
+)
+
+# Linguagem inadequada: um acerto já é forte indício
+OFFENSIVE_TERMS = ("porra", "caralho", "merda", "puta", "foda", "cacete", "viado", "arrombado")
+
+# Peso de cada tipo de sinal na pontuação (combinados como "ou" probabilístico)
+SIGNAL_WEIGHTS = {
+    'rotulo_sem_dado': 0.3,
+    'numero_nao_reconhecido': 0.25,
+    'possivel_nome': 0.15,
+    'linguagem_inadequada': 0.85,
+    'baixa_confianca': 0.3,
+}
+
+# Distância (em caracteres) até a qual um dado reconhecido "cobre" o rótulo anterior
+CUE_REACH = 40
+
+_CUE_RE = re.compile(r'\b(' + '|'.join(re.escape(w) for w in CUE_WORDS) + r')\b')
+_OFFENSIVE_RE = re.compile(r'\b(' + '|'.join(re.escape(w) for w in OFFENSIVE_TERMS) + r')\b')
+_LONG_NUMBER_RE = re.compile(r'(?<!\d)\d(?:[\d.\-/ ]{4,}\d)(?!\d)')
+_NAME_RE = re.compile(r'\b[A-ZÀ-Ý][a-zà-ÿA-ZÀ-Ý]+(?:\s+(?:d[aeo]s?\s+)?[A-ZÀ-Ý][a-zà-ÿA-ZÀ-Ý]+){2,}\b')
+
+
+def _fold(text: str) -> str:
+    """Minúsculas e sem acentos, preservando o tamanho do texto (para as posições baterem)."""
+    return ''.join(unicodedata.normalize('NFD', ch.lower())[0] for ch in text)
+
+
+@dataclass
+class Assessment:
+    """Resultado da avaliação local de um documento."""
+
+    score: float
+    tier: str
+    matches: List[Tuple[str, int, int]] = field(default_factory=list)
+    signals: List[Tuple[str, str]] = field(default_factory=list)  # (tipo, trecho)
+
+    @property
+    def escalate(self) -> bool:
+        return self.tier == TIER_ESCALATED
+
+    def local_verdict(self) -> Dict:
+        """Veredito no mesmo formato de `gemini_censor_text`, sem chamar o Gemini."""
+        if self.tier == TIER_LOCAL_SENSITIVE:
+            kinds = sorted({kind for kind, _ in self.signals})
+            reason = f"Regras locais: indícios de conteúdo sensível ({', '.join(kinds)})."
+            censored = True
+        elif self.matches:
+            categories = sorted({name for name, _, _ in self.matches})
+            reason = f"Regras locais: {len(self.matches)} trecho(s) censurado(s) ({', '.join(categories)})."
+            censored = True
+        else:
+            reason = "Texto considerado aceitável pelas regras locais."
+            censored = False
+        return {
+            "censored": censored,
+            "reason": reason,
+            "rephrased": None,
+            "tier": self.tier,
+            "score": round(self.score, 3),
+        }
+
+
+class TieredCensor:
+    def __init__(
+        self,
+        low: float = 0.25,
+        high: float = 0.8,
+        matcher: Optional[SensitiveMatcher] = None,
+        weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Args:
+            low (float): Pontuação a partir da qual o documento deixa de ser resolvido localmente
+            high (float): Pontuação a partir da qual o documento é marcado como sensível sem o Gemini
+            matcher (SensitiveMatcher): Detector local (padrão: o compartilhado do pacote)
+            weights (dict): Pesos dos sinais, sobrepondo SIGNAL_WEIGHTS
+        """
+        if not 0.0 <= low <= high <= 1.0:
+            raise ValueError(f"Faixa incerta inválida: low={low}, high={high} (esperado 0 <= low <= high <= 1)")
+        self.low = low
+        self.high = high
+        self.matcher = matcher or default_matcher()
+        self.weights = {**SIGNAL_WEIGHTS, **(weights or {})}
+        self._counts = {TIER_LOCAL: 0, TIER_LOCAL_SENSITIVE: 0, TIER_ESCALATED: 0}
+        self._lock = threading.Lock()
+
+    def signals(self, text: str, matches: List[Tuple[str, int, int]]) -> List[Tuple[str, str]]:
+        """Sinais de risco que sobram no texto depois das regras locais."""
+        folded = _fold(text)
+        found = []
+
+        for m in _CUE_RE.finditer(folded):
+            covered = any(m.end() <= start <= m.end() + CUE_REACH for _, start, _ in matches)
+            if not covered:
+                found.append(('rotulo_sem_dado', text[m.start():m.end()]))
+
+        # Números longos fora dos trechos já reconhecidos (ex: documento lido com erro pelo OCR)
+        for m in _LONG_NUMBER_RE.finditer(text):
+            inside = any(start <= m.start() and m.end() <= end for _, start, end in matches)
+            if not inside and sum(ch.isdigit() for ch in m.group()) >= 6:
+                found.append(('numero_nao_reconhecido', m.group()))
+
+        for m in _NAME_RE.finditer(text):
+            found.append(('possivel_nome', m.group()))
+
+        for m in _OFFENSIVE_RE.finditer(folded):
+            found.append(('linguagem_inadequada', text[m.start():m.end()]))
+
+        return found
+
+    def score(self, signals: List[Tuple[str, str]], low_confidence_ratio: float = 0.0) -> float:
+        """Combina os sinais em uma pontuação de 0 a 1 (1 - produto das chances de cada sinal ser falso)."""
+        clear = 1.0
+        for kind, _ in signals:
+            clear *= 1.0 - self.weights.get(kind, 0.0)
+        clear *= 1.0 - self.weights['baixa_confianca'] * min(max(low_confidence_ratio, 0.0), 1.0)
+        return 1.0 - clear
+
+    def assess(self, text: str, low_confidence_ratio: float = 0.0) -> Assessment:
+        """
+        Avalia o texto com as regras locais e decide a camada (registrando nas métricas).
+
+        Args:
+            text (str): Texto bruto do documento
+            low_confidence_ratio (float): Fração das detecções abaixo da confiança mínima do OCR
+
+        Returns:
+            Assessment: Pontuação, camada escolhida, trechos reconhecidos e sinais restantes
+        """
+        matches = self.matcher.search_text(text)
+        signals = self.signals(text, matches)
+        score = self.score(signals, low_confidence_ratio)
+        if score < self.low:
+            tier = TIER_LOCAL
+        elif score >= self.high:
+            tier = TIER_LOCAL_SENSITIVE
+        else:
+            tier = TIER_ESCALATED
+        with self._lock:
+            self._counts[tier] += 1
+        if tier == TIER_ESCALATED:
+            instrumentation.count('escalonamentos')
+        return Assessment(score=score, tier=tier, matches=matches, signals=signals)
+
+    def assess_document(self, document) -> Assessment:
+        """Avalia um DocumentResult (ou o dict de `DocumentResult.to_dict`)."""
+        if isinstance(document, dict):
+            return self.assess(document.get('raw_text', ''), document.get('low_confidence_ratio', 0.0))
+        return self.assess(document.raw_text, document.low_confidence_ratio)
+
+    def censor(self, text: str, escalate: Callable[[str], Dict], low_confidence_ratio: float = 0.0) -> Dict:
+        """
+        Veredito em camadas: local quando possível, `escalate(text)` (ex: gemini_censor_text) na faixa incerta.
+        """
+        assessment = self.assess(text, low_confidence_ratio)
+        if not assessment.escalate:
+            return assessment.local_verdict()
+        verdict = dict(escalate(text))
+        verdict.update(tier=assessment.tier, score=round(assessment.score, 3))
+        return verdict
+
+    def stats(self) -> dict:
+        """Quantos documentos caíram em cada camada e a taxa de escalonamento para o Gemini."""
+        with self._lock:
+            counts = dict(self._counts)
+        total = sum(counts.values())
+        return {
+            'documents': total,
+            **counts,
+            'escalation_rate': counts[TIER_ESCALATED] / total if total else 0.0,
+        }
@@ -0,0 +1,84 @@
+"""
+Modo de desempenho em CPU para os modelos do EasyOCR.
+
+O leitor do EasyOCR tem duas redes: o detector (CRAFT, só convoluções) e o
+reconhecedor (CRNN: convoluções + LSTM + camada linear). Em CPU, o
+`easyocr.Reader` padrão (`quantize=True`) já aplica a quantização dinâmica
+int8 do torch às duas; como a quantização dinâmica só alcança camadas
+lineares e recorrentes, na prática só o reconhecedor muda, e o detector segue
+em fp32. O EasyOCR também já roda a inferência sem gradientes (`no_grad`).
+
+A linha de base é, portanto, o leitor do EasyOCR sem alterações. O modo de
+CPU mantém essas redes e ajusta o que fica fora delas: fixa as threads
+intra-op e inter-op do torch (e do OpenCV) e roda a inferência em
+`torch.inference_mode()`. O ganho depende da máquina e do número de
+processos; meça com o benchmark (`--modos-cpu`), que sempre compara com o
+leitor sem alterações.
+
+Modos (`CPU_MODES`, opções repassadas ao `easyocr.Reader`):
+- padrao: as redes do EasyOCR como vêm (reconhecedor em int8), só com o ajuste
+  de threads e o inference_mode;
+- fp32: sem a quantização do EasyOCR (`quantize=False`). Mais lento; serve de
+  referência de precisão para medir o que a quantização custa em recall.
+
+O torch só é importado quando um leitor é carregado (ver ocr_registry).
+"""
+
+import contextlib
+from typing import Dict, Optional
+
+# Modo -> opções do `easyocr.Reader`
+CPU_MODES = {
+    'padrao': {},
+    'fp32': {'quantize': False},
+}
+
+# Threads inter-op usadas quando não informadas: o EasyOCR roda uma rede por vez
+DEFAULT_INTEROP_THREADS = 1
+
+# Contexto vazio para quando o modo de CPU está desligado
+NULL_CONTEXT = contextlib.nullcontext()
+
+
+def mode_options(mode: str) -> dict:
+    """Opções do `easyocr.Reader` no modo `mode` (erro com a lista de modos válidos se não existir)."""
+    try:
+        return dict(CPU_MODES[mode])
+    except KeyError:
+        raise ValueError(f"Modo de CPU desconhecido: {mode!r} (use {', '.join(CPU_MODES)})") from None
+
+
+def configure_threads(threads: Optional[int] = None, interop_threads: Optional[int] = None) -> Dict[str, int]:
+    """
+    Fixa as threads do torch (intra-op e inter-op) e do OpenCV no processo.
+
+    As threads inter-op só podem ser definidas uma vez por processo, antes de
+    qualquer trabalho paralelo; depois disso o valor atual é mantido.
+
+    Args:
+        threads (int): Threads intra-op (padrão: mantém o valor atual do torch, que já
+                       vem fixado por worker no modo em lote; ver batch.pin_threads)
+        interop_threads (int): Threads inter-op (padrão: DEFAULT_INTEROP_THREADS)
+
+    Returns:
+        dict: {'threads': ..., 'interop_threads': ...} efetivamente em uso
+    """
+    import cv2
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+        cv2.setNumThreads(threads)
+    try:
+        torch.set_num_interop_threads(interop_threads or DEFAULT_INTEROP_THREADS)
+    except RuntimeError:
+        # Já definido (ou já houve trabalho paralelo) neste processo
+        pass
+    return {'threads': torch.get_num_threads(), 'interop_threads': torch.get_num_interop_threads()}
+
+
+def inference_context():
+    """`torch.inference_mode()` (sem grafo de gradientes nem contadores de versão dos tensores)."""
+    import torch
+
+    return torch.inference_mode()
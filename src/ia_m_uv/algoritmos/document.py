@@ -0,0 +1,164 @@
+"""
+Resultado de uma única passada de OCR sobre um documento.
+
+Tudo o que o pipeline precisa (texto bruto, texto censurado, trechos sensíveis,
+imagem censurada e entrada do Gemini) é derivado, sob demanda, das mesmas
+detecções. Assim o OCR roda uma vez por documento, não uma vez por consumidor.
+"""
+
+from functools import cached_property
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from . import instrumentation
+from .image_io import encode_image
+from .redaction import DEFAULT_STYLE, MASK_STYLE, RedactionMask, build_mask
+from .sensitive_matcher import SensitiveMatch, default_matcher, match_signature
+from .text_censor import sanitize_detections, save_censored_image
+
+# Cada detecção do EasyOCR: ([4 pontos do bbox], texto, confiança)
+Detection = Tuple[list, str, float]
+
+
+class DocumentResult:
+    def __init__(
+        self,
+        detections: List[Detection],
+        image: np.ndarray,
+        confidence_threshold: float = 0.5,
+        image_path: Optional[str] = None,
+        preprocessed: bool = False,
+        redaction_style: str = DEFAULT_STYLE,
+    ):
+        """
+        Args:
+            detections (list): Saída do EasyOCR: [(bbox, text, confidence), ...]
+            image (np.ndarray): Imagem sobre a qual o OCR foi executado
+            confidence_threshold (float): Confiança mínima para o texto entrar nas saídas
+            image_path (str): Caminho original da imagem (usado para nomear as saídas)
+            preprocessed (bool): Se a imagem passou pelo pré-processamento
+            redaction_style (str): 'fill', 'pixelate', 'blur' ou 'mask' (a saída é só a máscara)
+        """
+        self.detections = detections
+        self.image = image
+        self.confidence_threshold = confidence_threshold
+        self.image_path = image_path
+        self.preprocessed = preprocessed
+        self.redaction_style = redaction_style
+        self._external_matches: List[SensitiveMatch] = []
+
+    def _join(self, detections: List[Detection]) -> str:
+        texts = [text for (_, text, conf) in detections if conf >= self.confidence_threshold]
+        return ' '.join(texts).strip()
+
+    @cached_property
+    def raw_text(self) -> str:
+        """Texto sem censura, filtrado apenas pela confiança."""
+        return self._join(self.detections)
+
+    @cached_property
+    def low_confidence_ratio(self) -> float:
+        """Fração das detecções descartadas por estarem abaixo da confiança mínima."""
+        if not self.detections:
+            return 0.0
+        low = sum(1 for (_, _, conf) in self.detections if conf < self.confidence_threshold)
+        return low / len(self.detections)
+
+    @cached_property
+    def _censored(self) -> Tuple[List[Detection], List[SensitiveMatch]]:
+        # Texto e imagem dependem da mesma varredura de padrões
+        return sanitize_detections(self.detections, extra_matches=self._external_matches)
+
+    @property
+    def sanitized_detections(self) -> List[Detection]:
+        """Detecções com os textos sensíveis substituídos por '[CENSURADO]'."""
+        return self._censored[0]
+
+    @cached_property
+    def redaction_mask(self) -> RedactionMask:
+        """Máscara de todas as sub-regiões sensíveis (ver redaction)."""
+        return build_mask(self.image.shape, self.sensitive_spans)
+
+    @cached_property
+    def redacted_image(self) -> np.ndarray:
+        """Cópia da imagem com as regiões sensíveis cobertas (ou só a máscara, no estilo 'mask')."""
+        with instrumentation.span('censura'):
+            if self.redaction_style == MASK_STYLE:
+                return self.redaction_mask.full()
+            return self.redaction_mask.apply(self.image, self.redaction_style, in_place=False)
+
+    @cached_property
+    def filtered_text(self) -> str:
+        """Texto censurado pelo pacote, filtrado pela confiança."""
+        return self._join(self.sanitized_detections)
+
+    @property
+    def sensitive_spans(self) -> List[SensitiveMatch]:
+        """Trechos sensíveis encontrados, com categoria e sub-regiões na imagem."""
+        return self._censored[1]
+
+    @cached_property
+    def sensitive_detections(self) -> List[Detection]:
+        """Detecções originais que contêm algum trecho sensível."""
+        return [
+            original
+            for original, sanitized in zip(self.detections, self.sanitized_detections)
+            if original[1] != sanitized[1]
+        ]
+
+    def add_external_spans(self, spans: Sequence[Tuple[str, str]]) -> List[SensitiveMatch]:
+        """
+        Censura também trechos apontados por fora do detector local (ex: os
+        `spans` do veredito estruturado do Gemini). As saídas derivadas são
+        recalculadas na próxima leitura.
+
+        Args:
+            spans (list): [(categoria, texto), ...]
+
+        Returns:
+            list: Ocorrências localizadas nas detecções
+        """
+        matches = default_matcher().locate(self.detections, spans)
+        if matches:
+            self._external_matches.extend(matches)
+            for attr in ('_censored', 'redaction_mask', 'redacted_image', 'filtered_text', 'sensitive_detections'):
+                self.__dict__.pop(attr, None)
+        return matches
+
+    @property
+    def gemini_input(self) -> str:
+        """Texto enviado ao Gemini para a avaliação contextual."""
+        return self.raw_text
+
+    def redacted_bytes(self, ext: str = ".png", params: Optional[list] = None) -> bytes:
+        """Imagem censurada codificada em memória (ex: para responder um upload sem tocar o disco)."""
+        return encode_image(self.redacted_image, ext, params)
+
+    def save_redacted(self, output_dir: Optional[str] = "censored_images") -> Optional[str]:
+        """
+        Salva a imagem censurada, se o documento tem nome de origem.
+
+        Args:
+            output_dir (str): Pasta de saída (None não grava)
+
+        Returns:
+            str: Caminho salvo, ou None se nada foi gravado
+        """
+        if not self.image_path or output_dir is None:
+            return None
+        return save_censored_image(self.redacted_image, self.image_path, output_dir)
+
+    def to_dict(self) -> dict:
+        """Resumo serializável do documento (sem as imagens)."""
+        return {
+            'image_path': self.image_path,
+            'preprocessed': self.preprocessed,
+            'raw_text': self.raw_text,
+            'filtered_text': self.filtered_text,
+            'sensitive_count': len(self.sensitive_spans),
+            'sensitive_categories': sorted({span.category for span in self.sensitive_spans}),
+            'sensitive_signature': match_signature(self.sensitive_spans),
+            'detections': len(self.detections),
+            'low_confidence_ratio': self.low_confidence_ratio,
+        }
@@ -0,0 +1,277 @@
+"""
+Cliente assíncrono do Gemini para processamento em lote.
+
+- Limite de chamadas simultâneas (semáforo).
+- Limitador do lado do cliente por requisições/minuto e tokens/minuto (token bucket).
+- Repetição com backoff exponencial (e jitter) em 429, 5xx e tempo limite.
+- Erros tipados (`gemini_errors`) em vez de strings "Erro: ...".
+- Backend plugável: o real usa o SDK; o `FakeGeminiBackend` simula localmente
+  latência, cota do servidor e falhas, para testar vazão e backoff offline.
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Union
+
+from . import instrumentation
+from .gemini_errors import GeminiError, classify_error
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa grosseira de tokens (~4 caracteres por token), suficiente para o limitador."""
+    return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Balde de fichas reabastecido continuamente a `rate_per_minute` fichas por minuto."""
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """
+        Espera até haver `amount` fichas e as consome.
+
+        Returns:
+            float: Tempo esperado, em segundos
+        """
+        # Um pedido maior que o balde nunca seria atendido: limita à capacidade
+        amount = min(amount, self.capacity)
+        waited = 0.0
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return waited
+                delay = (amount - self.tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class RateLimiter:
+    """Combina os limites de requisições por minuto e tokens por minuto."""
+
+    def __init__(self, requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None):
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.waited = 0.0
+
+    async def acquire(self, tokens: int) -> None:
+        if self.requests is not None:
+            self.waited += await self.requests.acquire(1)
+        if self.tokens is not None:
+            self.waited += await self.tokens.acquire(tokens)
+
+
+class GenaiBackend:
+    """Backend real: chama a API do Gemini pelo SDK google.generativeai."""
+
+    def __init__(self, api_key: Optional[str] = None, model_name: str = "gemini-1.5-flash",
+                 safety_settings: Optional[List[Dict]] = None):
+        import os
+
+        from .gemini_integration import ModelPool, configure_api_key
+
+        api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise ValueError(
+                "A chave da API do Gemini não foi fornecida e não foi encontrada "
+                "na variável de ambiente 'GOOGLE_API_KEY'."
+            )
+        configure_api_key(api_key)
+        self.model_pool = ModelPool()
+        self.model_name = model_name
+        self.safety_settings = safety_settings or []
+
+    async def generate(self, prompt: Union[str, list], instruction: Optional[str], generation_config: Any) -> str:
+        model = self.model_pool.get(self.model_name, instruction, generation_config, self.safety_settings)
+        instrumentation.count('chamadas_gemini')
+        with instrumentation.span('gemini'):
+            response = await model.generate_content_async(contents=prompt)
+        return response.text
+
+
+class FakeServerError(Exception):
+    """Erro HTTP simulado pelo backend falso (mesmo atributo `code` do google.api_core)."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class FakeGeminiBackend:
+    """
+    Servidor Gemini falso, local, para testar vazão e backoff sem rede.
+
+    Simula latência, uma cota do lado do servidor (responde 429 acima de
+    `server_rpm` requisições na janela de 60s) e uma taxa de falhas 5xx.
+    """
+
+    def __init__(
+        self,
+        responder: Optional[Callable[[str, Optional[str]], str]] = None,
+        latency: float = 0.05,
+        server_rpm: Optional[int] = None,
+        failure_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.responder = responder or (lambda prompt, instruction: "OK")
+        self.latency = latency
+        self.server_rpm = server_rpm
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self._window: deque = deque()
+        self.requests = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.concurrent = 0
+        self.max_concurrent = 0
+
+    async def generate(self, prompt: Union[str, list], instruction: Optional[str], generation_config: Any) -> str:
+        self.requests += 1
+        now = time.monotonic()
+        while self._window and now - self._window[0] > 60:
+            self._window.popleft()
+        if self.server_rpm is not None and len(self._window) >= self.server_rpm:
+            self.rate_limited += 1
+            raise FakeServerError(429, "Resource has been exhausted (e.g. check quota).")
+        self._window.append(now)
+
+        if self._random.random() < self.failure_rate:
+            self.failures += 1
+            raise FakeServerError(503, "The service is currently unavailable.")
+
+        self.concurrent += 1
+        self.max_concurrent = max(self.max_concurrent, self.concurrent)
+        try:
+            await asyncio.sleep(self.latency)
+            return self.responder(prompt if isinstance(prompt, str) else str(prompt), instruction)
+        finally:
+            self.concurrent -= 1
+
+
+class AsyncGeminiClient:
+    """
+    Versão assíncrona do GeminiClient, voltada para lotes.
+
+    Exemplo:
+        client = AsyncGeminiClient(api_key, max_concurrency=8, requests_per_minute=60)
+        respostas = await client.generate_many(textos, instruction=DEFAULT_INSTRUCTION)
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        model_name: str = "gemini-1.5-flash",
+        generation_config: Any = None,
+        safety_settings: Optional[List[Dict]] = None,
+        max_concurrency: int = 8,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 32.0,
+        timeout: Optional[float] = 60.0,
+        backend=None,
+    ):
+        """
+        Args:
+            api_key (str, optional): Chave da API (ou variável de ambiente 'GOOGLE_API_KEY'). Ignorada se `backend` for dado.
+            model_name (str): Modelo a ser usado.
+            generation_config (GenerationConfig, optional): Configuração de geração padrão das chamadas.
+            safety_settings (List[Dict], optional): Configurações de segurança.
+            max_concurrency (int): Máximo de chamadas simultâneas.
+            requests_per_minute (float, optional): Limite do cliente em requisições por minuto.
+            tokens_per_minute (float, optional): Limite do cliente em tokens (estimados) por minuto.
+            max_retries (int): Tentativas extras em erros repetíveis (429, 5xx, tempo limite).
+            backoff_base (float): Espera da primeira repetição, em segundos (dobra a cada tentativa).
+            backoff_max (float): Espera máxima entre tentativas.
+            timeout (float, optional): Tempo limite de cada tentativa, em segundos.
+            backend: Implementação de `generate(prompt, instruction, config)`; padrão: GenaiBackend.
+        """
+        self.model_name = model_name
+        self.generation_config = generation_config
+        self.backend = backend or GenaiBackend(api_key, model_name, safety_settings)
+        self.max_concurrency = max_concurrency
+        self.limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self._semaphore = None
+        self.stats = {'calls': 0, 'attempts': 0, 'retries': 0, 'errors': 0}
+
+    def _backoff(self, attempt: int) -> float:
+        # Jitter "cheio" pela metade: evita que todas as chamadas repitam juntas
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def generate_response_instructed(
+        self,
+        prompt: Union[str, list],
+        instruction: Optional[str] = None,
+        generation_config: Any = None,
+    ) -> str:
+        """
+        Gera uma resposta guiada por `instruction`, respeitando concorrência, limites de taxa e repetições.
+
+        Raises:
+            GeminiError: Subclasse correspondente à falha (após esgotar as repetições, se repetível)
+        """
+        if self._semaphore is None:
+            # Criado sob demanda para pertencer ao event loop em uso
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        config = generation_config or self.generation_config
+        tokens = estimate_tokens(prompt if isinstance(prompt, str) else str(prompt))
+        self.stats['calls'] += 1
+
+        for attempt in range(self.max_retries + 1):
+            await self.limiter.acquire(tokens)
+            async with self._semaphore:
+                self.stats['attempts'] += 1
+                try:
+                    call = self.backend.generate(prompt, instruction, config)
+                    if self.timeout is not None:
+                        return await asyncio.wait_for(call, self.timeout)
+                    return await call
+                except Exception as e:
+                    error = classify_error(e)
+                    if error is not e:
+                        error.__cause__ = e
+            if not error.retryable or attempt == self.max_retries:
+                self.stats['errors'] += 1
+                raise error
+            # A espera acontece fora do semáforo, liberando a vaga para outras chamadas
+            self.stats['retries'] += 1
+            await asyncio.sleep(self._backoff(attempt))
+
+    async def generate_many(
+        self,
+        prompts: Sequence[Union[str, list]],
+        instruction: Optional[str] = None,
+        generation_config: Any = None,
+        return_exceptions: bool = True,
+    ) -> List[Union[str, GeminiError]]:
+        """
+        Gera respostas para vários prompts em paralelo, na ordem dos prompts.
+
+        Com `return_exceptions=True`, a falha de um prompt vira o GeminiError na
+        posição dele, sem cancelar os demais.
+        """
+        return await asyncio.gather(
+            *(self.generate_response_instructed(p, instruction, generation_config) for p in prompts),
+            return_exceptions=return_exceptions,
+        )
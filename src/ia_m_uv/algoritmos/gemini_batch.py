@@ -0,0 +1,212 @@
+"""
+Avaliação de vários documentos em uma única requisição ao Gemini.
+
+A maioria dos textos de OCR é curta (algumas centenas de caracteres de um RG),
+e a cota da API é contada por requisição. Aqui os documentos são empacotados em
+um único prompt, cada um com um identificador estável, até um orçamento de
+tokens; o modelo devolve um veredito estruturado por identificador e a resposta
+é separada de volta. Se a resposta não puder ser lida (JSON inválido, cortado,
+identificadores faltando), só os documentos sem veredito são reenviados, em
+lotes cada vez menores, até chegar em um documento por requisição.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from google.generativeai.types import GenerationConfig
+
+from .gemini_async import estimate_tokens
+from .gemini_censor import (
+    SPAN_CATEGORIES,
+    VERDICT_SCHEMA,
+    CensorVerdict,
+    _load_json,
+    parse_verdict,
+)
+from .gemini_errors import GeminiError, GeminiRequestError, GeminiResponseError
+from .gemini_integration import GeminiClient
+
+BATCH_INSTRUCTION = (
+    "Você é um assistente que detecta linguagem inadequada, ofensiva, sugestiva, sensível "
+    "ou que contenha dados pessoais (como CPF, RG, datas de nascimento, números de documentos, "
+    "endereços, nomes completos, etc) em textos extraídos de imagens. "
+    "Você receberá vários documentos, cada um entre <documento id=\"...\"> e </documento>. "
+    "Avalie cada documento separadamente e responda somente com JSON no esquema pedido, com "
+    "exatamente um item em 'results' por documento, usando o mesmo 'id'. Em cada item: "
+    "'censored' indica se há conteúdo desse tipo; 'spans' lista cada trecho problemático copiado "
+    f"exatamente como aparece no documento, com a categoria ({', '.join(SPAN_CATEGORIES)}); "
+    "'reason' explica brevemente; e, se 'censored' for verdadeiro, 'rephrased' traz o texto "
+    "reescrito de forma segura, neutra e sem conteúdo sensível."
+)
+
+BATCH_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "results": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"id": {"type": "string"}, **VERDICT_SCHEMA["properties"]},
+                "required": ["id", *VERDICT_SCHEMA["required"]],
+            },
+        },
+    },
+    "required": ["results"],
+}
+
+BATCH_CONFIG = GenerationConfig(
+    temperature=0.0,
+    response_mime_type="application/json",
+    response_schema=BATCH_SCHEMA,
+)
+
+# Tokens (estimados) do envelope <documento id="..."></documento> de cada texto
+_ENVELOPE_TOKENS = 12
+
+
+def format_batch(items: Sequence[Tuple[str, str]]) -> str:
+    """Monta o prompt com cada texto delimitado pelo seu identificador."""
+    blocks = []
+    for doc_id, text in items:
+        # Um texto não pode fechar o bloco antes da hora
+        text = text.strip().replace("</documento>", "</ documento>")
+        blocks.append(f'<documento id="{doc_id}">\n{text}\n</documento>')
+    return "\n\n".join(blocks)
+
+
+def pack_batches(
+    items: Sequence[Tuple[str, str]],
+    max_tokens: int = 6000,
+    max_docs: int = 25,
+) -> List[List[Tuple[str, str]]]:
+    """
+    Agrupa [(id, texto), ...] em lotes, na ordem, sem passar de `max_tokens`
+    (estimados) nem de `max_docs` por lote. Um texto maior que o orçamento vai sozinho.
+    """
+    batches: List[List[Tuple[str, str]]] = []
+    current: List[Tuple[str, str]] = []
+    used = 0
+    for doc_id, text in items:
+        cost = estimate_tokens(text) + _ENVELOPE_TOKENS
+        if current and (used + cost > max_tokens or len(current) >= max_docs):
+            batches.append(current)
+            current, used = [], 0
+        current.append((doc_id, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def split_response(response: str, items: Sequence[Tuple[str, str]]) -> Dict[str, CensorVerdict]:
+    """
+    Separa a resposta do lote em vereditos por identificador. Itens com id
+    desconhecido ou fora do esquema são ignorados (o documento fica sem veredito).
+
+    Raises:
+        GeminiResponseError: Se a resposta nem chega a ser um JSON com 'results'
+    """
+    data = _load_json(response)
+    results = data.get("results") if isinstance(data, dict) else data
+    if not isinstance(results, list):
+        raise GeminiResponseError("Resposta do lote sem a lista 'results'.")
+
+    texts = dict(items)
+    verdicts: Dict[str, CensorVerdict] = {}
+    for item in results:
+        if not isinstance(item, dict):
+            continue
+        doc_id = str(item.get("id", ""))
+        if doc_id not in texts or doc_id in verdicts:
+            continue
+        try:
+            verdicts[doc_id] = parse_verdict(item, texts[doc_id].strip())
+        except GeminiResponseError:
+            continue
+    return verdicts
+
+
+class GeminiBatcher:
+    def __init__(
+        self,
+        client: GeminiClient,
+        max_batch_tokens: int = 6000,
+        max_batch_docs: int = 25,
+    ):
+        """
+        Args:
+            client (GeminiClient): Cliente usado nas requisições (de preferência com raise_errors=True)
+            max_batch_tokens (int): Orçamento de tokens (estimados) dos textos de cada requisição
+            max_batch_docs (int): Máximo de documentos por requisição
+        """
+        self.client = client
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_docs = max_batch_docs
+        self.stats = {'documents': 0, 'requests': 0, 'splits': 0, 'errors': 0}
+
+    def censor_many(
+        self,
+        texts: Sequence[str],
+        ids: Optional[Sequence[str]] = None,
+    ) -> List[Union[CensorVerdict, GeminiError]]:
+        """
+        Avalia vários textos com o mínimo de requisições.
+
+        Args:
+            texts (list): Textos a avaliar
+            ids (list): Identificadores estáveis dos textos (padrão: "d0", "d1", ...)
+
+        Returns:
+            list: Um CensorVerdict por texto, na mesma ordem; a falha de um texto vira
+                  o GeminiError na posição dele, sem interromper os demais
+        """
+        ids = [str(i) for i in ids] if ids is not None else [f"d{i}" for i in range(len(texts))]
+        if len(set(ids)) != len(ids):
+            raise ValueError("Os identificadores dos documentos precisam ser únicos.")
+
+        items = list(zip(ids, texts))
+        self.stats['documents'] += len(items)
+        results: Dict[str, Union[CensorVerdict, GeminiError]] = {}
+        for batch in pack_batches(items, self.max_batch_tokens, self.max_batch_docs):
+            self._run(batch, results)
+        return [results[doc_id] for doc_id in ids]
+
+    def _run(self, batch: List[Tuple[str, str]], results: Dict) -> None:
+        self.stats['requests'] += 1
+        try:
+            response = self.client.generate_response_instructed(
+                prompt=format_batch(batch),
+                instruction=BATCH_INSTRUCTION,
+                generation_config=BATCH_CONFIG,
+            )
+            if not isinstance(response, str) or response.startswith("Erro:"):
+                # Cliente criado sem raise_errors: a falha chega como texto
+                raise GeminiRequestError(str(response))
+            verdicts = split_response(response, batch)
+            missing = [item for item in batch if item[0] not in verdicts]
+        except (GeminiResponseError, GeminiRequestError) as e:
+            # Resposta ilegível ou requisição rejeitada (ex: grande demais): um lote menor pode resolver
+            verdicts, missing, error = {}, list(batch), e
+        except GeminiError as e:
+            # Cota e falhas do servidor não melhoram dividindo o lote
+            self._fail(batch, results, e)
+            return
+        else:
+            error = GeminiResponseError("O Gemini não devolveu veredito para o documento.")
+
+        results.update(verdicts)
+        if not missing:
+            return
+        if len(missing) == 1 and len(batch) == 1:
+            self._fail(missing, results, error)
+            return
+
+        self.stats['splits'] += 1
+        middle = max(1, len(missing) // 2)
+        for half in (missing[:middle], missing[middle:]):
+            if half:
+                self._run(half, results)
+
+    def _fail(self, batch: List[Tuple[str, str]], results: Dict, error: GeminiError) -> None:
+        self.stats['errors'] += len(batch)
+        for doc_id, _ in batch:
+            results[doc_id] = error
@@ -0,0 +1,157 @@
+"""
+Cache de respostas do Gemini com TTL, limite de tamanho e de-duplicação em voo.
+
+Textos idênticos (mesmo modelo de formulário, reprocessamentos) não precisam de
+uma nova chamada à API. A chave é o hash do texto normalizado, da instrução, do
+nome do modelo e da configuração de geração. Chamadas concorrentes com a mesma
+chave compartilham uma única requisição: a primeira executa, as demais esperam
+o resultado dela. Erros nunca são guardados no cache.
+"""
+
+import dataclasses
+import hashlib
+import json
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Optional
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza Unicode (NFC) e espaços, para que variações de OCR caiam na mesma chave."""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def config_fingerprint(config: Any) -> str:
+    """Representação estável de uma GenerationConfig (dataclass), dict ou None."""
+    if config is None:
+        return 'null'
+    if dataclasses.is_dataclass(config):
+        config = dataclasses.asdict(config)
+    return json.dumps(config, sort_keys=True, default=repr)
+
+
+def make_key(
+    prompt: str,
+    instruction: Optional[str],
+    model_name: str,
+    generation_config: Any = None,
+    safety_settings: Any = None,
+) -> str:
+    """Chave do cache para uma chamada instruída."""
+    digest = hashlib.sha256()
+    for part in (
+        normalize_text(prompt),
+        instruction or '',
+        model_name,
+        config_fingerprint(generation_config),
+        json.dumps(safety_settings or [], sort_keys=True, default=repr),
+    ):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 1024):
+        """
+        Args:
+            ttl (float): Tempo de vida de cada resposta, em segundos
+            max_entries (int): Número máximo de respostas guardadas (descarta as menos usadas)
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # chamadas que reaproveitaram uma requisição em voo
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._lookup(key)
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key: str, value: Any) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_call(self, key: str, fn: Callable[[], Any]) -> Any:
+        """
+        Devolve a resposta em cache ou executa `fn` uma única vez por chave,
+        mesmo com várias threads pedindo a mesma chave ao mesmo tempo.
+
+        Se `fn` levantar uma exceção, ela é repassada a todos que esperavam e
+        nada é guardado.
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                return value
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+                self.misses += 1
+            else:
+                self.shared += 1
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = fn()
+        except BaseException as e:
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, value)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses + self.shared
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared': self.shared,
+            'hit_rate': (self.hits + self.shared) / lookups if lookups else 0.0,
+            'entries': entries,
+        }
+
+
+# Cache compartilhado pelo processo, usado por padrão em gemini_censor_text
+SHARED_RESPONSE_CACHE = ResponseCache()
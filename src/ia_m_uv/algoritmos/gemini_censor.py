@@ -1,5 +1,16 @@
 # algoritmos/gemini_censor.py
-from typing import Dict, Optional
+import asyncio
+import json
+import re
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional, Union
+
+from google.generativeai.types import GenerationConfig
+
+from .gemini_async import AsyncGeminiClient
+from .gemini_cache import SHARED_RESPONSE_CACHE, ResponseCache
+from .gemini_errors import GeminiError, GeminiResponseError
 from .gemini_integration import GeminiClient  
 
 DEFAULT_INSTRUCTION = (
@@ -10,11 +21,106 @@ DEFAULT_INSTRUCTION = (
     "Caso não haja, responda apenas com 'OK'."
 )
 
+REPHRASE_INSTRUCTION = "Você é um filtro de segurança de conteúdo. Reescreva o texto de forma neutra."
+REPHRASE_PROMPT = "Reescreva o seguinte texto de forma segura, neutra e sem conteúdo sensível:\n\n{text}"
+
+# Modo estruturado: detecção e reescrita em uma única chamada, com resposta JSON
+SPAN_CATEGORIES = [
+    "cpf", "rg", "cnpj", "data_nascimento", "documento", "nome", "endereco",
+    "telefone", "email", "placa", "linguagem_inadequada", "outro",
+]
+
+STRUCTURED_INSTRUCTION = (
+    "Você é um assistente que detecta linguagem inadequada, ofensiva, sugestiva, sensível "
+    "ou que contenha dados pessoais (como CPF, RG, datas de nascimento, números de documentos, "
+    "endereços, nomes completos, etc) em textos extraídos de imagens. "
+    "Responda somente com JSON no esquema pedido: 'censored' indica se há conteúdo desse tipo; "
+    "'spans' lista cada trecho problemático copiado exatamente como aparece no texto, com a "
+    f"categoria ({', '.join(SPAN_CATEGORIES)}); 'reason' explica brevemente; e, se 'censored' "
+    "for verdadeiro, 'rephrased' traz o texto reescrito de forma segura, neutra e sem conteúdo sensível."
+)
+
+SPAN_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "text": {"type": "string"},
+        "category": {"type": "string"},
+    },
+    "required": ["text", "category"],
+}
+
+VERDICT_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "censored": {"type": "boolean"},
+        "reason": {"type": "string"},
+        "spans": {"type": "array", "items": SPAN_SCHEMA},
+        "rephrased": {"type": "string", "nullable": True},
+    },
+    "required": ["censored", "spans"],
+}
+
+STRUCTURED_CONFIG = GenerationConfig(
+    temperature=0.0,
+    response_mime_type="application/json",
+    response_schema=VERDICT_SCHEMA,
+)
+
+
+@dataclass
+class FlaggedSpan:
+    text: str
+    category: str
+    start: Optional[int] = None  # posição no texto avaliado, se encontrado literalmente
+    end: Optional[int] = None
+
+
+@dataclass
+class CensorVerdict:
+    censored: bool
+    reason: str = ""
+    spans: List[FlaggedSpan] = field(default_factory=list)
+    rephrased: Optional[str] = None
+
+    def as_dict(self) -> Dict:
+        """Mesmo formato de `gemini_censor_text`, mais a lista de trechos."""
+        return asdict(self)
+
+    def span_pairs(self) -> List[tuple]:
+        """[(categoria, texto), ...], no formato de DocumentResult.add_external_spans."""
+        return [(span.category, span.text) for span in self.spans]
+
+# Clientes reaproveitados entre chamadas: (api_key, model_name, id(cache)) -> GeminiClient
+_shared_clients: Dict[tuple, GeminiClient] = {}
+_shared_clients_lock = threading.Lock()
+
+
+def get_shared_client(
+    api_key: Optional[str] = None,
+    model_name: str = "gemini-1.5-flash",
+    cache: Optional[ResponseCache] = SHARED_RESPONSE_CACHE,
+) -> GeminiClient:
+    """
+    Retorna um GeminiClient do processo para a chave/modelo/cache, criando-o na primeira vez.
+
+    Assim, censurar N documentos não configura o SDK nem monta os modelos N vezes.
+    """
+    key = (api_key, model_name, id(cache))
+    with _shared_clients_lock:
+        client = _shared_clients.get(key)
+        if client is None:
+            client = GeminiClient(api_key=api_key, model_name=model_name, response_cache=cache, raise_errors=True)
+            _shared_clients[key] = client
+        return client
+
+
 def gemini_censor_text(
     text: str,
     api_key: Optional[str] = None,
     instruction: Optional[str] = DEFAULT_INSTRUCTION,
-    model_name: str = "gemini-1.5-flash"
+    model_name: str = "gemini-1.5-flash",
+    cache: Optional[ResponseCache] = SHARED_RESPONSE_CACHE,
+    client: Optional[GeminiClient] = None,
 ) -> Dict:
     """
     Usa o Gemini para avaliar e censurar texto de forma mais contextual.
@@ -24,6 +130,8 @@ def gemini_censor_text(
         api_key (str): Chave da API Gemini (ou usa a variável de ambiente).
         instruction (str): Instrução para o modelo.
         model_name (str): Modelo a ser usado.
+        cache (ResponseCache): Cache de respostas (padrão: o compartilhado pelo processo; None desativa).
+        client (GeminiClient): Cliente já criado; se omitido, usa o compartilhado (ver get_shared_client).
 
     Returns:
         dict: {
@@ -31,8 +139,11 @@ def gemini_censor_text(
             "reason": str (explicação ou 'OK'),
             "rephrased": Optional[str]
         }
+
+    Raises:
+        GeminiError: Se a chamada à API falhar (a falha não é tratada como veredito)
     """
-    client = GeminiClient(api_key=api_key, model_name=model_name)
+    client = client or get_shared_client(api_key, model_name, cache)
     prompt = text.strip()
 
     response = client.generate_response_instructed(
@@ -41,21 +152,155 @@ def gemini_censor_text(
     )
 
     # Heurística simples: se resposta for só "OK", está limpo
-    if response.strip().upper() == "OK":
-        return {
-            "censored": False,
-            "reason": "Texto considerado aceitável pelo Gemini.",
-            "rephrased": None
-        }
+    if _is_ok(response):
+        return _clean_verdict()
 
     # Tenta gerar reescrita se desejado
     rephrase_response = client.generate_response_instructed(
-        prompt=f"Reescreva o seguinte texto de forma segura, neutra e sem conteúdo sensível:\n\n{prompt}",
-        instruction="Você é um filtro de segurança de conteúdo. Reescreva o texto de forma neutra."
+        prompt=REPHRASE_PROMPT.format(text=prompt),
+        instruction=REPHRASE_INSTRUCTION
+    )
+
+    return _censored_verdict(response, rephrase_response)
+
+
+async def gemini_censor_text_async(
+    text: str,
+    client: AsyncGeminiClient,
+    instruction: Optional[str] = DEFAULT_INSTRUCTION,
+) -> Dict:
+    """
+    Versão assíncrona de `gemini_censor_text`, sobre um AsyncGeminiClient
+    (concorrência limitada, limites de taxa e repetições com backoff).
+
+    Returns:
+        dict: Mesmo formato de `gemini_censor_text`
+
+    Raises:
+        GeminiError: Se a chamada falhar depois das repetições
+    """
+    prompt = text.strip()
+    response = await client.generate_response_instructed(prompt, instruction)
+    if _is_ok(response):
+        return _clean_verdict()
+    rephrase_response = await client.generate_response_instructed(
+        REPHRASE_PROMPT.format(text=prompt), REPHRASE_INSTRUCTION
     )
+    return _censored_verdict(response, rephrase_response)
+
 
+async def gemini_censor_many(
+    texts: List[str],
+    client: AsyncGeminiClient,
+    instruction: Optional[str] = DEFAULT_INSTRUCTION,
+) -> List[Union[Dict, GeminiError]]:
+    """
+    Avalia vários textos em paralelo. A falha de um texto vira o GeminiError
+    na posição dele, sem interromper os demais.
+    """
+    return await asyncio.gather(
+        *(gemini_censor_text_async(text, client, instruction) for text in texts),
+        return_exceptions=True,
+    )
+
+
+def _is_ok(response: str) -> bool:
+    return response.strip().upper() == "OK"
+
+
+def _clean_verdict() -> Dict:
+    return {
+        "censored": False,
+        "reason": "Texto considerado aceitável pelo Gemini.",
+        "rephrased": None
+    }
+
+
+def _censored_verdict(response: str, rephrase_response: Optional[str]) -> Dict:
     return {
         "censored": True,
         "reason": response.strip(),
         "rephrased": rephrase_response.strip() if rephrase_response else None
     }
+
+
+def _load_json(response: str):
+    # Alguns modelos ainda embrulham o JSON em ```json ... ```
+    cleaned = re.sub(r"^\s*```(?:json)?\s*|\s*```\s*$", "", response)
+    try:
+        return json.loads(cleaned)
+    except (json.JSONDecodeError, TypeError) as e:
+        raise GeminiResponseError(f"Resposta do Gemini não é um JSON válido: {e}") from e
+
+
+def parse_verdict(data, source_text: str = "") -> CensorVerdict:
+    """
+    Converte a resposta estruturada (string JSON ou dict já carregado) em CensorVerdict,
+    localizando cada trecho no texto avaliado.
+
+    Raises:
+        GeminiResponseError: Se a resposta não seguir o esquema
+    """
+    if isinstance(data, str):
+        data = _load_json(data)
+    if not isinstance(data, dict) or not isinstance(data.get("censored"), bool):
+        raise GeminiResponseError("Resposta do Gemini sem o campo booleano 'censored'.")
+
+    spans = []
+    for item in data.get("spans") or []:
+        if not isinstance(item, dict) or not isinstance(item.get("text"), str) or not item["text"].strip():
+            raise GeminiResponseError(f"Trecho fora do esquema na resposta do Gemini: {item!r}")
+        text = item["text"].strip()
+        start = source_text.find(text) if source_text else -1
+        spans.append(FlaggedSpan(
+            text=text,
+            category=str(item.get("category") or "outro"),
+            start=start if start >= 0 else None,
+            end=start + len(text) if start >= 0 else None,
+        ))
+
+    rephrased = data.get("rephrased")
+    return CensorVerdict(
+        censored=data["censored"],
+        reason=str(data.get("reason") or ("Texto considerado aceitável pelo Gemini." if not data["censored"] else "")),
+        spans=spans,
+        rephrased=rephrased.strip() if isinstance(rephrased, str) and rephrased.strip() else None,
+    )
+
+
+def gemini_censor_structured(
+    text: str,
+    api_key: Optional[str] = None,
+    model_name: str = "gemini-1.5-flash",
+    cache: Optional[ResponseCache] = SHARED_RESPONSE_CACHE,
+    client: Optional[GeminiClient] = None,
+) -> CensorVerdict:
+    """
+    Avalia e reescreve o texto em uma única chamada com saída JSON estruturada.
+
+    Documentos sinalizados custam uma ida e volta (e não duas, como em
+    `gemini_censor_text`), e os trechos apontados podem ser usados para
+    censurar a imagem (ver DocumentResult.add_external_spans). Sem `client`,
+    usa o cliente compartilhado (ver get_shared_client).
+
+    Returns:
+        CensorVerdict: Veredito tipado (censored, reason, spans, rephrased)
+
+    Raises:
+        GeminiError: Se a chamada falhar ou a resposta não seguir o esquema
+    """
+    client = client or get_shared_client(api_key, model_name, cache)
+    prompt = text.strip()
+    response = client.generate_response_instructed(
+        prompt=prompt,
+        instruction=STRUCTURED_INSTRUCTION,
+        generation_config=STRUCTURED_CONFIG,
+    )
+    return parse_verdict(response, prompt)
+
+
+async def gemini_censor_structured_async(text: str, client: AsyncGeminiClient) -> CensorVerdict:
+    """Versão assíncrona de `gemini_censor_structured`."""
+    prompt = text.strip()
+    response = await client.generate_response_instructed(prompt, STRUCTURED_INSTRUCTION, STRUCTURED_CONFIG)
+    return parse_verdict(response, prompt)
@@ -0,0 +1,70 @@
+"""
+Erros tipados das chamadas ao Gemini.
+
+Substituem as strings "Erro: ..." para quem precisa distinguir falha de resposta:
+limites de taxa (429) e erros do servidor (5xx) podem ser repetidos com backoff,
+os demais indicam um problema na requisição.
+"""
+
+import asyncio
+from typing import Optional
+
+
+class GeminiError(Exception):
+    """Erro genérico de uma chamada ao Gemini."""
+
+    retryable = False
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class GeminiRateLimitError(GeminiError):
+    """Cota excedida (HTTP 429 / ResourceExhausted)."""
+
+    retryable = True
+
+
+class GeminiServerError(GeminiError):
+    """Falha do lado do servidor (HTTP 5xx)."""
+
+    retryable = True
+
+
+class GeminiTimeoutError(GeminiError):
+    """A chamada passou do tempo limite."""
+
+    retryable = True
+
+
+class GeminiRequestError(GeminiError):
+    """Requisição rejeitada (chave inválida, conteúdo bloqueado, parâmetros etc.)."""
+
+
+class GeminiResponseError(GeminiError):
+    """A resposta chegou, mas fora do formato estruturado esperado."""
+
+
+def classify_error(exc: BaseException) -> GeminiError:
+    """
+    Converte uma exceção do SDK (ou do backend falso) no erro tipado equivalente.
+
+    Usa o atributo `code` (status HTTP) que as exceções do google.api_core
+    expõem, sem precisar importar o SDK.
+    """
+    if isinstance(exc, GeminiError):
+        return exc
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError)):
+        return GeminiTimeoutError(f"Tempo limite excedido: {exc}")
+
+    status = getattr(exc, 'code', None)
+    status = int(status) if isinstance(status, int) else None
+    message = str(exc) or exc.__class__.__name__
+    if status == 429:
+        return GeminiRateLimitError(message, status)
+    if status is not None and status >= 500:
+        return GeminiServerError(message, status)
+    if status == 408:
+        return GeminiTimeoutError(message, status)
+    return GeminiRequestError(message, status)
@@ -1,9 +1,76 @@
+import json
 import os
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Union
 
 import google.generativeai as genai
 from google.generativeai.types import GenerationConfig, Tool
 
+from . import instrumentation
+from .gemini_cache import ResponseCache, config_fingerprint, make_key
+from .gemini_errors import classify_error
+
+# Chave da API configurada por último no SDK (genai.configure é global ao processo)
+_configured_api_key: Optional[str] = None
+_configure_lock = threading.Lock()
+
+
+def configure_api_key(api_key: str) -> None:
+    """Chama genai.configure só quando a chave muda, e não a cada cliente criado."""
+    global _configured_api_key
+    with _configure_lock:
+        if api_key != _configured_api_key:
+            genai.configure(api_key=api_key)
+            _configured_api_key = api_key
+
+
+class ModelPool:
+    """
+    Conjunto limitado de instâncias de GenerativeModel já configuradas, chaveado
+    por (modelo, instrução, configuração de geração, configurações de segurança).
+    Quando passa do limite, descarta a usada há mais tempo.
+    """
+
+    def __init__(self, max_size: int = 32):
+        self.max_size = max_size
+        self.created = 0
+        self._models: "OrderedDict[tuple, genai.GenerativeModel]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        model_name: str,
+        instruction: Optional[str],
+        generation_config: Optional[GenerationConfig],
+        safety_settings: Optional[List[Dict]],
+    ) -> "genai.GenerativeModel":
+        key = (
+            model_name,
+            instruction,
+            config_fingerprint(generation_config),
+            json.dumps(safety_settings or [], sort_keys=True, default=repr),
+        )
+        with self._lock:
+            model = self._models.get(key)
+            if model is not None:
+                self._models.move_to_end(key)
+                return model
+            model = genai.GenerativeModel(
+                model_name=model_name,
+                generation_config=generation_config,
+                safety_settings=safety_settings,
+                system_instruction=instruction,
+            )
+            self.created += 1
+            self._models[key] = model
+            while len(self._models) > self.max_size:
+                self._models.popitem(last=False)
+            return model
+
+    def __len__(self) -> int:
+        return len(self._models)
+
 
 class GeminiClient:
     """
@@ -34,6 +101,9 @@ class GeminiClient:
         top_k: int = 32,
         system_instruction: Optional[str] = None,
         safety_settings: Optional[List[Dict]] = None,
+        response_cache: Optional[ResponseCache] = None,
+        raise_errors: bool = False,
+        model_pool_size: int = 32,
     ):
         """
         Inicializa o cliente Gemini.
@@ -47,6 +117,9 @@ class GeminiClient:
             top_k (int): Amostragem de top-k. O modelo considera os top-k tokens mais prováveis. Padrão: 32.
             system_instruction (str, optional): Uma instrução de sistema que guia o comportamento geral do modelo. Define um persona ou um conjunto de regras para todas as interações.
             safety_settings (List[Dict], optional): Configurações de segurança para ajustar os limites de conteúdo inseguro. Por padrão, utiliza as configurações padrão do Gemini.
+            response_cache (ResponseCache, optional): Cache de respostas para `generate_response_instructed`. Textos repetidos não geram nova chamada e chamadas concorrentes idênticas compartilham uma só requisição.
+            raise_errors (bool): Se True, falhas da API levantam um `GeminiError` tipado (ver gemini_errors) em vez de retornar a string "Erro: ...".
+            model_pool_size (int): Quantas instâncias de modelo instruído (por instrução/configuração) manter prontas para reuso.
         Raises:
             ValueError: Se a chave da API não for fornecida e não for encontrada nas variáveis de ambiente.
         """
@@ -59,7 +132,7 @@ class GeminiClient:
                     "Por favor, forneça a chave ou defina a variável de ambiente."
                 )
 
-        genai.configure(api_key=api_key)
+        configure_api_key(api_key)
         self.model_name = model_name
         self.default_generation_config = GenerationConfig(
             temperature=temperature,
@@ -69,6 +142,9 @@ class GeminiClient:
         )
         self.system_instruction = system_instruction
         self.safety_settings = safety_settings if safety_settings is not None else []
+        self.response_cache = response_cache
+        self.raise_errors = raise_errors
+        self.model_pool = ModelPool(model_pool_size)
         self.model = genai.GenerativeModel(
             model_name=self.model_name,
             generation_config=self.default_generation_config,
@@ -104,12 +180,14 @@ class GeminiClient:
         effective_config = generation_config if generation_config else self.default_generation_config
 
         try:
-            response = self.model.generate_content(
-                contents=prompt,
-                generation_config=effective_config,
-                tools=tools,
-                stream=stream,
-            )
+            instrumentation.count('chamadas_gemini')
+            with instrumentation.span('gemini'):
+                response = self.model.generate_content(
+                    contents=prompt,
+                    generation_config=effective_config,
+                    tools=tools,
+                    stream=stream,
+                )
             if stream:
                 # Retorna um gerador de texto
                 return (chunk.text for chunk in response)
@@ -127,6 +205,8 @@ class GeminiClient:
                 else:
                     return ""  # Retorna string vazia se não houver texto nem partes
         except Exception as e:
+            if self.raise_errors:
+                raise classify_error(e) from e
             print(f"Erro ao gerar resposta: {e}")
             return f"Erro: {e}"
 
@@ -141,7 +221,8 @@ class GeminiClient:
         """
         Gera uma resposta de texto com um comportamento guiado por uma instrução específica.
         Esta instrução temporária **substitui** o `system_instruction` global
-        do cliente para esta chamada, criando uma nova instância de modelo temporária.
+        do cliente para esta chamada. A instância de modelo com essa instrução e
+        configuração vem do `model_pool` e é reaproveitada nas próximas chamadas.
 
         Args:
             prompt (Union[str, List[Union[str, bytes, Dict]]]): O prompt de entrada para o modelo.
@@ -153,47 +234,51 @@ class GeminiClient:
         Returns:
             Union[str, bytes, Dict, List[Union[str, bytes, Dict]]]: O conteúdo gerado pelo modelo.
         """
-        # Para aplicar uma instrução temporária, precisamos criar uma nova instância de GenerativeModel
-        # ou ajustar o system_instruction temporariamente, o que é mais limpo com uma nova instância.
-        # Caso contrário, o system_instruction original do objeto self.model seria usado.
-
-        # Clona a configuração padrão ou usa a fornecida para evitar modificações indesejadas
-        effective_config = (
-            generation_config if generation_config else GenerationConfig(
-                temperature=self.default_generation_config.temperature,
-                max_output_tokens=self.default_generation_config.max_output_tokens,
-                top_p=self.default_generation_config.top_p,
-                top_k=self.default_generation_config.top_k,
-            )
-        )
+        # Para aplicar uma instrução temporária é preciso uma instância de GenerativeModel com
+        # esse system_instruction; caso contrário, o system_instruction de self.model seria usado.
+        # As instâncias ficam no pool, então só a primeira chamada com cada instrução paga a criação.
+        # A configuração não é alterada pelo SDK, então a padrão pode ser usada diretamente.
+        effective_config = generation_config if generation_config else self.default_generation_config
 
-        # Cria uma nova instância de modelo com a instrução específica
-        instructed_model = genai.GenerativeModel(
-            model_name=self.model_name,
-            generation_config=effective_config,
-            safety_settings=self.safety_settings,
-            system_instruction=instruction,  # A instrução específica para esta chamada
-        )
+        def call():
+            return self._call_instructed(prompt, instruction, effective_config, tools, stream)
 
         try:
+            # Respostas completas de texto podem vir do cache (streams e ferramentas não)
+            if self.response_cache is not None and isinstance(prompt, str) and not stream and not tools:
+                key = make_key(prompt, instruction, self.model_name, effective_config, self.safety_settings)
+                return self.response_cache.get_or_call(key, call)
+            return call()
+        except Exception as e:
+            if self.raise_errors:
+                raise classify_error(e) from e
+            print(f"Erro ao gerar resposta instruída: {e}")
+            return f"Erro: {e}"
+
+    def _call_instructed(self, prompt, instruction, effective_config, tools, stream):
+        """Faz a chamada instruída; exceções sobem para quem chamou (e não entram no cache)."""
+        # Instância (reaproveitada) do modelo com a instrução específica
+        instructed_model = self.model_pool.get(
+            self.model_name, instruction, effective_config, self.safety_settings
+        )
+
+        instrumentation.count('chamadas_gemini')
+        with instrumentation.span('gemini'):
             response = instructed_model.generate_content(
                 contents=prompt,
                 tools=tools,
                 stream=stream,
             )
-            if stream:
-                return (chunk.text for chunk in response)
+        if stream:
+            return (chunk.text for chunk in response)
+        else:
+            if hasattr(response, "text"):
+                return response.text
+            elif response.candidates and response.candidates[0].content.parts:
+                first_part = response.candidates[0].content.parts[0]
+                return first_part.text if hasattr(first_part, "text") else first_part
             else:
-                if hasattr(response, "text"):
-                    return response.text
-                elif response.candidates and response.candidates[0].content.parts:
-                    first_part = response.candidates[0].content.parts[0]
-                    return first_part.text if hasattr(first_part, "text") else first_part
-                else:
-                    return ""
-        except Exception as e:
-            print(f"Erro ao gerar resposta instruída: {e}")
-            return f"Erro: {e}"
+                return ""
 
     def start_chat(self, history: Optional[List[Dict]] = None):
         """
@@ -244,6 +329,8 @@ class GeminiClient:
                 else:
                     return ""
         except Exception as e:
+            if self.raise_errors:
+                raise classify_error(e) from e
             print(f"Erro ao enviar mensagem no chat: {e}")
             return f"Erro: {e}"
 
@@ -0,0 +1,100 @@
+"""
+Leitura e escrita das imagens aceitas pelo extrator.
+
+Uma fonte pode ser:
+- o caminho de um arquivo;
+- a imagem já decodificada (np.ndarray 2D em tons de cinza, ou 3D em BGR);
+- o conteúdo codificado da imagem (bytes, bytearray, memoryview, mmap.mmap ou
+  um np.ndarray 1D de uint8, como um np.memmap do arquivo): é decodificado com
+  `cv2.imdecode` sobre o próprio buffer, sem cópia intermediária;
+- um par (nome, qualquer um dos anteriores).
+
+O nome, quando existe, é usado para nomear as saídas gravadas em disco.
+"""
+
+import mmap
+import os
+from typing import Optional, Tuple, Union
+
+import cv2
+import numpy as np
+
+from . import instrumentation
+
+Buffer = Union[bytes, bytearray, memoryview, mmap.mmap]
+Source = Union[str, os.PathLike, np.ndarray, Buffer, Tuple[str, Union[np.ndarray, Buffer]]]
+
+
+def is_source(value) -> bool:
+    """Se o valor é uma única fonte de imagem (e não uma sequência de fontes)."""
+    if isinstance(value, tuple):
+        return len(value) == 2 and isinstance(value[0], str) and not isinstance(value[1], str)
+    return isinstance(value, (str, os.PathLike, np.ndarray, bytes, bytearray, memoryview, mmap.mmap))
+
+
+def map_file(path: str) -> Tuple[str, mmap.mmap]:
+    """
+    Mapeia um arquivo em memória, como fonte: o SO pagina o conteúdo sob demanda
+    e nada é copiado para o heap do Python antes do `imdecode`.
+    """
+    with open(path, 'rb') as f:
+        return os.fspath(path), mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def _to_gray(img: np.ndarray) -> np.ndarray:
+    if img.ndim == 2:
+        return img if img.dtype == np.uint8 else cv2.convertScaleAbs(img)
+    if img.ndim == 3 and img.shape[2] == 4:
+        return cv2.cvtColor(img, cv2.COLOR_BGRA2GRAY)
+    if img.ndim == 3 and img.shape[2] == 3:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    if img.ndim == 3 and img.shape[2] == 1:
+        return img[:, :, 0]
+    raise ValueError(f"Formato de imagem não suportado: shape {img.shape}")
+
+
+def decode_source(source: Source) -> Tuple[Optional[str], np.ndarray]:
+    """
+    Decodifica uma fonte em uma imagem em tons de cinza.
+
+    Returns:
+        tuple: (nome da fonte ou None, imagem em tons de cinza)
+
+    Raises:
+        ValueError: Se a imagem não puder ser lida
+    """
+    name = None
+    if isinstance(source, tuple):
+        name, source = source
+
+    with instrumentation.span('decodificacao'):
+        if isinstance(source, (str, os.PathLike)):
+            name = os.fspath(source)
+            img = cv2.imread(name, cv2.IMREAD_GRAYSCALE)
+        elif isinstance(source, np.ndarray) and not (source.ndim == 1 and source.dtype == np.uint8):
+            img = _to_gray(source)
+        elif isinstance(source, (np.ndarray, bytes, bytearray, memoryview, mmap.mmap)):
+            # np.frombuffer só cria uma visão sobre o buffer (também para mmap e memoryview)
+            buffer = source if isinstance(source, np.ndarray) else np.frombuffer(source, dtype=np.uint8)
+            img = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+        else:
+            raise TypeError(f"Fonte de imagem não suportada: {type(source).__name__}")
+
+    if img is None:
+        raise ValueError(f"Não foi possível ler a imagem: {name or '<memória>'}")
+    return name, img
+
+
+def encode_image(image: np.ndarray, ext: str = ".png", params: Optional[list] = None) -> bytes:
+    """
+    Codifica a imagem (ex: a censurada) em memória, sem passar pelo disco.
+
+    Args:
+        ext (str): Formato de saída ('.png', '.jpg', '.webp', ...)
+        params (list): Parâmetros do cv2.imencode (ex: [cv2.IMWRITE_JPEG_QUALITY, 90])
+    """
+    with instrumentation.span('gravacao'):
+        ok, encoded = cv2.imencode(ext, image, params or [])
+    if not ok:
+        raise ValueError(f"Não foi possível codificar a imagem como {ext}")
+    return encoded.tobytes()
@@ -0,0 +1,132 @@
+"""
+Estimador barato de qualidade de imagem (NumPy/OpenCV).
+
+Substitui a sonda por OCR (uma leitura completa só para decidir se a imagem é
+"boa") por métricas que saem em milissegundos: contraste, ruído, nitidez e
+espalhamento do histograma. Os limiares podem ser ajustados com
+`quality_calibration.py` contra a heurística antiga de confiança.
+
+O ruído não é a variância do Laplaciano, que num documento é dominada pelas
+bordas do texto (uma página limpa e nítida pareceria "ruidosa"): é o desvio
+padrão do ruído estimado pela mediana do desvio absoluto do Laplaciano, em que
+as bordas, uma fração pequena dos pixels, não pesam.
+"""
+
+import json
+from dataclasses import asdict, dataclass
+
+import cv2
+import numpy as np
+
+# Lado máximo da cópia reduzida usada nas métricas de frequência
+ANALYSIS_MAX_SIDE = 512
+
+# Janelas por lado usadas na estimativa do ruído (em resolução original)
+NOISE_GRID = 4
+
+
+@dataclass
+class QualityMetrics:
+    contrast: float   # desvio padrão dos pixels (mesma escala do antigo np.std)
+    noise: float      # desvio padrão estimado do ruído, em níveis de cinza (alto = ruidosa)
+    sharpness: float  # energia média do gradiente (baixa = borrada)
+    spread: float     # faixa entre os percentis 2 e 98 do histograma
+    brightness: float # média dos pixels
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass
+class QualityThresholds:
+    min_contrast: float = 20.0
+    max_contrast: float = 70.0
+    max_noise: float = 10.0
+    min_sharpness: float = 8.0
+    min_spread: float = 80.0
+
+    @classmethod
+    def load(cls, path: str) -> "QualityThresholds":
+        """Carrega limiares de um JSON gerado pela calibração."""
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        # A calibração salva também métricas de ajuste; usa só os campos conhecidos
+        data = data.get("thresholds", data)
+        return cls(**{k: float(v) for k, v in data.items() if k in cls.__dataclass_fields__})
+
+    def save(self, path: str, **extra) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"thresholds": asdict(self), **extra}, f, indent=2, ensure_ascii=False)
+
+
+def _downscale(img: np.ndarray, max_side: int) -> np.ndarray:
+    h, w = img.shape[:2]
+    scale = max_side / max(h, w)
+    if scale >= 1:
+        return img
+    return cv2.resize(img, (max(1, int(w * scale)), max(1, int(h * scale))), interpolation=cv2.INTER_AREA)
+
+
+def _noise_sigma(img: np.ndarray, window: int = ANALYSIS_MAX_SIDE // NOISE_GRID) -> float:
+    # Na resolução original (a redução faz a média dos pixels e apaga o ruído), mas só
+    # em NOISE_GRID x NOISE_GRID janelas espalhadas pela página, para o custo não crescer com ela
+    h, w = img.shape[:2]
+    ys = np.linspace(0, max(0, h - window), NOISE_GRID).astype(int)
+    xs = np.linspace(0, max(0, w - window), NOISE_GRID).astype(int)
+    sample = np.concatenate([
+        cv2.Laplacian(img[y:y + window, x:x + window], cv2.CV_32F).ravel() for y in ys for x in xs
+    ])
+    mad = np.median(np.abs(sample - np.median(sample)))
+    # Ruído gaussiano de desvio σ vira, no Laplaciano 3x3, desvio σ·√20 (1.4826: MAD -> desvio)
+    return float(1.4826 * mad / np.sqrt(20))
+
+
+def estimate_quality(img: np.ndarray, max_side: int = ANALYSIS_MAX_SIDE) -> QualityMetrics:
+    """
+    Calcula as métricas de qualidade de uma imagem em tons de cinza.
+
+    O contraste é medido na resolução original com `cv2.meanStdDev` (uma passada
+    vetorizada, mantém a escala dos limiares 20/70 do pré-processamento), assim
+    como o ruído (em janelas que somam até `max_side`² pixels); as demais métricas
+    usam uma cópia reduzida para `max_side` pixels.
+
+    Args:
+        img (np.ndarray): Imagem em tons de cinza (uint8)
+        max_side (int): Lado máximo da cópia reduzida
+
+    Returns:
+        QualityMetrics: Métricas da imagem
+    """
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+
+    mean, std = cv2.meanStdDev(img)
+    small = _downscale(img, max_side)
+
+    gx = cv2.Sobel(small, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(small, cv2.CV_32F, 0, 1, ksize=3)
+    sharpness = float(cv2.mean(cv2.magnitude(gx, gy))[0])
+
+    hist = np.bincount(small.ravel(), minlength=256)
+    cdf = np.cumsum(hist) / small.size
+    p2, p98 = np.searchsorted(cdf, (0.02, 0.98))
+
+    return QualityMetrics(
+        contrast=float(std[0][0]),
+        noise=_noise_sigma(img, max(8, max_side // NOISE_GRID)),
+        sharpness=sharpness,
+        spread=float(p98 - p2),
+        brightness=float(mean[0][0]),
+    )
+
+
+def needs_preprocessing(metrics: QualityMetrics, thresholds: QualityThresholds = None) -> bool:
+    """Indica se a imagem deve passar pelo pré-processamento."""
+    t = thresholds or QualityThresholds()
+    return (
+        metrics.contrast < t.min_contrast
+        or metrics.contrast > t.max_contrast
+        or metrics.noise > t.max_noise
+        or metrics.sharpness < t.min_sharpness
+        or metrics.spread < t.min_spread
+    )
@@ -0,0 +1,245 @@
+"""
+Medição do pipeline: tempo por etapa, contadores e perfil de uma execução.
+
+As etapas instrumentadas abrem um `span(nome)` e os eventos chamam
+`count(nome)`. Enquanto nada estiver ativo (o padrão), as duas chamadas só
+leem uma variável global e não fazem mais nada; `enable()` liga a coleta para
+o processo todo (todas as threads), e os totais saem como JSON (`to_dict`) ou
+no formato texto do Prometheus (`to_prometheus`).
+
+Etapas medidas: carga_modelo, decodificacao, qualidade, preprocessamento, ocr,
+deteccao_sensivel, censura, gravacao e gemini. Contadores: documentos,
+deteccoes, censuras, cache_ocr_acertos, cache_ocr_faltas, escalonamentos e
+chamadas_gemini.
+
+Exemplo:
+    metricas = instrumentation.enable()
+    with metricas.profile("execucao.prof", memory_top=10):
+        extractor.process("doc.jpg")
+    print(metricas.to_dict())
+"""
+
+import cProfile
+import contextlib
+import io
+import json
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Dict, Optional
+
+# Instância ativa do processo (None = coleta desligada)
+_active: Optional["Metrics"] = None
+
+# Contexto vazio reaproveitado por todos os spans quando a coleta está desligada
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.metrics.record(self.name, time.perf_counter() - self.start)
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._spans: Dict[str, list] = {}  # nome -> [quantidade, total, máximo] (segundos)
+        self._counters: Dict[str, int] = {}
+        self._created = time.perf_counter()
+        self._profiler: Optional[cProfile.Profile] = None
+        self._memory_top = 0
+        self.memory: Optional[Dict] = None
+
+    def span(self, name: str) -> _Span:
+        """Mede o tempo do bloco `with` como uma ocorrência da etapa `name`."""
+        return _Span(self, name)
+
+    def record(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            entry = self._spans.get(name)
+            if entry is None:
+                self._spans[name] = [calls, seconds, seconds]
+            else:
+                entry[0] += calls
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """Totais brutos (serializáveis), no formato aceito por `merge`."""
+        with self._lock:
+            return {'spans': {k: list(v) for k, v in self._spans.items()}, 'counters': dict(self._counters)}
+
+    def drain(self) -> Dict:
+        """Devolve o `snapshot` e zera os totais (usado pelos workers do modo em lote)."""
+        with self._lock:
+            snapshot = {'spans': self._spans, 'counters': self._counters}
+            self._spans, self._counters = {}, {}
+        return snapshot
+
+    def merge(self, snapshot: Dict) -> None:
+        """Soma os totais de outro processo (ver `drain`)."""
+        with self._lock:
+            for name, (calls, total, longest) in snapshot.get('spans', {}).items():
+                entry = self._spans.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += calls
+                entry[1] += total
+                entry[2] = max(entry[2], longest)
+            for name, amount in snapshot.get('counters', {}).items():
+                self._counters[name] = self._counters.get(name, 0) + amount
+
+    def to_dict(self) -> Dict:
+        """Resumo em JSON: tempo total, médio e máximo por etapa, e os contadores."""
+        snapshot = self.snapshot()
+        summary = {
+            'wall_s': round(time.perf_counter() - self._created, 3),
+            'stages': {
+                name: {
+                    'calls': calls,
+                    'total_s': round(total, 4),
+                    'mean_ms': round(1000 * total / calls, 2) if calls else 0.0,
+                    'max_ms': round(1000 * longest, 2),
+                }
+                for name, (calls, total, longest) in sorted(snapshot['spans'].items())
+            },
+            'counters': dict(sorted(snapshot['counters'].items())),
+        }
+        if self.memory is not None:
+            summary['memory'] = self.memory
+        return summary
+
+    def to_prometheus(self, prefix: str = "ia_m_uv") -> str:
+        """Os mesmos totais no formato texto de exposição do Prometheus."""
+        snapshot = self.snapshot()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Tempo gasto em cada etapa do pipeline.",
+            f"# TYPE {prefix}_stage_seconds summary",
+        ]
+        for name, (calls, total, _) in sorted(snapshot['spans'].items()):
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {total:.6f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {calls}')
+        lines += [
+            f"# HELP {prefix}_stage_seconds_max Maior duração de uma ocorrência da etapa.",
+            f"# TYPE {prefix}_stage_seconds_max gauge",
+        ]
+        for name, (_, _, longest) in sorted(snapshot['spans'].items()):
+            lines.append(f'{prefix}_stage_seconds_max{{stage="{name}"}} {longest:.6f}')
+        lines += [
+            f"# HELP {prefix}_events_total Eventos contados durante a execução.",
+            f"# TYPE {prefix}_events_total counter",
+        ]
+        for name, amount in sorted(snapshot['counters'].items()):
+            lines.append(f'{prefix}_events_total{{event="{name}"}} {amount}')
+        if self.memory is not None:
+            lines += [f"# TYPE {prefix}_python_heap_peak_bytes gauge",
+                      f"{prefix}_python_heap_peak_bytes {self.memory['peak_bytes']}"]
+        return '\n'.join(lines) + '\n'
+
+    def write_json(self, path: str) -> None:
+        _write(path, json.dumps(self.to_dict(), ensure_ascii=False, indent=2) + '\n')
+
+    def write_prometheus(self, path: str) -> None:
+        _write(path, self.to_prometheus())
+
+    def start_profile(self, cpu: bool = True, memory_top: int = 0) -> None:
+        """
+        Liga o perfil da execução: cProfile (só da thread atual) e/ou tracemalloc.
+
+        Args:
+            cpu (bool): Liga o cProfile
+            memory_top (int): Se > 0, liga o tracemalloc e guarda as N linhas que mais alocaram
+        """
+        if cpu:
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        if memory_top > 0:
+            self._memory_top = memory_top
+            tracemalloc.start()
+
+    def stop_profile(self, path: Optional[str] = None, top: int = 20) -> Optional[str]:
+        """
+        Desliga o perfil. O cProfile é gravado em `path` (abrir com pstats/snakeviz)
+        e o resumo das funções mais caras é devolvido como texto.
+        """
+        report = None
+        if self._profiler is not None:
+            self._profiler.disable()
+            if path:
+                self._profiler.dump_stats(path)
+            stream = io.StringIO()
+            pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(top)
+            report = stream.getvalue()
+            self._profiler = None
+        if self._memory_top and tracemalloc.is_tracing():
+            _, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics('lineno')[:self._memory_top]
+            tracemalloc.stop()
+            self.memory = {
+                'peak_bytes': peak,
+                'top': [{'where': str(stat.traceback), 'bytes': stat.size, 'blocks': stat.count} for stat in stats],
+            }
+        return report
+
+    @contextlib.contextmanager
+    def profile(self, path: Optional[str] = None, memory_top: int = 0):
+        """`start_profile`/`stop_profile` em volta de um bloco `with`."""
+        self.start_profile(cpu=path is not None, memory_top=memory_top)
+        try:
+            yield self
+        finally:
+            self.stop_profile(path)
+
+
+def _write(path: str, content: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(content)
+
+
+def enable() -> Metrics:
+    """Liga a coleta no processo (ou devolve a instância já ativa)."""
+    global _active
+    if _active is None:
+        _active = Metrics()
+    return _active
+
+
+def disable() -> Optional[Metrics]:
+    """Desliga a coleta e devolve a instância que estava ativa."""
+    global _active
+    metrics, _active = _active, None
+    return metrics
+
+
+def active() -> Optional[Metrics]:
+    return _active
+
+
+def span(name: str):
+    """Mede a etapa `name` se a coleta estiver ligada; senão, não faz nada."""
+    metrics = _active
+    return _NULL_SPAN if metrics is None else metrics.span(name)
+
+
+def count(name: str, amount: int = 1) -> None:
+    """Soma `amount` ao contador `name` se a coleta estiver ligada."""
+    metrics = _active
+    if metrics is not None:
+        metrics.count(name, amount)
@@ -0,0 +1,279 @@
+"""
+Manifesto (SQLite) dos documentos já processados pelo modo em lote.
+
+Para cada documento o manifesto guarda o hash do conteúdo, tamanho e mtime do
+arquivo, a versão das regras de censura (`PatternRegistry.signature()`), a
+versão da configuração que muda a saída (modelo do OCR, confiança, estilo da
+censura...) e onde a saída foi gravada. Numa nova execução sobre a mesma pasta,
+`plan` devolve só o que precisa rodar de novo:
+
+- documento novo, ou que falhou / não terminou na execução anterior (retomada);
+- conteúdo alterado (o hash só é recalculado quando tamanho ou mtime mudam,
+  então os documentos intactos custam um `stat`);
+- configuração diferente da usada na última vez;
+- regras diferentes que mudam o que é censurado no documento;
+- saída registrada que não existe mais.
+
+Para a mudança de regras, o manifesto guarda também as detecções do OCR de
+cada documento (comprimidas, como no cache de OCR) e a assinatura do que foi
+censurado (`match_signature`). Quando as regras mudam, `plan` roda só a
+detecção de padrões sobre essas detecções: o documento volta para a fila só
+se o conjunto censurado mudou; senão, só a versão das regras é atualizada. Os
+documentos sem detecções guardadas (ex: PDF/TIFF, processados página a
+página) voltam todos.
+
+Cada documento é marcado como pendente antes de rodar e gravado assim que
+termina (`record`), então uma execução interrompida retoma do ponto em que
+parou. Com o cache de OCR (`--ocr-cache`), reprocessar por mudança de regras
+não roda a rede de novo: só a detecção de padrões e a censura.
+
+Exemplo:
+    with JobManifest("manifesto.sqlite", rules_version, settings_version) as manifesto:
+        caminhos = manifesto.plan(list_documents(pasta))
+        for resultado in process_batch(caminhos, keep_detections=True):
+            manifesto.record(resultado)
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from .ocr_cache import pack_detections, unpack_detections
+
+STATUS_PENDING = 'pendente'
+STATUS_DONE = 'ok'
+STATUS_FAILED = 'erro'
+
+
+def content_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 do conteúdo do arquivo, lido em blocos."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def rules_version(matcher=None) -> str:
+    """Versão do conjunto de regras de censura (assinatura dos padrões registrados)."""
+    from .sensitive_matcher import default_matcher
+
+    return (matcher or default_matcher()).registry.signature()
+
+
+def settings_version(extractor, confidence_threshold: Optional[float] = None) -> str:
+    """
+    Versão de tudo o que, fora as regras, muda a saída de um documento: modelo
+    e modo do OCR, limiares de qualidade, confiança mínima e estilo da censura.
+    """
+    content = repr((
+        extractor.model_version,
+        extractor.quality_thresholds,
+        confidence_threshold,
+        getattr(extractor, 'redaction_style', None),
+    ))
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+
+class JobManifest:
+    def __init__(self, path: str = "manifesto.sqlite", rules: str = "", settings: str = "", matcher=None):
+        """
+        Args:
+            path (str): Arquivo SQLite do manifesto
+            rules (str): Versão das regras desta execução (ver rules_version)
+            settings (str): Versão da configuração desta execução (ver settings_version)
+            matcher (SensitiveMatcher): Regras desta execução, para reavaliar os documentos
+                                        quando a versão muda (padrão: o compartilhado)
+        """
+        self.path = path
+        self.rules = rules
+        self.settings = settings
+        self.matcher = matcher
+        self.reasons: Dict[str, int] = {}  # motivo -> documentos a processar (do último `plan`)
+        self.skipped = 0
+        self.rules_unaffected = 0  # documentos pulados porque as regras novas não mudam sua censura
+        self.missing = 0  # documentos listados que sumiram (ou ficaram ilegíveis) antes do `plan`
+        self.done = 0
+        self.failed = 0
+        self._hashes: Dict[str, tuple] = {}  # caminho -> (hash, tamanho, mtime) calculados no `plan`
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS documents ("
+                " path TEXT PRIMARY KEY,"
+                " content_hash TEXT,"
+                " size INTEGER,"
+                " mtime_ns INTEGER,"
+                " rules_version TEXT,"
+                " settings_version TEXT,"
+                " status TEXT NOT NULL,"
+                " output_path TEXT,"
+                " error TEXT,"
+                " attempts INTEGER NOT NULL DEFAULT 0,"
+                " updated REAL NOT NULL)"
+            )
+            # Manifestos anteriores a estas colunas: os documentos sem elas voltam na mudança de regras
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(documents)")}
+            for column, kind in (('detections', 'BLOB'), ('matches', 'TEXT')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE documents ADD COLUMN {column} {kind}")
+
+    def _reason(self, path: str, row: Optional[tuple]) -> Optional[str]:
+        # Motivo para (re)processar o documento, ou None se pode ser pulado
+        stat = os.stat(path)
+        if row is None:
+            self._hashes[path] = (None, stat.st_size, stat.st_mtime_ns)
+            return 'novo'
+        digest, size, mtime_ns, rules, settings, status, output_path, detections, matches = row
+        unchanged = (size, mtime_ns) == (stat.st_size, stat.st_mtime_ns)
+        if status != STATUS_DONE:
+            self._hashes[path] = (digest if unchanged else None, stat.st_size, stat.st_mtime_ns)
+            return 'retomado' if status == STATUS_PENDING else 'falhou'
+        if not unchanged:
+            current = content_hash(path)
+            self._hashes[path] = (current, stat.st_size, stat.st_mtime_ns)
+            if current != digest:
+                return 'alterado'
+            # Só o mtime mudou (cópia, touch): o conteúdo é o mesmo
+            with self._conn:
+                self._conn.execute("UPDATE documents SET size = ?, mtime_ns = ? WHERE path = ?",
+                                   (stat.st_size, stat.st_mtime_ns, path))
+        else:
+            self._hashes[path] = (digest, size, mtime_ns)
+        if settings != self.settings:
+            return 'configuracao'
+        if rules != self.rules and not self._same_matches(detections, matches):
+            return 'regras'
+        if output_path and not os.path.exists(output_path):
+            return 'saida_ausente'
+        if rules != self.rules:
+            # As regras novas censuram exatamente o mesmo: a saída gravada continua valendo
+            self.rules_unaffected += 1
+            with self._conn:
+                self._conn.execute("UPDATE documents SET rules_version = ? WHERE path = ?", (self.rules, path))
+        return None
+
+    def _same_matches(self, detections: Optional[bytes], matches: Optional[str]) -> bool:
+        # Roda as regras desta execução sobre as detecções guardadas (sem OCR nem censura)
+        if detections is None or matches is None:
+            return False
+        from .sensitive_matcher import default_matcher, match_signature
+
+        found = (self.matcher or default_matcher()).match_detections(unpack_detections(detections))
+        return match_signature(found) == matches
+
+    def plan(self, paths: Iterable[str], force: bool = False) -> List[str]:
+        """
+        Separa os documentos que precisam rodar e os marca como pendentes.
+
+        Args:
+            paths (list): Caminhos dos documentos da execução
+            force (bool): Reprocessa todos, ignorando o que já foi feito
+
+        Returns:
+            list: Caminhos a processar, na ordem recebida
+        """
+        todo = []
+        self.reasons, self.skipped, self.rules_unaffected, self.missing = {}, 0, 0, 0
+        with self._lock:
+            for path in paths:
+                # Caminhos absolutos: a mesma pasta pode ser processada de outro diretório
+                key = os.path.abspath(path)
+                row = self._conn.execute(
+                    "SELECT content_hash, size, mtime_ns, rules_version, settings_version, status, output_path,"
+                    " detections, matches FROM documents WHERE path = ?", (key,)
+                ).fetchone()
+                try:
+                    reason = self._reason(key, row)
+                except OSError as e:
+                    # Apagado (ou sem permissão) entre a listagem da pasta e aqui: fica de fora
+                    # desta execução, sem derrubar as demais
+                    print(f"[x] Ignorando {path}: {e.strerror or e}")
+                    self._hashes.pop(key, None)
+                    self.missing += 1
+                    continue
+                if force:
+                    reason = reason or 'forcado'
+                if reason is None:
+                    self.skipped += 1
+                    continue
+                self.reasons[reason] = self.reasons.get(reason, 0) + 1
+                todo.append(path)
+            # Checkpoint: o que não chegar a `record` fica pendente e é retomado na próxima execução
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO documents (path, status, updated) VALUES (?, ?, ?)"
+                    " ON CONFLICT(path) DO UPDATE SET status = excluded.status, updated = excluded.updated",
+                    [(os.path.abspath(path), STATUS_PENDING, time.time()) for path in todo],
+                )
+        return todo
+
+    def record(self, result: Dict) -> None:
+        """
+        Grava o resultado de um documento (dict do modo em lote, com 'image_path' e
+        'output_path' ou 'error'). As detecções ('ocr_detections', ver process_batch)
+        são retiradas do dict: ficam só no manifesto, não vão para o JSONL.
+        """
+        detections = result.pop('ocr_detections', None)
+        if not result.get('image_path'):
+            return
+        path = os.path.abspath(result['image_path'])
+        output_path = result.get('output_path')
+        matches = result.get('sensitive_signature') if detections is not None else None
+        digest, size, mtime_ns = self._hashes.pop(path, (None, None, None))
+        failed = 'error' in result
+        if not failed and digest is None:
+            digest = content_hash(path)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO documents (path, content_hash, size, mtime_ns, rules_version, settings_version,"
+                " status, output_path, error, detections, matches, attempts, updated)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 1, ?)"
+                " ON CONFLICT(path) DO UPDATE SET content_hash = excluded.content_hash, size = excluded.size,"
+                " mtime_ns = excluded.mtime_ns, rules_version = excluded.rules_version,"
+                " settings_version = excluded.settings_version, status = excluded.status,"
+                " output_path = excluded.output_path, error = excluded.error,"
+                " detections = excluded.detections, matches = excluded.matches,"
+                " attempts = documents.attempts + 1, updated = excluded.updated",
+                (path, digest, size, mtime_ns, self.rules, self.settings,
+                 STATUS_FAILED if failed else STATUS_DONE, output_path and os.path.abspath(output_path),
+                 result.get('error'), None if failed or detections is None else pack_detections(detections),
+                 None if failed else matches, time.time()),
+            )
+        if failed:
+            self.failed += 1
+        else:
+            self.done += 1
+
+    def stats(self) -> dict:
+        """Resumo da execução atual e do conteúdo do manifesto."""
+        with self._lock:
+            by_status = dict(self._conn.execute("SELECT status, COUNT(*) FROM documents GROUP BY status").fetchall())
+        return {
+            'pulados': self.skipped,
+            'regras_sem_efeito': self.rules_unaffected,
+            'ausentes': self.missing,
+            'a_processar': dict(self.reasons),
+            'processados': self.done,
+            'falhas': self.failed,
+            'manifesto': by_status,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "JobManifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,77 @@
+"""
+Gravação incremental de resultados em JSON Lines (um documento por linha).
+
+Cada resultado é escrito assim que chega, então o arquivo cresce junto com o
+processamento e nada precisa ficar acumulado em memória. Se a execução for
+interrompida, as linhas já gravadas continuam válidas.
+"""
+
+import json
+import os
+from typing import Iterable
+
+import numpy as np
+
+
+def json_default(value):
+    # Tipos do NumPy que podem aparecer nos resumos (confianças, contagens)
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Tipo não serializável em JSON: {type(value).__name__}")
+
+
+class JSONLSink:
+    def __init__(self, path: str, append: bool = False, flush_every: int = 1, fsync: bool = False):
+        """
+        Args:
+            path (str): Arquivo de saída
+            append (bool): Acrescenta ao arquivo existente em vez de sobrescrever
+            flush_every (int): Descarrega o buffer a cada N linhas
+            fsync (bool): Força a gravação no disco a cada descarga (mais lento, mais seguro)
+        """
+        self.path = path
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.count = 0
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, 'a' if append else 'w', encoding='utf-8')
+
+    def write(self, record: dict) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False, default=json_default))
+        self._file.write('\n')
+        self.count += 1
+        if self.count % self.flush_every == 0:
+            self.flush()
+
+    def write_all(self, records: Iterable[dict]) -> int:
+        """
+        Grava os resultados de um iterador (ex: EasyOCRExtractor.iter_extract) conforme chegam.
+
+        Returns:
+            int: Quantas linhas foram gravadas
+        """
+        written = 0
+        for record in records:
+            self.write(record)
+            written += 1
+        return written
+
+    def flush(self) -> None:
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+
+    def __enter__(self) -> "JSONLSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
@@ -0,0 +1,196 @@
+"""
+Documentos de várias páginas (PDF e TIFF).
+
+As páginas são lidas uma por vez, sob demanda: o TIFF é percorrido quadro a
+quadro pelo Pillow e o PDF é rasterizado página a página pelo PyMuPDF, no DPI
+pedido. A saída censurada também é gravada página a página (PDF ou TIFF com
+várias páginas), então um arquivo de 200 páginas nunca fica inteiro na memória.
+
+O PyMuPDF é opcional, só necessário para PDFs:
+    uv add pymupdf        (ou: pip install "ia-m-uv[pdf]")
+"""
+
+import os
+import zlib
+from typing import BinaryIO, Iterator, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+from PIL.TiffImagePlugin import AppendingTiffWriter
+
+from . import instrumentation
+
+MULTIPAGE_EXTENSIONS = ('.pdf', '.tif', '.tiff')
+
+DEFAULT_DPI = 200
+
+
+def is_multipage(path) -> bool:
+    """Se o arquivo é de um formato tratado página a página (PDF ou TIFF)."""
+    return isinstance(path, (str, os.PathLike)) and os.fspath(path).lower().endswith(MULTIPAGE_EXTENSIONS)
+
+
+def _import_fitz():
+    try:
+        import fitz  # PyMuPDF
+    except ImportError as e:
+        raise ImportError(
+            "Para ler PDFs é preciso o PyMuPDF: uv add pymupdf (ou pip install \"ia-m-uv[pdf]\")"
+        ) from e
+    return fitz
+
+
+def page_count(path: str) -> int:
+    """Número de páginas, sem decodificar nenhuma."""
+    if path.lower().endswith('.pdf'):
+        with _import_fitz().open(path) as doc:
+            return doc.page_count
+    with Image.open(path) as img:
+        return getattr(img, 'n_frames', 1)
+
+
+def iter_pages(path: str, dpi: int = DEFAULT_DPI) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    Percorre as páginas do arquivo, uma por vez, em tons de cinza.
+
+    Args:
+        path (str): Arquivo PDF ou TIFF
+        dpi (int): Resolução da rasterização do PDF (o TIFF mantém a própria resolução)
+
+    Yields:
+        tuple: (índice da página a partir de 0, imagem em tons de cinza)
+    """
+    if path.lower().endswith('.pdf'):
+        fitz = _import_fitz()
+        with fitz.open(path) as doc:
+            for index, page in enumerate(doc):
+                pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, alpha=False)
+                # O buffer do pixmap tem linhas de `stride` bytes; copia só a área útil
+                rows = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+                image = np.ascontiguousarray(rows[:, :pix.width])
+                del pix
+                yield index, image
+        return
+
+    with Image.open(path) as img:
+        for index in range(getattr(img, 'n_frames', 1)):
+            img.seek(index)
+            yield index, np.asarray(img.convert('L'))
+
+
+def page_name(path: str, index: int) -> str:
+    """Nome de uma página (usado nas saídas de depuração e nos resumos): <arquivo>_p001.png."""
+    stem, _ = os.path.splitext(path)
+    return f"{stem}_p{index + 1:03d}.png"
+
+
+def redacted_output_path(path: str, output_dir: str = "censored_images") -> str:
+    """Caminho da versão censurada do arquivo: <output_dir>/censored_<nome original>."""
+    return os.path.join(output_dir, f"censored_{os.path.basename(path)}")
+
+
+class _PdfPageWriter:
+    """
+    PDF gravado em sequência: cada página vira uma imagem comprimida (Flate) que é
+    escrita no arquivo assim que chega, e o índice (xref) vai no fim, no `close`.
+
+    O custo de cada página não depende de quantas já foram gravadas (o Pillow com
+    `append=True` relê e reescreve o PDF inteiro a cada página).
+    """
+
+    _CATALOG, _PAGES = 1, 2  # objetos reservados; a árvore de páginas sai no fim
+
+    def __init__(self, path: str, dpi: int):
+        self.dpi = dpi
+        self._file: BinaryIO = open(path, 'wb')
+        self._offsets = {}
+        self._kids: List[int] = []
+        self._next = self._PAGES + 1
+        self._file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        self._object(self._CATALOG, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    def _object(self, number: int, body: bytes, stream: bytes = None) -> None:
+        self._offsets[number] = self._file.tell()
+        self._file.write(b"%d 0 obj\n" % number + body)
+        if stream is not None:
+            self._file.write(b"\nstream\n" + stream + b"\nendstream")
+        self._file.write(b"\nendobj\n")
+
+    def add_page(self, image: np.ndarray) -> None:
+        image = np.ascontiguousarray(image, dtype=np.uint8)
+        height, width = image.shape[:2]
+        colorspace = b"/DeviceRGB" if image.ndim == 3 else b"/DeviceGray"
+        # Tamanho da página em pontos (1/72 pol.), para a página manter a resolução original
+        w_pt, h_pt = width * 72 / self.dpi, height * 72 / self.dpi
+        xobject, content, page = self._next, self._next + 1, self._next + 2
+        self._next += 3
+
+        data = zlib.compress(image.tobytes(), 6)
+        self._object(xobject, b"<< /Type /XObject /Subtype /Image /Width %d /Height %d /ColorSpace %s "
+                              b"/BitsPerComponent 8 /Filter /FlateDecode /Length %d >>"
+                     % (width, height, colorspace, len(data)), data)
+        draw = b"q %.4f 0 0 %.4f 0 0 cm /Im0 Do Q" % (w_pt, h_pt)
+        self._object(content, b"<< /Length %d >>" % len(draw), draw)
+        self._object(page, b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %.4f %.4f] "
+                           b"/Resources << /XObject << /Im0 %d 0 R >> >> /Contents %d 0 R >>"
+                     % (w_pt, h_pt, xobject, content))
+        self._kids.append(page)
+
+    def close(self) -> None:
+        kids = b" ".join(b"%d 0 R" % kid for kid in self._kids)
+        self._object(self._PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._kids)))
+        xref = self._file.tell()
+        self._file.write(b"xref\n0 %d\n0000000000 65535 f \n" % self._next)
+        for number in range(1, self._next):
+            self._file.write(b"%010d 00000 n \n" % self._offsets[number])
+        self._file.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (self._next, xref))
+        self._file.close()
+
+
+class MultipageWriter:
+    """Grava um PDF ou TIFF de várias páginas, acrescentando uma página por vez."""
+
+    def __init__(self, path: str, dpi: int = DEFAULT_DPI):
+        """
+        Args:
+            path (str): Arquivo de saída (.pdf, .tif ou .tiff)
+            dpi (int): Resolução gravada nas páginas
+        """
+        if not path.lower().endswith(MULTIPAGE_EXTENSIONS):
+            raise ValueError(f"Formato de saída não suportado: {path} (use .pdf, .tif ou .tiff)")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.dpi = dpi
+        self.pages = 0
+        self._pdf: Optional[_PdfPageWriter] = None
+        self._tiff: Optional[AppendingTiffWriter] = None
+        if path.lower().endswith('.pdf'):
+            self._pdf = _PdfPageWriter(path, dpi)
+        else:
+            self._tiff = AppendingTiffWriter(path, new=True)
+
+    def write(self, image: np.ndarray) -> None:
+        with instrumentation.span('gravacao'):
+            if self._pdf is not None:
+                self._pdf.add_page(image)
+            else:
+                Image.fromarray(image).save(self._tiff, format='TIFF', compression='tiff_deflate',
+                                            dpi=(self.dpi, self.dpi))
+                self._tiff.newFrame()
+        self.pages += 1
+
+    def close(self) -> None:
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self._tiff is not None:
+            self._tiff.close()
+            self._tiff = None
+
+    def __enter__(self) -> "MultipageWriter":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
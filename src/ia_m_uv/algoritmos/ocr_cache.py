@@ -0,0 +1,168 @@
+"""
+Cache persistente (SQLite) das detecções do OCR.
+
+Quando só as regras de censura mudam, não há por que rodar a rede neural de novo
+sobre as mesmas páginas. A chave é um hash do conteúdo da imagem decodificada,
+dos idiomas, da decisão de pré-processamento e da versão do modelo; o valor são
+as detecções brutas do EasyOCR, comprimidas. O tamanho total é limitado e as
+entradas menos usadas recentemente são descartadas primeiro.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Quantas entradas descartar por vez quando o limite é ultrapassado
+_EVICTION_BATCH = 64
+
+
+def _to_builtin(value):
+    """Converte tipos do NumPy (que o EasyOCR devolve nos bbox) para tipos do Python."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple, np.ndarray)):
+        return [_to_builtin(v) for v in value]
+    return value
+
+
+def pack_detections(detections: List[tuple]) -> bytes:
+    """Detecções do EasyOCR em JSON comprimido (o formato guardado no cache)."""
+    return zlib.compress(json.dumps(_to_builtin(detections), separators=(',', ':')).encode('utf-8'))
+
+
+def unpack_detections(payload: bytes) -> List[tuple]:
+    """Inverso de `pack_detections`."""
+    return [tuple(item) for item in json.loads(zlib.decompress(payload))]
+
+
+class OCRCache:
+    def __init__(self, path: str = "ocr_cache.sqlite", max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        Args:
+            path (str): Arquivo SQLite do cache (pode ser compartilhado entre processos)
+            max_bytes (int): Tamanho máximo dos registros armazenados
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_results ("
+                " key TEXT PRIMARY KEY,"
+                " detections BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON ocr_results(last_access)")
+            # Soma de `size` mantida a cada escrita, na mesma transação, para o limite
+            # ser conferido sem percorrer a tabela (vale para todos os processos)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_meta ("
+                " id INTEGER PRIMARY KEY CHECK (id = 0),"
+                " total INTEGER NOT NULL)"
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (id, total)"
+                " SELECT 0, COALESCE(SUM(size), 0) FROM ocr_results"
+            )
+
+    @staticmethod
+    def make_key(image: np.ndarray, languages: Iterable[str], preprocessed: bool, model_version: str) -> str:
+        """
+        Chave de conteúdo: hash dos pixels decodificados (mais o shape) e da
+        configuração que influencia o resultado do OCR.
+        """
+        digest = hashlib.sha256()
+        digest.update(repr((image.shape, str(image.dtype))).encode())
+        digest.update(memoryview(np.ascontiguousarray(image)).cast('B'))
+        digest.update(repr((tuple(languages), bool(preprocessed), model_version)).encode())
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[tuple]]:
+        """Retorna as detecções salvas para a chave (e marca o uso), ou None."""
+        with self._lock:
+            row = self._conn.execute("SELECT detections FROM ocr_results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            with self._conn:
+                self._conn.execute("UPDATE ocr_results SET last_access = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+        return unpack_detections(row[0])
+
+    def put(self, key: str, detections: List[tuple]) -> None:
+        """Salva as detecções e descarta as entradas mais antigas se passar do limite."""
+        payload = pack_detections(detections)
+        now = time.time()
+        with self._lock, self._conn:
+            # Primeiro a escrita no total: trava o banco antes de ler o tamanho da entrada substituída
+            self._conn.execute(
+                "UPDATE cache_meta SET total = total + ?"
+                " - COALESCE((SELECT size FROM ocr_results WHERE key = ?), 0) WHERE id = 0",
+                (len(payload), key),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_results (key, detections, size, created, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now, now),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._conn.execute("SELECT total FROM cache_meta WHERE id = 0").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        start = total
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM ocr_results ORDER BY last_access LIMIT ?", (_EVICTION_BATCH,)
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM ocr_results WHERE key = ?", (key,))
+                total -= size
+                self.evictions += 1
+        self._conn.execute("UPDATE cache_meta SET total = total - ? WHERE id = 0", (start - total,))
+
+    def stats(self) -> dict:
+        """Contadores de uso do cache nesta instância e ocupação atual."""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM ocr_results").fetchone()[0]
+            size = self._conn.execute("SELECT total FROM cache_meta WHERE id = 0").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'entries': entries,
+            'bytes': size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM ocr_results")
+            self._conn.execute("UPDATE cache_meta SET total = 0 WHERE id = 0")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
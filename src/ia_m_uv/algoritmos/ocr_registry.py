@@ -0,0 +1,116 @@
+"""
+Registro de leitores EasyOCR compartilhado pelo processo.
+
+Carregar um `easyocr.Reader` custa segundos e centenas de MB (pesos do detector
+e do reconhecedor). Este módulo guarda uma instância por configuração
+(idiomas, gpu, opções do modelo) e a entrega para quem pedir, de forma que um
+processo de longa duração carregue cada configuração uma única vez.
+
+O `easyocr` (e com ele o torch, segundos de importação) só é importado na
+primeira carga de um leitor, não na importação deste módulo.
+
+As opções do modo de CPU (ex: `quantize=False` no modo fp32, ver cpu_inference)
+são opções comuns do `easyocr.Reader`: fazem parte da chave, então o leitor
+padrão do EasyOCR (reconhecedor em int8) e o fp32 convivem no registro e têm
+versões de modelo diferentes.
+"""
+
+import threading
+from importlib.metadata import PackageNotFoundError, version
+from typing import TYPE_CHECKING, Dict, Hashable, Iterable, Tuple
+
+from . import instrumentation
+
+if TYPE_CHECKING:
+    import easyocr
+
+ReaderKey = Tuple[Tuple[str, ...], bool, Tuple[Tuple[str, Hashable], ...]]
+
+_readers: Dict[ReaderKey, "easyocr.Reader"] = {}
+_lock = threading.Lock()
+
+
+def reader_key(languages: Iterable[str], gpu: bool = False, **model_options) -> ReaderKey:
+    """
+    Monta a chave do registro para uma configuração de leitor.
+
+    A ordem dos idiomas é preservada (o EasyOCR usa o primeiro como principal),
+    e as opções do modelo são ordenadas para que a mesma configuração sempre
+    gere a mesma chave.
+    """
+    return (tuple(languages), bool(gpu), tuple(sorted(model_options.items())))
+
+
+def get_reader(languages: Iterable[str], gpu: bool = False, **model_options) -> "easyocr.Reader":
+    """
+    Retorna o leitor para a configuração pedida, carregando-o na primeira chamada.
+
+    Args:
+        languages (list): Idiomas do OCR, ex: ['pt', 'en']
+        gpu (bool): Usar GPU se disponível
+        **model_options: Demais argumentos repassados ao `easyocr.Reader`
+                         (ex: recog_network, model_storage_directory, quantize)
+
+    Returns:
+        easyocr.Reader: Instância compartilhada para essa configuração
+    """
+    key = reader_key(languages, gpu, **model_options)
+    reader = _readers.get(key)
+    if reader is not None:
+        return reader
+
+    # O lock evita que duas threads carreguem o mesmo modelo ao mesmo tempo
+    with _lock:
+        reader = _readers.get(key)
+        if reader is None:
+            print(f"Carregando EasyOCR {list(key[0])} (gpu={key[1]})... (primeira vez demora ~30s)")
+            with instrumentation.span('carga_modelo'):
+                import easyocr
+
+                reader = easyocr.Reader(list(key[0]), gpu=key[1], **model_options)
+            _readers[key] = reader
+    return reader
+
+
+def warm_up(languages: Iterable[str], gpu: bool = False, **model_options) -> None:
+    """Carrega antecipadamente um leitor, para tirar o custo do primeiro documento."""
+    get_reader(languages, gpu, **model_options)
+
+
+def is_loaded(languages: Iterable[str], gpu: bool = False, **model_options) -> bool:
+    """Indica se a configuração já está carregada no registro."""
+    return reader_key(languages, gpu, **model_options) in _readers
+
+
+def release(languages: Iterable[str], gpu: bool = False, **model_options) -> bool:
+    """
+    Remove um leitor do registro para que a memória possa ser liberada.
+
+    Returns:
+        bool: True se havia um leitor carregado para essa configuração
+    """
+    with _lock:
+        return _readers.pop(reader_key(languages, gpu, **model_options), None) is not None
+
+
+def release_all() -> None:
+    """Descarta todos os leitores carregados."""
+    with _lock:
+        _readers.clear()
+
+
+def loaded_keys() -> Tuple[ReaderKey, ...]:
+    """Lista as configurações atualmente carregadas."""
+    return tuple(_readers.keys())
+
+
+def model_version(languages: Iterable[str], gpu: bool = False, **model_options) -> str:
+    """
+    Identificador da versão do modelo para uma configuração: versão do pacote
+    easyocr mais a chave do registro. Muda sempre que o resultado do OCR pode mudar.
+    """
+    try:
+        package_version = version('easyocr')
+    except PackageNotFoundError:
+        package_version = 'desconhecida'
+    return f"easyocr-{package_version}|{reader_key(languages, gpu, **model_options)!r}"
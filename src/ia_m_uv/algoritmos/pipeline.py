@@ -0,0 +1,341 @@
+"""
+Executor em estágios para o processamento de documentos.
+
+Em `extract_text` tudo roda em sequência: decodificar, estimar a qualidade,
+pré-processar, OCR, censurar e gravar. A decodificação e a gravação do OpenCV
+liberam o GIL, então podem acontecer enquanto o OCR trabalha na imagem anterior.
+Aqui cada estágio tem suas próprias threads e filas limitadas entre eles: quando
+um estágio mais lento enche a fila seguinte, o anterior espera (contrapressão),
+e o número de imagens em memória nunca passa da soma das filas e das threads.
+
+Cada estágio registra o tempo trabalhando, esperando entrada (faminto) e
+esperando espaço na fila de saída (bloqueado), de onde sai a utilização.
+"""
+
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from .document import DocumentResult
+from .redaction import DEFAULT_STYLE
+
+# Fim da entrada de um estágio
+_DONE = object()
+
+# Intervalo com que threads bloqueadas verificam se o pipeline foi interrompido
+_POLL_SECONDS = 0.1
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, queue_size: int = 4):
+        """
+        Args:
+            name (str): Nome do estágio (aparece nas estatísticas)
+            fn (callable): Transformação aplicada a cada item
+            workers (int): Threads do estágio
+            queue_size (int): Capacidade da fila de entrada do estágio
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError(f"Estágio '{name}': workers e queue_size precisam ser >= 1")
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.queue_size = queue_size
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0      # segundos executando fn
+        self.starved = 0.0   # segundos esperando item na fila de entrada
+        self.blocked = 0.0   # segundos esperando espaço na fila de saída
+        self._lock = threading.Lock()
+
+    def _account(self, busy: float, starved: float, blocked: float, error: bool) -> None:
+        with self._lock:
+            self.items += 1
+            self.errors += int(error)
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+
+    def stats(self, wall: float) -> Dict:
+        capacity = self.workers * wall
+        return {
+            'workers': self.workers,
+            'items': self.items,
+            'errors': self.errors,
+            'busy_s': round(self.busy, 3),
+            'starved_s': round(self.starved, 3),
+            'blocked_s': round(self.blocked, 3),
+            'utilisation': self.busy / capacity if capacity else 0.0,
+        }
+
+
+class _Record:
+    """Item em trânsito: posição na entrada, entrada original, valor atual e erro (se houve)."""
+
+    __slots__ = ('seq', 'source', 'value', 'error', 'stage')
+
+    def __init__(self, seq: int, source: Any):
+        self.seq = seq
+        self.source = source
+        self.value = source
+        self.error: Optional[BaseException] = None
+        self.stage: Optional[str] = None
+
+
+def default_on_error(source: Any, stage: str, error: BaseException) -> Dict:
+    return {'source': source, 'stage': stage, 'error': str(error)}
+
+
+class Pipeline:
+    def __init__(
+        self,
+        stages: List[Stage],
+        ordered: bool = True,
+        on_error: Callable[[Any, str, BaseException], Any] = default_on_error,
+        max_in_flight: Optional[int] = None,
+    ):
+        """
+        Args:
+            stages (list): Estágios, na ordem em que cada item passa por eles
+            ordered (bool): True devolve na ordem de entrada; False, conforme terminam
+            on_error (callable): Converte (entrada, estágio, exceção) no resultado de um item que falhou.
+                                 Um item com erro pula os estágios seguintes, sem derrubar o pipeline.
+            max_in_flight (int): Máximo de itens entre a leitura da entrada e a entrega do resultado
+                                 (padrão: a capacidade das filas e threads)
+        """
+        if not stages:
+            raise ValueError("O pipeline precisa de pelo menos um estágio")
+        self.stages = stages
+        self.ordered = ordered
+        self.on_error = on_error
+        self.max_in_flight = max_in_flight or self.capacity
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+
+    @property
+    def capacity(self) -> int:
+        """Máximo de itens em trânsito ao mesmo tempo (filas + threads)."""
+        return sum(stage.queue_size + stage.workers for stage in self.stages) + 1
+
+    def run(self, inputs: Iterable[Any]) -> Iterator[Any]:
+        """
+        Passa cada entrada por todos os estágios e devolve os resultados conforme ficam prontos.
+
+        A entrada é consumida aos poucos (pode ser um gerador), só quando há espaço
+        na primeira fila. Se o consumidor parar antes do fim, as threads são encerradas.
+        """
+        stop = threading.Event()
+        # Limita também os itens prontos esperando a vez na reordenação
+        slots = threading.BoundedSemaphore(self.max_in_flight)
+        queues = [queue.Queue(stage.queue_size) for stage in self.stages]
+        output: "queue.Queue" = queue.Queue(self.stages[-1].queue_size)
+        queues.append(output)
+        self._started, self._finished = time.perf_counter(), None
+
+        threads = [threading.Thread(target=self._feed, args=(inputs, queues[0], slots, stop), daemon=True)]
+        for index, stage in enumerate(self.stages):
+            remaining = [stage.workers]
+            for _ in range(stage.workers):
+                threads.append(threading.Thread(
+                    target=self._work,
+                    args=(stage, queues[index], queues[index + 1], remaining, stop),
+                    name=f"pipeline-{stage.name}",
+                    daemon=True,
+                ))
+        for thread in threads:
+            thread.start()
+
+        try:
+            pending: Dict[int, _Record] = {}
+            next_seq = 0
+            while True:
+                record = output.get()
+                if record is _DONE:
+                    break
+                if not self.ordered:
+                    slots.release()
+                    yield self._result(record)
+                    continue
+                pending[record.seq] = record
+                while next_seq in pending:
+                    slots.release()
+                    yield self._result(pending.pop(next_seq))
+                    next_seq += 1
+            for seq in sorted(pending):
+                slots.release()
+                yield self._result(pending.pop(seq))
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self._finished = time.perf_counter()
+
+    def _result(self, record: _Record) -> Any:
+        if record.error is not None:
+            return self.on_error(record.source, record.stage, record.error)
+        return record.value
+
+    def _feed(self, inputs: Iterable[Any], first: "queue.Queue", slots: threading.Semaphore,
+              stop: threading.Event) -> None:
+        seq = 0
+        try:
+            for source in inputs:
+                if not _acquire(slots, stop) or not _put(first, _Record(seq, source), stop):
+                    return
+                seq += 1
+        except Exception as e:
+            # Falha do próprio iterador de entrada: vira um item com erro (na posição em que
+            # parou, ocupando uma vaga como os demais, que `run` libera) e encerra a entrada
+            record = _Record(seq, None)
+            record.error, record.stage = e, 'entrada'
+            if not _acquire(slots, stop) or not _put(first, record, stop):
+                return
+        _put(first, _DONE, stop)
+
+    def _work(self, stage: Stage, inbox: "queue.Queue", outbox: "queue.Queue", remaining: list,
+              stop: threading.Event) -> None:
+        while not stop.is_set():
+            t0 = time.perf_counter()
+            record = _get(inbox, stop)
+            t1 = time.perf_counter()
+            if record is None:
+                return
+            if record is _DONE:
+                # Devolve o marcador para as outras threads do estágio; a última o repassa adiante
+                inbox.put(_DONE)
+                with stage._lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last:
+                    _put(outbox, _DONE, stop)
+                return
+
+            failed = False
+            if record.error is None:
+                try:
+                    record.value = stage.fn(record.value)
+                except Exception as e:
+                    record.error, record.stage, record.value = e, stage.name, None
+                    failed = True
+            t2 = time.perf_counter()
+            if not _put(outbox, record, stop):
+                return
+            stage._account(t2 - t1, t1 - t0, time.perf_counter() - t2, failed)
+
+    def stats(self) -> Dict[str, Dict]:
+        """Estatísticas por estágio da última execução (ou da atual, até agora)."""
+        if self._started is None:
+            return {}
+        wall = (self._finished or time.perf_counter()) - self._started
+        return {stage.name: stage.stats(wall) for stage in self.stages}
+
+
+def _acquire(slots: threading.Semaphore, stop: threading.Event) -> bool:
+    while not slots.acquire(timeout=_POLL_SECONDS):
+        if stop.is_set():
+            return False
+    return True
+
+
+def _put(q: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(q: "queue.Queue", stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return q.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return None
+
+
+def document_pipeline(
+    extractor,
+    confidence_threshold: Optional[float] = None,
+    save: bool = True,
+    output_dir: str = "censored_images",
+    decode_workers: int = 2,
+    ocr_workers: int = 1,
+    redact_workers: int = 1,
+    encode_workers: int = 2,
+    queue_size: int = 4,
+    ordered: bool = True,
+    max_in_flight: Optional[int] = None,
+    keep_image: bool = False,
+    keep_detections: bool = False,
+) -> Pipeline:
+    """
+    Pipeline de documentos sobre um EasyOCRExtractor: decodificação e pré-processamento,
+    OCR, censura e gravação, cada um com suas threads.
+
+    O resultado de cada imagem é o mesmo dict do modo em lote (DocumentResult.to_dict()
+    mais 'output_path'), ou {'image_path', 'stage', 'error'} se falhou. Com `keep_image`,
+    o dict leva também a imagem censurada em 'redacted_image' (para quem grava a saída
+    por conta própria, como as páginas de um PDF); com `keep_detections`, as detecções
+    do OCR em 'ocr_detections' (para o manifesto reavaliar mudanças de regras).
+
+    Exemplo:
+        pipe = document_pipeline(extractor, decode_workers=2, encode_workers=2)
+        for resultado in pipe.run(list_images(pasta)):
+            ...
+        print(pipe.stats())
+    """
+    confidence_threshold = confidence_threshold if confidence_threshold is not None else 0.5
+    if getattr(extractor, 'ocr_batch_size', None):
+        # Com OCR em lotes, cada thread do estágio é um documento esperando o lote encher
+        ocr_workers = max(ocr_workers, extractor.ocr_batch_size)
+
+    def decode(source):
+        return extractor.prepare(source)
+
+    def ocr(item):
+        image_path, original, image, preprocessed = item
+        detections = extractor.read_detections(image, original, preprocessed)
+        return DocumentResult(
+            detections,
+            image,
+            confidence_threshold=confidence_threshold,
+            image_path=image_path,
+            preprocessed=preprocessed,
+            redaction_style=getattr(extractor, 'redaction_style', DEFAULT_STYLE),
+        )
+
+    def redact(document):
+        document.redacted_image  # calcula censura de texto e imagem fora da thread do OCR
+        return document
+
+    def encode(document):
+        result = document.to_dict()
+        result['output_path'] = document.save_redacted(output_dir) if save else None
+        if keep_image:
+            result['redacted_image'] = document.redacted_image
+        if keep_detections:
+            result['ocr_detections'] = document.detections
+        return result
+
+    def on_error(source, stage, error):
+        if isinstance(source, tuple):
+            source = source[0]
+        image_path = os.fspath(source) if isinstance(source, (str, os.PathLike)) else None
+        return {'image_path': image_path, 'stage': stage, 'error': str(error)}
+
+    return Pipeline(
+        [
+            Stage('decodificacao', decode, decode_workers, queue_size),
+            Stage('ocr', ocr, ocr_workers, queue_size),
+            Stage('censura', redact, redact_workers, queue_size),
+            Stage('gravacao', encode, encode_workers, queue_size),
+        ],
+        ordered=ordered,
+        on_error=on_error,
+        max_in_flight=max_in_flight,
+    )
@@ -0,0 +1,179 @@
+"""
+Calibração dos limiares do estimador de qualidade.
+
+Ajusta os limiares de `image_quality.QualityThresholds` para reproduzir, em um
+conjunto de amostras rotuladas, a decisão da heurística antiga (confiança média
+do OCR < 0.56 => pré-processar). Os rótulos podem vir de um CSV ou ser gerados
+rodando a própria heurística de OCR uma vez sobre as amostras.
+
+Exemplo:
+    python -m ia_m_uv.algoritmos.quality_calibration --amostras ./amostras \\
+        --rotular-com-ocr --salvar-rotulos rotulos.csv --saida limiares.json
+"""
+
+import argparse
+import csv
+import os
+from dataclasses import asdict, fields
+from typing import Dict, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .batch import list_images
+from .image_quality import QualityMetrics, QualityThresholds, estimate_quality, needs_preprocessing
+
+# Qual métrica cada limiar observa
+THRESHOLD_METRIC = {
+    "min_contrast": "contrast",
+    "max_contrast": "contrast",
+    "max_noise": "noise",
+    "min_sharpness": "sharpness",
+    "min_spread": "spread",
+}
+
+
+def load_labels(csv_path: str) -> Dict[str, bool]:
+    """Lê um CSV `caminho,rotulo` (rotulo 1 = precisa de pré-processamento)."""
+    labels = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if not row or row[0].startswith("#") or row[0] == "caminho":
+                continue
+            labels[row[0]] = row[1].strip() in ("1", "true", "True", "sim")
+    return labels
+
+
+def save_labels(csv_path: str, labels: Dict[str, bool]) -> None:
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["caminho", "rotulo"])
+        for path, label in labels.items():
+            writer.writerow([path, int(label)])
+
+
+def label_with_ocr(image_paths: Sequence[str]) -> Dict[str, bool]:
+    """Gera rótulos rodando a heurística antiga (sonda de OCR) em cada amostra."""
+    from .text_extraction import EasyOCRExtractor
+
+    # Só a sonda (leitor de PROBE_LANGUAGES) é usada; o leitor principal nem é carregado
+    extractor = EasyOCRExtractor(lazy=True)
+    labels = {}
+    for path in image_paths:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            print(f"[x] Ignorando {path}: não foi possível ler")
+            continue
+        labels[path] = extractor.should_preprocess(img)
+    return labels
+
+
+def balanced_accuracy(predicted: np.ndarray, expected: np.ndarray) -> float:
+    positives = expected.sum()
+    negatives = len(expected) - positives
+    tpr = (predicted & expected).sum() / positives if positives else 1.0
+    tnr = (~predicted & ~expected).sum() / negatives if negatives else 1.0
+    return float((tpr + tnr) / 2)
+
+
+def fit_thresholds(
+    metrics: List[QualityMetrics],
+    labels: Sequence[bool],
+    start: QualityThresholds = None,
+    rounds: int = 3,
+) -> Tuple[QualityThresholds, float]:
+    """
+    Ajusta os limiares por descida coordenada, maximizando a acurácia balanceada.
+
+    Cada limiar é testado contra os valores observados da sua métrica (mais
+    "desligado", que nunca dispara), mantendo os demais fixos.
+
+    Returns:
+        tuple: (limiares ajustados, acurácia balanceada no conjunto)
+    """
+    expected = np.asarray(labels, dtype=bool)
+    values = {name: np.array([getattr(m, name) for m in metrics]) for name in set(THRESHOLD_METRIC.values())}
+    current = asdict(start or QualityThresholds())
+
+    def score(candidate: dict) -> float:
+        t = QualityThresholds(**candidate)
+        predicted = np.array([needs_preprocessing(m, t) for m in metrics], dtype=bool)
+        return balanced_accuracy(predicted, expected)
+
+    best = score(current)
+    for _ in range(rounds):
+        improved = False
+        for name, metric in THRESHOLD_METRIC.items():
+            observed = np.unique(values[metric])
+            disabled = -np.inf if name.startswith("min_") else np.inf
+            for value in np.append(observed, disabled):
+                candidate = dict(current, **{name: float(value)})
+                candidate_score = score(candidate)
+                if candidate_score > best:
+                    best, current, improved = candidate_score, candidate, True
+        if not improved:
+            break
+
+    return QualityThresholds(**current), best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calibra os limiares do estimador de qualidade")
+    parser.add_argument("--amostras", required=True, help="Pasta com as imagens de amostra")
+    parser.add_argument("--rotulos", help="CSV caminho,rotulo (1 = precisa de pré-processamento)")
+    parser.add_argument("--rotular-com-ocr", action="store_true",
+                        help="Gera os rótulos com a heurística de confiança do OCR")
+    parser.add_argument("--salvar-rotulos", help="Salva os rótulos usados neste CSV")
+    parser.add_argument("--saida", default="limiares_qualidade.json", help="JSON de saída com os limiares")
+    args = parser.parse_args()
+
+    image_paths = list_images(args.amostras)
+    if args.rotulos:
+        labels = load_labels(args.rotulos)
+        labels = {p: labels[p] for p in image_paths if p in labels}
+    elif args.rotular_com_ocr:
+        labels = label_with_ocr(image_paths)
+    else:
+        parser.error("informe --rotulos ou --rotular-com-ocr")
+
+    if args.salvar_rotulos:
+        save_labels(args.salvar_rotulos, labels)
+    if not labels:
+        print("Nenhuma amostra rotulada encontrada.")
+        return 1
+
+    paths, metrics = [], []
+    for path in labels:
+        img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            # Apagada ou ilegível desde a rotulagem (ou listada só no CSV)
+            print(f"[x] Ignorando {path}: não foi possível ler")
+            continue
+        paths.append(path)
+        metrics.append(estimate_quality(img))
+    if not paths:
+        print("Nenhuma amostra rotulada pôde ser lida.")
+        return 1
+    baseline = balanced_accuracy(
+        np.array([needs_preprocessing(m) for m in metrics], dtype=bool),
+        np.array([labels[p] for p in paths], dtype=bool),
+    )
+    thresholds, accuracy = fit_thresholds(metrics, [labels[p] for p in paths])
+
+    print(f"Amostras: {len(paths)} ({sum(labels[p] for p in paths)} precisam de pré-processamento)")
+    print(f"Acurácia balanceada: padrão {baseline:.3f} -> calibrado {accuracy:.3f}")
+    for field in fields(thresholds):
+        print(f"  {field.name}: {getattr(thresholds, field.name):.2f}")
+
+    thresholds.save(
+        args.saida,
+        samples=len(paths),
+        balanced_accuracy=accuracy,
+        source=os.path.abspath(args.amostras),
+    )
+    print(f"[✔] Limiares salvos em: {args.saida}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,133 @@
+"""
+Motor de censura da imagem: uma máscara para todos os trechos sensíveis.
+
+Os polígonos de todas as sub-regiões (um por trecho sensível dentro de cada
+caixa do OCR, já na inclinação da caixa) viram uma única máscara, desenhada
+com uma chamada ao `cv2.fillPoly` e limitada ao retângulo que envolve todos
+eles. A censura é uma única operação NumPy (`np.copyto(..., where=máscara)`)
+sobre esse retângulo, no próprio array ou numa cópia só dele, então o custo
+depende da área censurada, não do número de trechos.
+
+Estilos (`REDACTION_STYLES`):
+- fill: preenche com uma cor sólida (padrão; o único que não deixa vestígio do texto);
+- pixelate: blocos de `block` px com a média da região;
+- blur: desfoque gaussiano forte.
+A máscara também serve sozinha como saída (`RedactionMask.full()`, estilo
+'mask' no DocumentResult), sem tocar a imagem.
+"""
+
+from typing import Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+REDACTION_STYLES = ('fill', 'pixelate', 'blur')
+DEFAULT_STYLE = 'fill'
+# Saída só com a máscara, no lugar da imagem censurada
+MASK_STYLE = 'mask'
+
+
+class RedactionMask:
+    def __init__(self, shape: Tuple[int, ...], polygons: Sequence[np.ndarray]):
+        """
+        Args:
+            shape (tuple): Formato da imagem (altura, largura[, canais])
+            polygons (list): Polígonos em coordenadas da imagem (N x 2, ex: BoxRegion.polygon)
+        """
+        self.shape = tuple(shape[:2])
+        self.box: Optional[Tuple[int, int, int, int]] = None  # (x0, y0, x1, y1) de tudo que é censurado
+        self.mask: Optional[np.ndarray] = None                # máscara booleana só do `box`
+        polygons = [np.round(np.asarray(p, dtype=np.float64)).astype(np.int32).reshape(-1, 2) for p in polygons]
+        if not polygons:
+            return
+
+        points = np.concatenate(polygons)
+        height, width = self.shape
+        x0, y0 = np.clip(points.min(axis=0), 0, [width, height])
+        x1, y1 = np.clip(points.max(axis=0) + 1, 0, [width, height])
+        if x1 <= x0 or y1 <= y0:
+            return
+        self.box = (int(x0), int(y0), int(x1), int(y1))
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        # Todos os polígonos de uma vez, deslocados para o retângulo
+        cv2.fillPoly(mask, [p - (x0, y0) for p in polygons], 1)
+        self.mask = mask.view(bool)
+
+    def __bool__(self) -> bool:
+        return self.box is not None
+
+    @property
+    def area(self) -> int:
+        """Pixels censurados."""
+        return int(self.mask.sum()) if self else 0
+
+    def full(self) -> np.ndarray:
+        """Máscara do tamanho da imagem (uint8: 255 = censurar), para usar como saída."""
+        full = np.zeros(self.shape, dtype=np.uint8)
+        if self:
+            x0, y0, x1, y1 = self.box
+            full[y0:y1, x0:x1][self.mask] = 255
+        return full
+
+    def patch(self, image: np.ndarray, style: str = DEFAULT_STYLE, **options) -> Optional[np.ndarray]:
+        """
+        Cópia censurada só do retângulo `box` (a imagem não é alterada).
+
+        Returns:
+            np.ndarray: Recorte censurado (None se não há nada a censurar)
+        """
+        if not self:
+            return None
+        x0, y0, x1, y1 = self.box
+        region = image[y0:y1, x0:x1].copy()
+        self._redact(image, region, style, **options)
+        return region
+
+    def apply(self, image: np.ndarray, style: str = DEFAULT_STYLE, in_place: bool = True, **options) -> np.ndarray:
+        """
+        Censura a imagem.
+
+        Args:
+            image (np.ndarray): Imagem em tons de cinza ou colorida
+            style (str): 'fill', 'pixelate' ou 'blur'
+            in_place (bool): Altera `image`; se False, devolve uma cópia censurada
+            **options: color (fill), block (pixelate), kernel (blur)
+
+        Returns:
+            np.ndarray: A imagem censurada
+        """
+        target = image if in_place else image.copy()
+        if self:
+            x0, y0, x1, y1 = self.box
+            self._redact(image, target[y0:y1, x0:x1], style, **options)
+        return target
+
+    def _redact(self, source: np.ndarray, region: np.ndarray, style: str, color=0, block: int = 12,
+                kernel: int = 31) -> None:
+        # `region` é a vista (ou cópia) do `box` a alterar; `source`, a imagem original
+        where = self.mask if region.ndim == 2 else self.mask[..., None]
+        if style == 'fill':
+            np.copyto(region, np.asarray(color, dtype=region.dtype), where=where)
+        elif style == 'pixelate':
+            height, width = region.shape[:2]
+            small = cv2.resize(region, (max(1, width // block), max(1, height // block)), interpolation=cv2.INTER_AREA)
+            np.copyto(region, cv2.resize(small, (width, height), interpolation=cv2.INTER_NEAREST), where=where)
+        elif style == 'blur':
+            np.copyto(region, self._blurred(source, kernel | 1), where=where)
+        else:
+            raise ValueError(f"Estilo de censura desconhecido: {style!r} (use {', '.join(REDACTION_STYLES)})")
+
+    def _blurred(self, source: np.ndarray, kernel: int) -> np.ndarray:
+        # Desfoca o `box` com uma margem de meio kernel, para a borda não puxar o fundo de fora
+        x0, y0, x1, y1 = self.box
+        height, width = self.shape
+        pad = kernel // 2
+        px0, py0 = max(0, x0 - pad), max(0, y0 - pad)
+        px1, py1 = min(width, x1 + pad), min(height, y1 + pad)
+        blurred = cv2.GaussianBlur(source[py0:py1, px0:px1], (kernel, kernel), 0)
+        return blurred[y0 - py0:y1 - py0, x0 - px0:x1 - px0]
+
+
+def build_mask(shape: Tuple[int, ...], matches: Sequence) -> RedactionMask:
+    """Máscara de todas as sub-regiões de uma lista de SensitiveMatch."""
+    return RedactionMask(shape, [region.polygon for match in matches for region in match.regions])
@@ -0,0 +1,218 @@
+"""
+OCR por regiões para digitalizações grandes (300–600 dpi).
+
+O `readtext` converte a página inteira para BGR (3x a memória da imagem em tons
+de cinza) e roda o detector sobre ela, limitada a 2560 px no maior lado: em
+páginas enormes o texto fica pequeno demais para ser detectado, e em páginas
+grandes a maior parte do custo vai para margens e fotos.
+
+Aqui a detecção roda numa cópia reduzida (no máximo `detect_max_side` px) e o
+reconhecimento só nos recortes das caixas encontradas, tirados da imagem em
+resolução original. Se a redução necessária passar de `min_detect_scale`, a
+página é dividida em blocos sobrepostos, cada um reduzido e detectado à parte;
+as linhas cortadas na borda de um bloco são unidas com as do bloco vizinho e
+as caixas repetidas na sobreposição são descartadas. A memória extra fica
+limitada ao tamanho de um bloco, qualquer que seja o tamanho da página.
+"""
+
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .batched_ocr import DETECT_OPTIONS, BatchedReader
+
+# (x_min, x_max, y_min, y_max) em coordenadas da imagem original
+Rect = List[int]
+
+# Fração da menor caixa que precisa estar dentro da outra para ser considerada repetida
+_CONTAINMENT = 0.6
+# Tolerância, em pixels, para considerar que uma caixa encosta na borda de um bloco
+_EDGE_TOLERANCE = 3
+
+
+def tile_windows(height: int, width: int, tile: int, overlap: int) -> List[Tuple[int, int, int, int]]:
+    """Janelas (x0, y0, x1, y1) de lado `tile`, sobrepostas em `overlap` px, cobrindo a imagem."""
+    def starts(size):
+        if size <= tile:
+            return [0]
+        step = max(1, tile - overlap)
+        positions = list(range(0, size - tile, step))
+        positions.append(size - tile)
+        return positions
+
+    return [
+        (x, y, min(x + tile, width), min(y + tile, height))
+        for y in starts(height)
+        for x in starts(width)
+    ]
+
+
+def _area(rect: Rect) -> int:
+    return max(0, rect[1] - rect[0]) * max(0, rect[3] - rect[2])
+
+
+def _intersection(a: Rect, b: Rect) -> int:
+    return _area([max(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), min(a[3], b[3])])
+
+
+def _same_line(a: Rect, b: Rect) -> bool:
+    overlap = min(a[3], b[3]) - max(a[2], b[2])
+    return overlap >= 0.5 * min(a[3] - a[2], b[3] - b[2]) and min(a[1], b[1]) >= max(a[0], b[0])
+
+
+def _vertical_pairs(rects: Sequence[Rect]) -> Iterator[Tuple[int, int]]:
+    """Pares de caixas que se sobrepõem na vertical, numa varredura de cima para baixo."""
+    active: List[int] = []
+    for i in sorted(range(len(rects)), key=lambda k: rects[k][2]):
+        # Só continuam ativas as caixas que ainda não terminaram acima desta
+        active = [j for j in active if rects[j][3] >= rects[i][2]]
+        for j in active:
+            yield j, i
+        active.append(i)
+
+
+def _drop_contained(rects: Sequence[Rect]) -> List[int]:
+    """
+    Índices das caixas que sobram ao descartar, da maior para a menor, as que estão
+    (em `_CONTAINMENT`) dentro de uma já mantida. Só as mantidas nas mesmas faixas
+    horizontais (da altura mediana das caixas) são comparadas.
+    """
+    if not rects:
+        return []
+    band = max(1, int(np.median([r[3] - r[2] for r in rects])))
+    kept: List[int] = []
+    bands: Dict[int, List[int]] = {}
+    for i in sorted(range(len(rects)), key=lambda k: _area(rects[k]), reverse=True):
+        rect = rects[i]
+        rows = range(rect[2] // band, rect[3] // band + 1)
+        nearby = {k for row in rows for k in bands.get(row, ())}
+        if all(_intersection(rect, rects[k]) < _CONTAINMENT * max(1, _area(rect)) for k in nearby):
+            kept.append(i)
+            for row in rows:
+                bands.setdefault(row, []).append(i)
+    return kept
+
+
+def merge_tiled_boxes(rects: Sequence[Rect], cut: Sequence[bool]) -> List[Rect]:
+    """
+    Une as linhas cortadas na borda de um bloco (`cut`) com os pedaços do bloco
+    vizinho e remove as caixas repetidas na sobreposição.
+
+    Uma única passada: os pares na mesma linha com ao menos um pedaço cortado
+    (vindos de uma varredura vertical, não de todos contra todos) são unidos
+    com union-find, e cada grupo vira a caixa que envolve seus pedaços.
+    """
+    parent = list(range(len(rects)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in _vertical_pairs(rects):
+        if (cut[i] or cut[j]) and _same_line(rects[i], rects[j]):
+            parent[find(i)] = find(j)
+
+    groups: Dict[int, List[int]] = {}
+    for i in range(len(rects)):
+        groups.setdefault(find(i), []).append(i)
+    boxes = [
+        [min(rects[k][0] for k in group), max(rects[k][1] for k in group),
+         min(rects[k][2] for k in group), max(rects[k][3] for k in group)]
+        for group in groups.values()
+    ]
+    kept = [boxes[i] for i in _drop_contained(boxes)]
+    return sorted(kept, key=lambda r: (r[2], r[0]))
+
+
+class RegionReader:
+    def __init__(
+        self,
+        reader,
+        detect_max_side: int = 1600,
+        min_detect_scale: float = 0.35,
+        tile_overlap: float = 0.1,
+        batch_size: int = 32,
+    ):
+        """
+        Args:
+            reader (easyocr.Reader): Leitor já carregado
+            detect_max_side (int): Maior lado da imagem (ou do bloco) entregue ao detector
+            min_detect_scale (float): Redução máxima permitida antes de dividir em blocos
+                                      (abaixo disso o texto some na detecção)
+            tile_overlap (float): Sobreposição entre blocos, como fração do lado do bloco
+            batch_size (int): Recortes de texto por passada do reconhecedor
+        """
+        self.reader = reader
+        self.detect_max_side = detect_max_side
+        self.min_detect_scale = min_detect_scale
+        self.tile_overlap = tile_overlap
+        self.batched = BatchedReader(reader, batch_size=batch_size)
+        self.stats = {'pages': 0, 'tiles': 0, 'boxes': 0}
+
+    def windows(self, shape: Tuple[int, int]) -> Tuple[float, List[Tuple[int, int, int, int]]]:
+        """Escala de detecção e janelas (em coordenadas originais) de uma página."""
+        height, width = shape[:2]
+        scale = min(1.0, self.detect_max_side / max(height, width))
+        if scale >= self.min_detect_scale:
+            return scale, [(0, 0, width, height)]
+        scale = self.min_detect_scale
+        tile = int(self.detect_max_side / scale)
+        return scale, tile_windows(height, width, tile, int(tile * self.tile_overlap))
+
+    def detect(self, image: np.ndarray) -> Tuple[list, list]:
+        """
+        Caixas de texto da imagem em tons de cinza, em coordenadas originais,
+        no formato do `Reader.detect` (horizontais [x0, x1, y0, y1], livres [4 pontos]).
+        """
+        height, width = image.shape[:2]
+        scale, windows = self.windows(image.shape)
+        rects, cut, free = [], [], []
+        for x0, y0, x1, y1 in windows:
+            # Fatia sem cópia; só a versão reduzida (limitada a detect_max_side) é alocada
+            tile = image[y0:y1, x0:x1]
+            if scale < 1.0:
+                tile = cv2.resize(tile, (max(1, round((x1 - x0) * scale)), max(1, round((y1 - y0) * scale))),
+                                  interpolation=cv2.INTER_AREA)
+            horizontal, free_boxes = self.reader.detect(cv2.cvtColor(tile, cv2.COLOR_GRAY2BGR), reformat=False,
+                                                        **DETECT_OPTIONS)
+            self.stats['tiles'] += 1
+            for bx0, bx1, by0, by1 in horizontal[0]:
+                rect = [
+                    max(0, int(bx0 / scale) + x0), min(width, int(np.ceil(bx1 / scale)) + x0),
+                    max(0, int(by0 / scale) + y0), min(height, int(np.ceil(by1 / scale)) + y0),
+                ]
+                touches = (
+                    (x0 > 0 and rect[0] <= x0 + _EDGE_TOLERANCE) or (x1 < width and rect[1] >= x1 - _EDGE_TOLERANCE)
+                    or (y0 > 0 and rect[2] <= y0 + _EDGE_TOLERANCE) or (y1 < height and rect[3] >= y1 - _EDGE_TOLERANCE)
+                )
+                rects.append(rect)
+                cut.append(len(windows) > 1 and touches)
+            for box in free_boxes[0]:
+                free.append([[p[0] / scale + x0, p[1] / scale + y0] for p in box])
+
+        horizontal = merge_tiled_boxes(rects, cut) if len(windows) > 1 else rects
+        if len(windows) > 1 and free:
+            free = self._dedupe_free(free)
+        self.stats['boxes'] += len(horizontal) + len(free)
+        return horizontal, free
+
+    @staticmethod
+    def _dedupe_free(free: List[list]) -> List[list]:
+        def bounds(box):
+            xs, ys = [p[0] for p in box], [p[1] for p in box]
+            return [int(min(xs)), int(max(xs)), int(min(ys)), int(max(ys))]
+
+        return [free[i] for i in _drop_contained([bounds(box) for box in free])]
+
+    def readtext(self, image: np.ndarray) -> List[tuple]:
+        """Equivalente ao `readtext` para uma imagem em tons de cinza: [(bbox, text, confidence), ...]."""
+        self.stats['pages'] += 1
+        return self.batched.recognize_many([image], [self.detect(image)])[0]
+
+    def readtext_many(self, images: Sequence[np.ndarray]) -> List[List[tuple]]:
+        """Várias páginas, com os recortes de todas reconhecidos em lotes."""
+        self.stats['pages'] += len(images)
+        return self.batched.recognize_many(images, [self.detect(image) for image in images])
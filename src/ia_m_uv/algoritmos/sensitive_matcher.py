@@ -0,0 +1,427 @@
+"""
+Detector de dados sensíveis com padrões pré-compilados.
+
+Todos os padrões do registro viram uma única regex com grupos nomeados, que
+roda uma vez sobre o texto de todas as detecções unidas em ordem de leitura.
+Assim um CPF que o EasyOCR quebrou em duas caixas vizinhas ainda é encontrado,
+e cada ocorrência volta como um trecho de caracteres mapeado para a sub-região
+de cada caixa que ele ocupa (e não a caixa inteira). Dígitos verificadores
+(CPF, CNPJ) e datas impossíveis são usados para descartar falsos positivos.
+"""
+
+import hashlib
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Separadores tolerados dentro de um número: pontuação do formato e o espaço
+# que aparece quando o número foi dividido entre duas caixas (de qualquer lado
+# da pontuação, conforme onde o EasyOCR quebrou)
+_DOT = r'\s?\.?\s?'
+_DASH = r'\s?-?\s?'
+_NOT_DIGIT_BEFORE = r'(?<!\d)'
+_NOT_DIGIT_AFTER = r'(?!\d)'
+# Separador entre caixas vizinhas da mesma linha no texto unido. É um espaço em
+# branco (\s casa com ele), mas diferente do espaço que o próprio EasyOCR põe
+# dentro de uma caixa, para um padrão aceitar a quebra só na divisa entre caixas
+BOX_GAP = '\t'
+
+
+def _group(size: int) -> str:
+    """Grupo de `size` dígitos, aceitando um espaço entre eles (quebra de caixa no meio do grupo)."""
+    return r'\d' + r'(?:\s?\d)' * (size - 1)
+
+
+def _digits(text: str) -> str:
+    return ''.join(ch for ch in text if ch.isdigit())
+
+
+def _mod11_digit(digits: str, weights: Sequence[int]) -> int:
+    rest = sum(int(d) * w for d, w in zip(digits, weights)) % 11
+    return 0 if rest < 2 else 11 - rest
+
+
+def validate_cpf(text: str) -> bool:
+    """Confere os dois dígitos verificadores do CPF."""
+    digits = _digits(text)
+    if len(digits) != 11 or digits == digits[0] * 11:
+        return False
+    first = _mod11_digit(digits[:9], range(10, 1, -1))
+    second = _mod11_digit(digits[:10], range(11, 1, -1))
+    return digits[9:] == f"{first}{second}"
+
+
+def validate_cnpj(text: str) -> bool:
+    """Confere os dois dígitos verificadores do CNPJ."""
+    digits = _digits(text)
+    if len(digits) != 14 or digits == digits[0] * 14:
+        return False
+    weights = [5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2]
+    first = _mod11_digit(digits[:12], weights)
+    second = _mod11_digit(digits[:13], [6] + weights)
+    return digits[12:] == f"{first}{second}"
+
+
+def validate_date(text: str) -> bool:
+    """Descarta datas impossíveis (ex: 45/13/2020)."""
+    digits = _digits(text)
+    try:
+        date(int(digits[4:]), int(digits[2:4]), int(digits[:2]))
+        return True
+    except ValueError:
+        return False
+
+
+@dataclass(frozen=True)
+class SensitivePattern:
+    name: str
+    regex: str
+    validator: Optional[Callable[[str], bool]] = None
+    description: str = ""
+
+
+class PatternRegistry:
+    """
+    Registro plugável de padrões sensíveis.
+
+    A ordem de registro é a prioridade: quando dois padrões casam na mesma
+    posição, vale o primeiro. Cada alteração incrementa `version`, o que faz os
+    matchers que usam o registro recompilarem na próxima busca.
+    """
+
+    def __init__(self, patterns: Sequence[SensitivePattern] = ()):
+        self._patterns: Dict[str, SensitivePattern] = {}
+        self.version = 0
+        for pattern in patterns:
+            self.register(pattern)
+
+    def register(self, pattern: SensitivePattern) -> None:
+        if not pattern.name.isidentifier():
+            raise ValueError(f"Nome de padrão inválido (precisa ser um identificador): {pattern.name!r}")
+        # Valida a regex isolada para o erro apontar o padrão certo
+        re.compile(pattern.regex)
+        self._patterns[pattern.name] = pattern
+        self.version += 1
+
+    def unregister(self, name: str) -> None:
+        del self._patterns[name]
+        self.version += 1
+
+    def names(self) -> List[str]:
+        return list(self._patterns)
+
+    def patterns(self) -> List[SensitivePattern]:
+        return list(self._patterns.values())
+
+    def signature(self) -> str:
+        """Hash estável dos padrões registrados (identifica o conjunto de regras)."""
+        content = '\n'.join(f"{p.name}={p.regex}" for p in self._patterns.values())
+        return hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+
+    def copy(self) -> "PatternRegistry":
+        return PatternRegistry(self.patterns())
+
+
+DEFAULT_PATTERNS = [
+    SensitivePattern(
+        'cnpj',
+        _NOT_DIGIT_BEFORE + _group(2) + _DOT + _group(3) + _DOT + _group(3) + r'\s?/?\s?' + _group(4) + _DASH
+        + _group(2) + _NOT_DIGIT_AFTER,
+        validate_cnpj,
+        "CNPJ",
+    ),
+    SensitivePattern(
+        'cpf',
+        _NOT_DIGIT_BEFORE + _group(3) + _DOT + _group(3) + _DOT + _group(3) + _DASH + _group(2) + _NOT_DIGIT_AFTER,
+        validate_cpf,
+        "CPF",
+    ),
+    SensitivePattern(
+        'rg',
+        _NOT_DIGIT_BEFORE + r'\d{1,2}\s?\.\s?\d{3}\s?\.\s?\d{3}\s?-\s?[\dXx]' + r'(?![\dA-Za-z])',
+        None,
+        "RG (formatado com pontos e dígito)",
+    ),
+    SensitivePattern(
+        'data',
+        _NOT_DIGIT_BEFORE + r'\d{2}\s?/\s?\d{2}\s?/\s?\d{4}' + _NOT_DIGIT_AFTER,
+        validate_date,
+        "Data dd/mm/aaaa",
+    ),
+    SensitivePattern(
+        'placa',
+        # AAA-9999, AAA9999 ou AAA9A99; espaço só na divisa entre duas caixas, senão
+        # "RUA 1234" ou "SAO 2020" viram placa
+        r'\b[A-Z]{3}' + BOX_GAP + r'?-?' + BOX_GAP + r'?(?:\d{4}|\d[A-Z]\d{2})\b',
+        None,
+        "Placa (antiga ou Mercosul)",
+    ),
+    SensitivePattern(
+        'telefone',
+        r'(?:\+?55\s?)?\(?(?<!\d)\d{2}\)?\s?9?\d{4}\s?-\s?\d{4}' + _NOT_DIGIT_AFTER,
+        None,
+        "Telefone com DDD",
+    ),
+    SensitivePattern(
+        'email',
+        r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+',
+        None,
+        "E-mail",
+    ),
+]
+
+DEFAULT_REGISTRY = PatternRegistry(DEFAULT_PATTERNS)
+
+
+@dataclass
+class BoxRegion:
+    index: int        # índice da detecção original
+    char_start: int   # trecho dentro do texto da detecção
+    char_end: int
+    polygon: List[List[float]]  # 4 pontos da sub-região na imagem
+
+
+@dataclass
+class SensitiveMatch:
+    category: str
+    text: str
+    start: int        # posição no texto unido em ordem de leitura
+    end: int
+    regions: List[BoxRegion] = field(default_factory=list)
+
+
+def match_signature(matches: Sequence[SensitiveMatch]) -> str:
+    """
+    Assinatura do que é censurado num documento (categoria e trecho de cada caixa),
+    para saber se outras regras mudariam a saída sem refazer a censura.
+    """
+    items = sorted((m.category, r.index, r.char_start, r.char_end) for m in matches for r in m.regions)
+    return hashlib.sha256(repr(items).encode('utf-8')).hexdigest()[:16]
+
+
+def reading_order(detections: Sequence[tuple]) -> List[List[int]]:
+    """
+    Agrupa as detecções em linhas, em ordem de leitura: linhas de cima para
+    baixo e, dentro de cada linha, da esquerda para a direita.
+
+    Caixas cujo centro vertical está a menos de meia altura do início da linha
+    atual são consideradas da mesma linha.
+
+    Returns:
+        list: Uma lista de índices de detecção por linha
+    """
+    boxes = []
+    for i, (bbox, _, _) in enumerate(detections):
+        ys = [p[1] for p in bbox]
+        xs = [p[0] for p in bbox]
+        boxes.append((sum(ys) / len(ys), max(ys) - min(ys), min(xs), i))
+    boxes.sort()
+
+    lines: List[List[int]] = []
+    line: List[tuple] = []
+    line_center = None
+    for center, height, x_min, i in boxes:
+        if line and abs(center - line_center) > max(height, 1) / 2:
+            lines.append([item[3] for item in sorted(line, key=lambda b: b[2])])
+            line = []
+        if not line:
+            line_center = center
+        line.append((center, height, x_min, i))
+    if line:
+        lines.append([item[3] for item in sorted(line, key=lambda b: b[2])])
+    return lines
+
+
+def sub_box(bbox: Sequence[Sequence[float]], start_frac: float, end_frac: float) -> List[List[float]]:
+    """
+    Recorta a fração [start_frac, end_frac] da largura de um bbox de 4 pontos
+    (tl, tr, br, bl), interpolando nas bordas de cima e de baixo. Funciona para
+    caixas rotacionadas ou inclinadas.
+    """
+    (tlx, tly), (trx, try_), (brx, bry), (blx, bly) = bbox
+
+    def lerp(ax, ay, bx, by, t):
+        return [ax + (bx - ax) * t, ay + (by - ay) * t]
+
+    return [
+        lerp(tlx, tly, trx, try_, start_frac),
+        lerp(tlx, tly, trx, try_, end_frac),
+        lerp(blx, bly, brx, bry, end_frac),
+        lerp(blx, bly, brx, bry, start_frac),
+    ]
+
+
+class JoinedText:
+    """
+    Texto das detecções unido em ordem de leitura (BOX_GAP entre caixas da mesma
+    linha, quebra de linha entre linhas), com a posição de cada caixa nele.
+    """
+
+    def __init__(self, detections: Sequence[tuple]):
+        self.order: List[int] = []
+        self.starts: List[int] = []
+        self.ends: List[int] = []
+        parts: List[str] = []
+        offset = 0
+        for line in reading_order(detections):
+            for position, i in enumerate(line):
+                if parts:
+                    parts.append(BOX_GAP if position else '\n')
+                    offset += 1
+                text = detections[i][1]
+                parts.append(text)
+                self.order.append(i)
+                self.starts.append(offset)
+                offset += len(text)
+                self.ends.append(offset)
+        self.text = ''.join(parts)
+
+
+class SensitiveMatcher:
+    def __init__(self, registry: PatternRegistry = None, char_padding: float = 0.5):
+        """
+        Args:
+            registry (PatternRegistry): Padrões a procurar (padrão: DEFAULT_REGISTRY)
+            char_padding (float): Margem, em larguras de caractere, adicionada a cada
+                                  lado da sub-região (a largura dos caracteres é estimada)
+        """
+        self.registry = registry or DEFAULT_REGISTRY
+        self.char_padding = char_padding
+        self._compiled_version = None
+        self._combined = None
+        self._singles: Dict[str, "re.Pattern"] = {}
+
+    def _compile(self) -> None:
+        if self._compiled_version == self.registry.version:
+            return
+        patterns = self.registry.patterns()
+        if patterns:
+            self._combined = re.compile('|'.join(f"(?P<{p.name}>{p.regex})" for p in patterns))
+        else:
+            # Regex que nunca casa
+            self._combined = re.compile(r'(?!)')
+        self._singles = {p.name: re.compile(p.regex) for p in patterns}
+        self._validators = {p.name: p.validator for p in patterns}
+        self._order = [p.name for p in patterns]
+        self._compiled_version = self.registry.version
+
+    def _accept(self, name: str, text: str) -> bool:
+        validator = self._validators[name]
+        return validator is None or validator(text)
+
+    def search_text(self, text: str) -> List[Tuple[str, int, int]]:
+        """
+        Procura todos os padrões em um texto.
+
+        Returns:
+            list: [(categoria, início, fim), ...] em ordem de posição
+        """
+        self._compile()
+        found = []
+        pos = 0
+        while True:
+            m = self._combined.search(text, pos)
+            if m is None:
+                break
+            name, start, end = m.lastgroup, m.start(), m.end()
+            if not self._accept(name, m.group()):
+                # Falhou na validação: tenta os padrões de menor prioridade na mesma posição
+                name = None
+                for other in self._order[self._order.index(m.lastgroup) + 1:]:
+                    alt = self._singles[other].match(text, start)
+                    if alt and self._accept(other, alt.group()):
+                        name, end = other, alt.end()
+                        break
+            if name is None:
+                pos = start + 1
+                continue
+            found.append((name, start, end))
+            pos = max(end, start + 1)
+        return found
+
+    def is_sensitive(self, text: str) -> bool:
+        return bool(self.search_text(text))
+
+    def match_detections(self, detections: Sequence[tuple]) -> List[SensitiveMatch]:
+        """
+        Procura dados sensíveis no conjunto de detecções do EasyOCR.
+
+        As detecções são unidas em ordem de leitura (BOX_GAP entre caixas da mesma
+        linha, quebra de linha entre linhas) e a busca roda uma vez sobre o texto
+        inteiro; cada ocorrência é mapeada de volta para as caixas que ela cobre.
+
+        Args:
+            detections (list): [(bbox, text, confidence), ...]
+
+        Returns:
+            list: SensitiveMatch com as sub-regiões de cada caixa envolvida
+        """
+        if not detections:
+            return []
+
+        layout = JoinedText(detections)
+        return [
+            self._to_match(detections, layout, name, start, end)
+            for name, start, end in self.search_text(layout.text)
+        ]
+
+    def locate(self, detections: Sequence[tuple], spans: Sequence[Tuple[str, str]]) -> List[SensitiveMatch]:
+        """
+        Localiza trechos apontados por fora (ex: pelo Gemini) nas detecções.
+
+        A busca é literal, sem diferenciar maiúsculas e aceitando qualquer
+        espaço em branco entre as palavras, para tolerar a quebra entre caixas.
+
+        Args:
+            detections (list): [(bbox, text, confidence), ...]
+            spans (list): [(categoria, texto), ...]
+
+        Returns:
+            list: SensitiveMatch de cada ocorrência encontrada
+        """
+        if not detections:
+            return []
+
+        layout = JoinedText(detections)
+        matches = []
+        for category, text in spans:
+            words = text.split()
+            if not words:
+                continue
+            pattern = re.compile(r'\s*'.join(re.escape(word) for word in words), re.IGNORECASE)
+            for m in pattern.finditer(layout.text):
+                matches.append(self._to_match(detections, layout, category, m.start(), m.end()))
+        return matches
+
+    def _to_match(self, detections, layout: "JoinedText", name: str, start: int, end: int) -> SensitiveMatch:
+        match = SensitiveMatch(name, layout.text[start:end], start, end)
+        starts, ends, order = layout.starts, layout.ends, layout.order
+        # Primeira caixa que pode conter o início do trecho
+        k = max(0, bisect_right(starts, start) - 1)
+        while k < len(order) and starts[k] < end:
+            if ends[k] > start:
+                match.regions.append(self._region(detections, order[k], start - starts[k], end - starts[k]))
+            k += 1
+        return match
+
+    def _region(self, detections, index: int, char_start: int, char_end: int) -> BoxRegion:
+        bbox, text, _ = detections[index]
+        length = max(len(text), 1)
+        char_start = max(char_start, 0)
+        char_end = min(char_end, length)
+        start_frac = max(0.0, (char_start - self.char_padding) / length)
+        end_frac = min(1.0, (char_end + self.char_padding) / length)
+        return BoxRegion(index, char_start, char_end, sub_box(bbox, start_frac, end_frac))
+
+
+_default_matcher: Optional[SensitiveMatcher] = None
+
+
+def default_matcher() -> SensitiveMatcher:
+    """Matcher compartilhado com o registro padrão (compilado uma vez)."""
+    global _default_matcher
+    if _default_matcher is None:
+        _default_matcher = SensitiveMatcher()
+    return _default_matcher
@@ -0,0 +1,445 @@
+"""
+Modo servidor: modelos carregados uma vez, documentos recebidos por HTTP.
+
+O processo mantém o EasyOCRExtractor (e o que o `evaluate` usar, como o
+cliente do Gemini) residente e atende requisições numa porta local ou num
+socket Unix. Cada requisição roda numa thread; com `ocr_batch_size`, as
+requisições simultâneas são juntadas em lotes do OCR pelo MicroBatcher do
+extrator, então a latência de um documento é só a da inferência.
+
+Rotas:
+    GET  /healthz          processo vivo (200 mesmo enquanto o modelo carrega)
+    GET  /readyz           200 quando o modelo está carregado; 503 carregando ou encerrando
+    GET  /stats            contadores do serviço
+    POST /censurar         corpo = imagem codificada (jpg/png/...); parâmetros na query:
+                           nome, confianca, imagem=.png|.jpg|... (devolve a imagem censurada
+                           nesse formato, em base64)
+
+Ao receber SIGTERM/SIGINT, o servidor para de aceitar documentos (503), espera
+os que estão em andamento terminarem (até `drain_timeout`) e encerra.
+
+Exemplo:
+    ia-m-uv --servir --porta 8765 --ocr-lote 8
+    ia-m-uv --servidor http://127.0.0.1:8765 --pasta ./documentos
+"""
+
+import base64
+import http.client
+import json
+import os
+import signal
+import socket
+import socketserver
+import stat
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Iterable, Iterator, Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from . import instrumentation
+from .jsonl_sink import json_default
+
+DEFAULT_PORT = 8765
+
+
+class ServiceUnavailable(Exception):
+    """O serviço não aceita o documento agora (carregando, cheio ou encerrando)."""
+
+
+class CensorService:
+    def __init__(
+        self,
+        extractor,
+        evaluate: Optional[Callable] = None,
+        confidence_threshold: Optional[float] = None,
+        max_pending: int = 64,
+        ready_timeout: float = 300.0,
+    ):
+        """
+        Args:
+            extractor (EasyOCRExtractor): Extrator residente (de preferência com ocr_batch_size)
+            evaluate (callable): Avaliação extra de cada DocumentResult (ex: política + Gemini);
+                                 o retorno vai no campo 'veredito' da resposta
+            confidence_threshold (float): Confiança mínima padrão (a requisição pode trocar)
+            max_pending (int): Documentos em andamento antes de responder 503
+            ready_timeout (float): Quanto uma requisição espera o modelo terminar de carregar
+        """
+        self.extractor = extractor
+        self.evaluate = evaluate
+        self.confidence_threshold = confidence_threshold
+        self.max_pending = max_pending
+        self.ready_timeout = ready_timeout
+        self.ready = threading.Event()
+        self.loaded = threading.Event()  # a carga terminou, com sucesso ou não
+        self.draining = False
+        self.load_error: Optional[str] = None
+        self._pending = 0
+        self._cond = threading.Condition()
+        self.stats = {'requests': 0, 'documents': 0, 'errors': 0, 'rejected': 0, 'busy_s': 0.0}
+
+    def load(self) -> None:
+        """Carrega o modelo (bloqueia); o serviço fica pronto ao final."""
+        try:
+            self.extractor.warm_up()
+            self.ready.set()
+        except Exception as e:
+            self.load_error = str(e)
+            raise
+        finally:
+            self.loaded.set()
+
+    def load_in_background(self) -> threading.Thread:
+        thread = threading.Thread(target=self.load, name="carga-modelo", daemon=True)
+        thread.start()
+        return thread
+
+    def _enter(self) -> None:
+        with self._cond:
+            self.stats['requests'] += 1
+            if self.draining or self._pending >= self.max_pending:
+                self.stats['rejected'] += 1
+                raise ServiceUnavailable("encerrando" if self.draining else "fila cheia")
+            self._pending += 1
+        # Se a carga falhou, responde na hora em vez de esperar o `ready_timeout` inteiro
+        if not self.loaded.wait(self.ready_timeout) or self.load_error is not None:
+            self._leave()
+            raise ServiceUnavailable(self.load_error or "modelo ainda carregando")
+
+    def _leave(self) -> None:
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def censor(self, content: bytes, name: Optional[str] = None, confidence_threshold: Optional[float] = None,
+               image_format: Optional[str] = None) -> Dict:
+        """
+        Processa um documento recebido (bytes da imagem codificada).
+
+        Returns:
+            dict: DocumentResult.to_dict(), com 'veredito' (se houver `evaluate`) e
+                  'redacted_image' em base64 (se `image_format`, ex: '.png')
+
+        Raises:
+            ServiceUnavailable: Se o serviço estiver encerrando, cheio ou sem modelo
+            ValueError: Se a imagem não puder ser lida
+        """
+        self._enter()
+        start = time.perf_counter()
+        outcome = 'errors'
+        try:
+            threshold = confidence_threshold if confidence_threshold is not None else self.confidence_threshold
+            document = self.extractor.process((name, content) if name else content, threshold)
+            verdict = self.evaluate(document) if self.evaluate is not None else None
+            result = document.to_dict()
+            if verdict is not None:
+                result['veredito'] = verdict
+            if image_format:
+                result['redacted_image'] = base64.b64encode(document.redacted_bytes(image_format)).decode('ascii')
+            outcome = 'documents'
+            return result
+        finally:
+            with self._cond:
+                self.stats[outcome] += 1
+                self.stats['busy_s'] += time.perf_counter() - start
+            self._leave()
+
+    def drain(self, timeout: float = 30.0) -> bool:
+        """
+        Para de aceitar documentos e espera os em andamento terminarem.
+
+        Returns:
+            bool: True se todos terminaram dentro do prazo
+        """
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self.draining = True
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def status(self) -> Dict:
+        return dict(self.stats, pending=self._pending, ready=self.ready.is_set(), draining=self.draining)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = "ia-m-uv"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def service(self) -> CensorService:
+        return self.server.service
+
+    def log_message(self, format, *args):
+        # Sem uma linha por requisição no terminal; os erros são respondidos ao cliente
+        pass
+
+    def address_string(self):
+        # Em socket Unix o endereço do cliente é uma string vazia
+        return self.client_address[0] if isinstance(self.client_address, tuple) else "unix"
+
+    def _send(self, status: int, payload: Dict, headers: Optional[Dict] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False, default=json_default).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path = urlparse(self.path).path
+        service = self.service
+        if path == '/healthz':
+            self._send(200, {'status': 'ok'})
+        elif path == '/readyz':
+            ready = service.ready.is_set() and not service.draining
+            self._send(200 if ready else 503, {'ready': ready, 'draining': service.draining,
+                                               'error': service.load_error})
+        elif path == '/stats':
+            self._send(200, service.status())
+        else:
+            self._send(404, {'error': f"rota desconhecida: {path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/censurar':
+            self._send(404, {'error': f"rota desconhecida: {url.path}"})
+            return
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length') or 0)
+        content = self.rfile.read(length)
+        try:
+            result = self.service.censor(
+                content,
+                name=query.get('nome'),
+                confidence_threshold=float(query['confianca']) if 'confianca' in query else None,
+                image_format=query.get('imagem'),
+            )
+        except ServiceUnavailable as e:
+            self._send(503, {'error': str(e)}, {'Retry-After': '1'})
+        except (ValueError, TypeError) as e:
+            self._send(400, {'error': str(e)})
+        except Exception as e:
+            self._send(500, {'error': str(e)})
+        else:
+            self._send(200, result)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, service: CensorService):
+        super().__init__(address, _Handler)
+        self.service = service
+
+
+def _remove_socket(path: str) -> None:
+    """Apaga um socket Unix que sobrou de outra execução; recusa apagar qualquer outro arquivo."""
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if not stat.S_ISSOCK(mode):
+        raise FileExistsError(f"{path} já existe e não é um socket Unix; escolha outro --socket")
+    os.unlink(path)
+
+
+if hasattr(socketserver, 'UnixStreamServer'):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+
+        def __init__(self, path: str, service: CensorService):
+            _remove_socket(path)
+            super().__init__(path, _Handler)
+            self.service = service
+
+        def get_request(self):
+            request, _ = super().get_request()
+            # O BaseHTTPRequestHandler espera um endereço (host, porta)
+            return request, ("unix", 0)
+
+
+def make_server(service: CensorService, host: str = "127.0.0.1", port: int = DEFAULT_PORT,
+                socket_path: Optional[str] = None):
+    """Cria o servidor HTTP (TCP em host:port, ou no socket Unix `socket_path`)."""
+    if socket_path:
+        if not hasattr(socketserver, 'UnixStreamServer'):
+            raise RuntimeError("Socket Unix não é suportado neste sistema; use --porta")
+        return _UnixHTTPServer(socket_path, service)
+    return _HTTPServer((host, port), service)
+
+
+def serve(
+    service: CensorService,
+    host: str = "127.0.0.1",
+    port: int = DEFAULT_PORT,
+    socket_path: Optional[str] = None,
+    drain_timeout: float = 30.0,
+) -> None:
+    """
+    Atende até receber SIGTERM/SIGINT; então drena as requisições em andamento e encerra.
+    O modelo é carregado em segundo plano (/healthz responde antes de /readyz).
+    """
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or f"http://{host}:{server.server_address[1]}"
+    stop = threading.Event()
+
+    def shutdown(signum, frame):
+        if stop.is_set():
+            return
+        stop.set()
+        print(f"\nSinal {signum} recebido: drenando {service.pending} documento(s) em andamento...")
+        # shutdown() bloqueia até o loop parar, então roda fora do handler do sinal
+        threading.Thread(target=_drain_and_stop, args=(service, server, drain_timeout), daemon=True).start()
+
+    previous = {sig: signal.signal(sig, shutdown) for sig in (signal.SIGINT, signal.SIGTERM)}
+    service.load_in_background()
+    print(f"Servidor ouvindo em {where} (modelo carregando em segundo plano)")
+    try:
+        server.serve_forever(poll_interval=0.2)
+    finally:
+        for sig, handler in previous.items():
+            signal.signal(sig, handler)
+        server.server_close()
+        if socket_path:
+            _remove_socket(socket_path)
+        service.extractor.close()
+        print(f"Servidor encerrado: {service.status()}")
+
+
+def _drain_and_stop(service: CensorService, server, timeout: float) -> None:
+    if not service.drain(timeout):
+        print(f"[x] Prazo de drenagem esgotado com {service.pending} documento(s) em andamento")
+    server.shutdown()
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class CensorClient:
+    """Cliente do modo servidor (o CLI com --servidor vira só um cliente fino)."""
+
+    def __init__(self, url: str, timeout: float = 300.0):
+        """
+        Args:
+            url (str): http://host:porta ou unix:/caminho/do/socket
+            timeout (float): Tempo limite de cada requisição, em segundos
+        """
+        self.url = url
+        self.timeout = timeout
+
+    def _connection(self) -> http.client.HTTPConnection:
+        if self.url.startswith('unix:'):
+            return _UnixHTTPConnection(self.url[len('unix:'):], self.timeout)
+        parsed = urlparse(self.url if '//' in self.url else f"http://{self.url}")
+        return http.client.HTTPConnection(parsed.hostname, parsed.port or DEFAULT_PORT, timeout=self.timeout)
+
+    def _request(self, method: str, path: str, body: Optional[bytes] = None):
+        connection = self._connection()
+        try:
+            headers = {'Content-Type': 'application/octet-stream'} if body is not None else {}
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read() or b'{}')
+        finally:
+            connection.close()
+
+    def health(self) -> bool:
+        try:
+            return self._request('GET', '/healthz')[0] == 200
+        except OSError:
+            return False
+
+    def ready(self) -> bool:
+        try:
+            return self._request('GET', '/readyz')[0] == 200
+        except OSError:
+            return False
+
+    def wait_ready(self, timeout: float = 300.0, interval: float = 0.5) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.ready():
+                return True
+            time.sleep(interval)
+        return False
+
+    def censor(self, path: str, confidence_threshold: Optional[float] = None,
+               output_dir: Optional[str] = "censored_images", retries: int = 3) -> Dict:
+        """
+        Envia um arquivo ao servidor e devolve o resumo (mesmo formato do modo em lote).
+        A imagem censurada volta na resposta e é gravada localmente em `output_dir`.
+
+        Falhas de transporte (conexão recusada ou derrubada, resposta truncada) são
+        tentadas de novo como a fila cheia (503) e, se persistirem, viram o resultado
+        de erro do documento: um arquivo com problema não derruba os demais.
+
+        Returns:
+            dict: Resumo do documento, ou {'image_path', 'error'} se falhou
+        """
+        params = {'nome': os.path.basename(path)}
+        if confidence_threshold is not None:
+            params['confianca'] = confidence_threshold
+        if output_dir is not None:
+            params['imagem'] = os.path.splitext(path)[1] or '.png'
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            return {'image_path': path, 'error': str(e)}
+
+        for attempt in range(retries + 1):
+            try:
+                status, payload = self._request('POST', f"/censurar?{urlencode(params)}", content)
+            except (OSError, http.client.HTTPException, ValueError) as e:
+                # RemoteDisconnected, ConnectionResetError, timeout, JSON truncado...
+                status, payload = None, {'error': f"falha de conexão com {self.url}: {type(e).__name__}: {e}"}
+            if status not in (None, 503) or attempt == retries:
+                break
+            time.sleep(0.5 * 2 ** attempt)  # fila cheia ou conexão caiu: espera e tenta de novo
+        if status != 200:
+            return {'image_path': path, 'error': payload.get('error', f"HTTP {status}")}
+
+        payload['image_path'] = path
+        encoded = payload.pop('redacted_image', None)
+        payload['output_path'] = None
+        if encoded is not None:
+            # Mesmo nome do modo local (text_censor.save_censored_image)
+            os.makedirs(output_dir, exist_ok=True)
+            payload['output_path'] = os.path.join(output_dir, f"censored_{os.path.basename(path)}")
+            with instrumentation.span('gravacao'), open(payload['output_path'], 'wb') as f:
+                f.write(base64.b64decode(encoded))
+        return payload
+
+    def censor_many(self, paths: Iterable[str], workers: int = 8, **options) -> Iterator[Dict]:
+        """
+        Envia vários arquivos em paralelo (o servidor junta os simultâneos em lotes),
+        devolvendo os resultados na ordem de entrada, com no máximo 2x `workers` em andamento.
+        """
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            pending = []
+            for path in paths:
+                pending.append(executor.submit(self.censor, path, **options))
+                if len(pending) >= 2 * workers:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
@@ -0,0 +1,253 @@
+"""
+Gerador de documentos brasileiros sintéticos, com gabarito, para benchmarks.
+
+Cada documento é desenhado com o OpenCV: um cabeçalho, campos não sensíveis
+(nome, cidade, órgão) e campos sensíveis com valores falsos porém válidos
+(CPF com dígitos verificadores corretos, datas existentes, placas antigas e
+Mercosul, telefones). Há também campos não sensíveis parecidos com os sensíveis
+(número de endereço, ano, registro com dígitos verificadores errados, data
+impossível), que a censura não pode pegar: são eles que medem a precisão. O gabarito traz, para cada campo, a categoria esperada
+do `sensitive_matcher`, o texto e a caixa [x0, y0, x1, y1] na imagem.
+
+As variações cobrem o que muda o custo e a qualidade do OCR: resolução
+(escala), baixo contraste, ruído e desfoque. A mesma semente gera sempre os
+mesmos documentos.
+
+Exemplo:
+    python -m ia_m_uv.algoritmos.synthetic_docs --saida ./sinteticos --quantidade 50
+"""
+
+import argparse
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+from .jsonl_sink import JSONLSink
+
+GROUND_TRUTH_FILE = "ground_truth.jsonl"
+
+# Largura da página na escala 1.0 (a altura acompanha a proporção A4)
+BASE_WIDTH = 1000
+
+FIRST_NAMES = ["ANA", "JOAO", "MARIA", "PEDRO", "LUCAS", "JULIANA", "CARLOS", "FERNANDA", "RAFAEL", "BEATRIZ"]
+LAST_NAMES = ["SILVA", "SOUZA", "OLIVEIRA", "SANTOS", "PEREIRA", "LIMA", "COSTA", "RIBEIRO", "ALMEIDA", "CARVALHO"]
+CITIES = ["SAO PAULO", "PORTO ALEGRE", "RECIFE", "CURITIBA", "BELO HORIZONTE", "SALVADOR", "MANAUS", "BELEM"]
+ISSUERS = ["SSP/SP", "SSP/RS", "DETRAN/PR", "SDS/PE", "PC/MG"]
+STREETS = ["DAS FLORES", "XV DE NOVEMBRO", "SETE DE SETEMBRO", "DOS ANDRADAS", "DA PRAIA", "SAO JOSE"]
+
+# Variações percorridas em ordem pelos documentos gerados
+DEFAULT_VARIANTS = [
+    {'scale': 1.0, 'low_contrast': False, 'noise': 0.0, 'blur': False},
+    {'scale': 1.5, 'low_contrast': False, 'noise': 6.0, 'blur': False},
+    {'scale': 1.0, 'low_contrast': True, 'noise': 0.0, 'blur': False},
+    {'scale': 2.0, 'low_contrast': False, 'noise': 12.0, 'blur': True},
+    {'scale': 0.75, 'low_contrast': True, 'noise': 8.0, 'blur': False},
+]
+
+
+@dataclass
+class GroundTruthField:
+    category: Optional[str]  # categoria do sensitive_matcher (None = não sensível)
+    text: str
+    bbox: List[int]          # [x0, y0, x1, y1]
+
+    @property
+    def sensitive(self) -> bool:
+        return self.category is not None
+
+
+@dataclass
+class SyntheticDocument:
+    image: np.ndarray
+    fields: List[GroundTruthField]
+    variant: Dict = field(default_factory=dict)
+    name: str = ""
+
+    @property
+    def sensitive_fields(self) -> List[GroundTruthField]:
+        return [f for f in self.fields if f.sensitive]
+
+    def ground_truth(self) -> Dict:
+        """Gabarito serializável (uma linha do ground_truth.jsonl)."""
+        return {
+            'image': self.name,
+            'height': int(self.image.shape[0]),
+            'width': int(self.image.shape[1]),
+            'variant': self.variant,
+            'fields': [asdict(f) for f in self.fields],
+        }
+
+
+def random_cpf(rng: np.random.Generator) -> str:
+    """CPF com dígitos verificadores válidos, formatado (000.000.000-00)."""
+    digits = [int(d) for d in rng.integers(0, 10, 9)]
+    if len(set(digits)) == 1:
+        digits[0] = (digits[0] + 1) % 10
+    for size in (9, 10):
+        total = sum(d * w for d, w in zip(digits, range(size + 1, 1, -1)))
+        digits.append(0 if total % 11 < 2 else 11 - total % 11)
+    s = ''.join(map(str, digits))
+    return f"{s[:3]}.{s[3:6]}.{s[6:9]}-{s[9:]}"
+
+
+def random_date(rng: np.random.Generator) -> str:
+    day, month, year = int(rng.integers(1, 29)), int(rng.integers(1, 13)), int(rng.integers(1940, 2010))
+    return f"{day:02d}/{month:02d}/{year}"
+
+
+def random_plate(rng: np.random.Generator) -> str:
+    """Placa antiga (ABC-1234) ou Mercosul (ABC1D23)."""
+    letters = ''.join(chr(65 + int(i)) for i in rng.integers(0, 26, 3))
+    if rng.random() < 0.5:
+        return f"{letters}-{int(rng.integers(0, 10000)):04d}"
+    return f"{letters}{int(rng.integers(0, 10))}{chr(65 + int(rng.integers(0, 26)))}{int(rng.integers(0, 100)):02d}"
+
+
+def invalid_cpf(rng: np.random.Generator) -> str:
+    """Número no formato do CPF, mas com o último dígito verificador errado."""
+    cpf = random_cpf(rng)
+    return f"{cpf[:-1]}{(int(cpf[-1]) + 1 + int(rng.integers(0, 9))) % 10}"
+
+
+def impossible_date(rng: np.random.Generator) -> str:
+    """Data no formato dd/mm/aaaa que não existe (31 de um mês de 30 dias, ou 30/02)."""
+    month = int(rng.choice([2, 4, 6, 9, 11]))
+    return f"{30 if month == 2 else 31}/{month:02d}/{int(rng.integers(2020, 2040))}"
+
+
+def random_phone(rng: np.random.Generator) -> str:
+    return f"({int(rng.integers(11, 100))}) 9{int(rng.integers(1000, 10000))}-{int(rng.integers(0, 10000)):04d}"
+
+
+def random_name(rng: np.random.Generator) -> str:
+    return f"{FIRST_NAMES[int(rng.integers(len(FIRST_NAMES)))]} {LAST_NAMES[int(rng.integers(len(LAST_NAMES)))]}"
+
+
+def render_document(
+    rng: np.random.Generator,
+    scale: float = 1.0,
+    low_contrast: bool = False,
+    noise: float = 0.0,
+    blur: bool = False,
+) -> SyntheticDocument:
+    """
+    Desenha um documento sintético em tons de cinza.
+
+    Args:
+        rng (np.random.Generator): Gerador (define os valores dos campos)
+        scale (float): Escala da página e do texto (1.0 = 1000 px de largura)
+        low_contrast (bool): Texto cinza sobre fundo cinza claro
+        noise (float): Desvio padrão do ruído gaussiano (0 = sem ruído)
+        blur (bool): Aplica um desfoque leve, como numa digitalização ruim
+
+    Returns:
+        SyntheticDocument: Imagem e gabarito dos campos
+    """
+    width = int(BASE_WIDTH * scale)
+    height = int(width * 1.414)
+    background, ink = (185, 120) if low_contrast else (245, 25)
+    image = np.full((height, width), background, dtype=np.uint8)
+
+    font = cv2.FONT_HERSHEY_DUPLEX
+    font_scale = 0.9 * scale
+    thickness = max(1, round(2 * scale))
+    margin = int(60 * scale)
+    line_height = int(70 * scale)
+    fields: List[GroundTruthField] = []
+
+    def put(text, x, y, category=None, size=font_scale):
+        (w, h), baseline = cv2.getTextSize(text, font, size, thickness)
+        cv2.putText(image, text, (x, y), font, size, ink, thickness, cv2.LINE_AA)
+        fields.append(GroundTruthField(category, text, [x, y - h, x + w, y + baseline]))
+        return x + w
+
+    y = margin + line_height
+    put("REPUBLICA FEDERATIVA DO BRASIL", margin, y, size=font_scale * 1.1)
+    y += line_height
+    put("CARTEIRA DE IDENTIDADE", margin, y)
+    y += int(line_height * 1.5)
+
+    rows = [
+        ("NOME", random_name(rng), None),
+        ("CPF", random_cpf(rng), 'cpf'),
+        ("NASCIMENTO", random_date(rng), 'data'),
+        ("NATURALIDADE", CITIES[int(rng.integers(len(CITIES)))], None),
+        ("EXPEDICAO", random_date(rng), 'data'),
+        ("ORGAO", ISSUERS[int(rng.integers(len(ISSUERS)))], None),
+        ("PLACA", random_plate(rng), 'placa'),
+        ("TELEFONE", random_phone(rng), 'telefone'),
+        # Não sensíveis, mas parecidos com os campos acima (palavra de 3 letras + 4 dígitos,
+        # número com o formato do CPF, data com o formato certo)
+        ("ENDERECO", f"RUA {STREETS[int(rng.integers(len(STREETS)))]}, NUM {int(rng.integers(1000, 10000))}", None),
+        ("REFERENCIA", f"ANO {int(rng.integers(1990, 2030))}", None),
+        ("REGISTRO", invalid_cpf(rng), None),
+        ("VALIDADE", impossible_date(rng), None),
+    ]
+    for label, value, category in rows:
+        # O rótulo e o valor ficam separados, como nos campos de um formulário
+        x = put(f"{label}:", margin, y)
+        put(value, x + int(30 * scale), y, category)
+        y += line_height
+
+    if blur:
+        image = cv2.GaussianBlur(image, (3, 3), 0)
+    if noise > 0:
+        image = np.clip(image + rng.normal(0, noise, image.shape), 0, 255).astype(np.uint8)
+
+    variant = {'scale': scale, 'low_contrast': low_contrast, 'noise': noise, 'blur': blur}
+    return SyntheticDocument(image=image, fields=fields, variant=variant)
+
+
+def generate_documents(
+    count: int,
+    seed: int = 0,
+    variants: Sequence[Dict] = DEFAULT_VARIANTS,
+) -> Iterator[SyntheticDocument]:
+    """Gera `count` documentos, um de cada variação por vez, sempre iguais para a mesma semente."""
+    rng = np.random.default_rng(seed)
+    for index in range(count):
+        document = render_document(rng, **variants[index % len(variants)])
+        document.name = f"sintetico_{index:04d}.png"
+        yield document
+
+
+def write_dataset(output_dir: str, count: int, seed: int = 0, variants: Sequence[Dict] = DEFAULT_VARIANTS) -> str:
+    """
+    Grava os documentos (PNG) e o gabarito (ground_truth.jsonl) em `output_dir`.
+
+    Returns:
+        str: Caminho do gabarito
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    gt_path = os.path.join(output_dir, GROUND_TRUTH_FILE)
+    with JSONLSink(gt_path, flush_every=50) as sink:
+        for document in generate_documents(count, seed, variants):
+            cv2.imwrite(os.path.join(output_dir, document.name), document.image)
+            sink.write(document.ground_truth())
+    return gt_path
+
+
+def load_ground_truth(dataset_dir: str) -> List[Dict]:
+    """Lê o gabarito de um conjunto gravado por `write_dataset`."""
+    with open(os.path.join(dataset_dir, GROUND_TRUTH_FILE), encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Gera documentos sintéticos com gabarito")
+    parser.add_argument('--saida', required=True, help="Pasta de saída")
+    parser.add_argument('--quantidade', type=int, default=50, help="Número de documentos")
+    parser.add_argument('--semente', type=int, default=0, help="Semente (mesma semente = mesmos documentos)")
+    args = parser.parse_args()
+
+    gt_path = write_dataset(args.saida, args.quantidade, args.semente)
+    print(f"{args.quantidade} documento(s) gerado(s) em {args.saida} (gabarito: {gt_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
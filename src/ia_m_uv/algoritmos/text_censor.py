@@ -1,57 +1,136 @@
-import re
 import os
+from typing import List, Optional, Tuple
+
 import cv2
 import numpy as np
 
-def is_sensitive(text: str) -> bool:
+from . import instrumentation
+from .redaction import DEFAULT_STYLE, build_mask
+from .sensitive_matcher import SensitiveMatch, SensitiveMatcher, default_matcher
+
+CENSORED_TOKEN = '[CENSURADO]'
+
+
+def is_sensitive(text: str, matcher: SensitiveMatcher = None) -> bool:
     """
     Verifica se o texto corresponde a padrões sensíveis (CPF, datas, placas, etc.)
     """
-    patterns = [
-        r'\b\d{3}\.?\d{3}\.?\d{3}-?\d{2}\b',  # CPF
-        r'\b\d{2}/\d{2}/\d{4}\b',             # Data
-        r'\b[A-Z]{3}-?\d{4}\b',               # Placa
-    ]
-    return any(re.search(pattern, text) for pattern in patterns)
+    return (matcher or default_matcher()).is_sensitive(text)
+
+
+def _mask_text(text: str, ranges: List[Tuple[int, int]]) -> str:
+    """Troca os trechos [início, fim) do texto por '[CENSURADO]'."""
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    pieces, cursor = [], 0
+    for start, end in merged:
+        pieces.append(text[cursor:start])
+        pieces.append(CENSORED_TOKEN)
+        cursor = end
+    pieces.append(text[cursor:])
+    return ''.join(pieces)
+
+
+def sanitize_detections(results, matcher: SensitiveMatcher = None, extra_matches=()):
+    """
+    Procura dados sensíveis nas detecções e troca, no texto, só os trechos
+    ocupados por eles (a imagem não é tocada; ver redaction.build_mask).
+
+    Args:
+        results (list): Saída do EasyOCR: [(bbox, text, confidence), ...]
+        matcher (SensitiveMatcher): Detector a usar (padrão: o compartilhado)
+        extra_matches (list): Trechos encontrados por fora (ex: pelo Gemini) a censurar também
+
+    Returns:
+        tuple: (detecções sanitizadas, lista de SensitiveMatch)
+    """
+    with instrumentation.span('deteccao_sensivel'):
+        matches: List[SensitiveMatch] = (matcher or default_matcher()).match_detections(results)
+    matches.extend(extra_matches)
+    instrumentation.count('censuras', len(matches))
+
+    ranges_by_box = {}
+    for match in matches:
+        print(f"[!] Texto sensível detectado e censurado ({match.category}): {match.text}")
+        for region in match.regions:
+            ranges_by_box.setdefault(region.index, []).append((region.char_start, region.char_end))
+
+    sanitized = []
+    for index, (bbox, text, conf) in enumerate(results):
+        if index in ranges_by_box:
+            text = _mask_text(text, ranges_by_box[index])
+        sanitized.append((bbox, text, conf))
+    return sanitized, matches
+
+
+def redact_detections(results, image: np.ndarray, matcher: SensitiveMatcher = None, extra_matches=(),
+                      style: str = DEFAULT_STYLE):
+    """
+    Procura dados sensíveis nas detecções e cobre, na imagem, só a parte de
+    cada caixa ocupada por eles.
+
+    Args:
+        results (list): Saída do EasyOCR: [(bbox, text, confidence), ...]
+        image (np.ndarray): Imagem onde a censura é aplicada (alterada no lugar)
+        matcher (SensitiveMatcher): Detector a usar (padrão: o compartilhado)
+        extra_matches (list): Trechos encontrados por fora (ex: pelo Gemini) a censurar também
+        style (str): Estilo da censura: 'fill', 'pixelate' ou 'blur' (ver redaction)
+
+    Returns:
+        tuple: (detecções sanitizadas, lista de SensitiveMatch)
+    """
+    sanitized, matches = sanitize_detections(results, matcher, extra_matches)
+    # Todas as sub-regiões numa única máscara, aplicada de uma vez
+    if matches:
+        with instrumentation.span('censura'):
+            build_mask(image.shape, matches).apply(image, style)
+    return sanitized, matches
 
 
-def censor_sensitive_data(results, image: np.ndarray, original_image_path: str = None):
+def censor_sensitive_data(
+    results,
+    image: np.ndarray,
+    original_image_path: str = None,
+    matcher: SensitiveMatcher = None,
+    output_dir: Optional[str] = "censored_images",
+):
     """
     Recebe resultados do EasyOCR e censura visualmente textos sensíveis na imagem.
 
     Args:
         results (list): Saída do EasyOCR: [(bbox, text, confidence), ...]
         image (np.ndarray): Imagem já carregada
-        original_image_path (str): Caminho original da imagem, para nomear saída
-        save (bool): Se True, salva imagem censurada
+        original_image_path (str): Caminho original da imagem, para nomear saída (se informado, salva a imagem censurada)
+        matcher (SensitiveMatcher): Detector a usar (padrão: o compartilhado)
+        output_dir (str): Pasta da imagem censurada (None não grava; a imagem é censurada no próprio array)
 
     Returns:
-        list: Novos resultados, com textos sensíveis substituídos por '[CENSURADO]'
+        list: Novos resultados, com os trechos sensíveis substituídos por '[CENSURADO]'
     """
-    sanitized = []
-    
-    for (bbox, text, conf) in results:
-        if is_sensitive(text):
-            print(f"[!] Texto sensível detectado e censurado: {text}")
-
-            # Desenhar retângulo preto no bbox
-            pts = [tuple(map(int, point)) for point in bbox]
-            top_left = min(pts, key=lambda p: p[0] + p[1])
-            bottom_right = max(pts, key=lambda p: p[0] + p[1])
-            cv2.rectangle(image, top_left, bottom_right, (0, 0, 0), -1)
-
-            # Substitui o texto no resultado
-            sanitized.append((bbox, '[CENSURADO]', conf))
-        else:
-            sanitized.append((bbox, text, conf))
+    sanitized, _ = redact_detections(results, image, matcher)
 
     # Salvar imagem censurada
-    if original_image_path:
-        output_dir = "censored_images"
-        os.makedirs(output_dir, exist_ok=True)
-        filename = os.path.basename(original_image_path)
-        output_path = os.path.join(output_dir, f"censored_{filename}")
-        cv2.imwrite(output_path, image)
-        print(f"[✔] Imagem censurada salva em: {output_path}")
+    if original_image_path and output_dir is not None:
+        save_censored_image(image, original_image_path, output_dir)
+
+    return sanitized
 
-    return sanitized
\ No newline at end of file
+
+def save_censored_image(image: np.ndarray, original_image_path: str, output_dir: str = "censored_images") -> str:
+    """
+    Salva a imagem censurada como `<output_dir>/censored_<nome original>`.
+
+    Returns:
+        str: Caminho do arquivo salvo
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    filename = os.path.basename(original_image_path)
+    output_path = os.path.join(output_dir, f"censored_{filename}")
+    with instrumentation.span('gravacao'):
+        cv2.imwrite(output_path, image)
+    print(f"[✔] Imagem censurada salva em: {output_path}")
+    return output_path
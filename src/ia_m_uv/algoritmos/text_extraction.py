@@ -4,32 +4,169 @@ Extrai texto de imagens usando EasyOCR (CNN + CRNN)
 Funciona MUITO melhor para português que TrOCR!
 """
 
-import easyocr
 import cv2
 import numpy as np
 # from PIL import Image
 import os
-from .text_censor import censor_sensitive_data
+import threading
+from . import instrumentation
+from .batch import list_images
+from .cpu_inference import NULL_CONTEXT, configure_threads, inference_context, mode_options
+from .document import DocumentResult
+from .image_io import decode_source, is_source
+from .image_quality import QualityThresholds, estimate_quality, needs_preprocessing
+from .multipage import DEFAULT_DPI, MultipageWriter, iter_pages, page_name, redacted_output_path
+from .ocr_cache import OCRCache
+from .ocr_registry import get_reader, model_version
+from .redaction import DEFAULT_STYLE
+
+# Configuração do leitor usado pela sonda de qualidade por OCR (should_preprocess),
+# hoje usada apenas como referência para calibrar o estimador de image_quality.
+# O limiar 0.56 foi ajustado com esse leitor.
+PROBE_LANGUAGES = ['pt']
+PROBE_GPU = False
 
 class EasyOCRExtractor:
-    def __init__(self, languages=None, use_gpu=None):
+    def __init__(self, languages=None, use_gpu=None, quality_thresholds=None, cache=None, lazy=False,
+                 ocr_batch_size=None, ocr_max_wait=0.05, region_ocr=False, detect_max_side=1600,
+                 cpu_mode=None, threads=None, interop_threads=None, redaction_style=DEFAULT_STYLE, **reader_options):
         """
         Inicializa o extrator EasyOCR com valores padrão que podem ser sobrescritos
         
         Args:
             languages (list): Lista de idiomas ['pt', 'en']
             use_gpu (bool): Usar GPU se disponível (NVIDIA)
+            quality_thresholds (QualityThresholds | str): Limiares do estimador de qualidade,
+                                                          ou caminho do JSON gerado pela calibração
+            cache (OCRCache | str): Cache persistente das detecções, ou caminho do arquivo SQLite
+            lazy (bool): Adia o carregamento do modelo até o primeiro OCR (útil com cache)
+            ocr_batch_size (int): Se definido, chamadas concorrentes de OCR são juntadas em lotes
+                                  de até N páginas (ver batched_ocr); None roda uma imagem por vez
+            ocr_max_wait (float): Espera máxima, em segundos, para encher um lote de OCR
+            region_ocr (bool): Imagens maiores que `detect_max_side` têm a detecção feita numa cópia
+                               reduzida (em blocos, se muito grandes) e o reconhecimento só nos
+                               recortes das caixas, em resolução original (ver roi_ocr)
+            detect_max_side (int): Maior lado entregue ao detector no modo por regiões
+            cpu_mode (str): Modo de desempenho em CPU: 'padrao' (redes do EasyOCR como vêm) ou
+                            'fp32' (sem a quantização do EasyOCR), com threads fixas e
+                            inference_mode (ver cpu_inference); None não mexe em nada
+            threads (int): Threads intra-op do torch (padrão: as do processo)
+            interop_threads (int): Threads inter-op do torch (no modo de CPU, padrão: 1)
+            redaction_style (str): Censura da imagem: 'fill', 'pixelate', 'blur' ou 'mask'
+                                   (a saída é só a máscara; ver redaction)
+            **reader_options: Opções extras do `easyocr.Reader` (fazem parte da chave do registro)
         
         """
         # Valores padrão
         self.languages = languages or ['pt', 'en']
         self.use_gpu = use_gpu if use_gpu is not None else False
+        if cpu_mode is not None and self.use_gpu:
+            print(f"Modo de CPU '{cpu_mode}' ignorado: o OCR está configurado para GPU")
+            cpu_mode = None
+        if cpu_mode is not None:
+            reader_options = dict(reader_options, **mode_options(cpu_mode))
+        self.reader_options = reader_options
+        self.cpu_mode = cpu_mode
+        self.redaction_style = redaction_style
+        # Threads definidas na primeira carga do leitor (o torch só é importado ali)
+        self._threads = (threads, interop_threads) if cpu_mode is not None or threads or interop_threads else None
+        if isinstance(quality_thresholds, str):
+            quality_thresholds = QualityThresholds.load(quality_thresholds)
+        self.quality_thresholds = quality_thresholds or QualityThresholds()
+        if isinstance(cache, str):
+            cache = OCRCache(cache)
+        self.cache = cache
+        self.model_version = model_version(self.languages, self.use_gpu, **self.reader_options)
+        self.ocr_batch_size = ocr_batch_size
+        self.region_ocr = region_ocr
+        self.detect_max_side = detect_max_side
+        self._region_reader = None
+        if region_ocr:
+            # O modo por regiões muda as detecções: não pode reaproveitar o cache do modo normal
+            self.model_version = f"{self.model_version}+regioes{detect_max_side}"
+        self.ocr_max_wait = ocr_max_wait
+        self._batched_reader = None
+        self._micro_batcher = None
+        self._batch_lock = threading.Lock()
         
-        print("Carregando EasyOCR... (primeira vez demora ~30s)")
-        
-        self.reader = easyocr.Reader(self.languages, gpu=self.use_gpu)
-        
-        print(f"EasyOCR carregado! Idiomas: {languages}")
+        if not lazy:
+            self.warm_up()
+    
+    @property
+    def reader(self):
+        """Leitor do registro do processo: só é carregado na primeira vez."""
+        if self._threads is not None:
+            threads, self._threads = self._threads, None
+            print("Threads do torch: {threads} intra-op, {interop_threads} inter-op".format(**configure_threads(*threads)))
+        return get_reader(self.languages, gpu=self.use_gpu, **self.reader_options)
+    
+    @property
+    def batched_reader(self):
+        """Leitor em lotes (detecção e reconhecimento dirigidos separadamente), criado na primeira vez."""
+        with self._batch_lock:
+            if self._batched_reader is None:
+                from .batched_ocr import BatchedReader
+                self._batched_reader = BatchedReader(self.reader, batch_size=max(32, self.ocr_batch_size or 0))
+            return self._batched_reader
+    
+    @property
+    def region_reader(self):
+        """Leitor por regiões (detecção reduzida, reconhecimento em resolução original), criado na primeira vez."""
+        with self._batch_lock:
+            if self._region_reader is None:
+                from .roi_ocr import RegionReader
+                self._region_reader = RegionReader(self.reader, detect_max_side=self.detect_max_side)
+            return self._region_reader
+    
+    def _is_large(self, image):
+        return self.region_ocr and max(image.shape[:2]) > self.detect_max_side
+    
+    def _inference(self):
+        """Contexto da inferência: `torch.inference_mode()` no modo de CPU, nada fora dele."""
+        return inference_context() if self.cpu_mode is not None else NULL_CONTEXT
+    
+    def _readtext(self, image):
+        if self._is_large(image):
+            return self.region_reader.readtext(image)
+        if not self.ocr_batch_size:
+            return self.reader.readtext(image)
+        with self._batch_lock:
+            if self._micro_batcher is None:
+                from .batched_ocr import MicroBatcher
+                self._micro_batcher = MicroBatcher(self.readtext_many, self.ocr_batch_size, self.ocr_max_wait)
+        return self._micro_batcher(image)
+    
+    def readtext_many(self, images):
+        """OCR de várias imagens em tons de cinza de uma vez; mesmo resultado de `readtext` em cada uma."""
+        if not images:
+            return []
+        # Também roda na thread do MicroBatcher: o inference_mode vale por thread
+        with self._inference():
+            large = [i for i, image in enumerate(images) if self._is_large(image)]
+            if not large:
+                return self.batched_reader.readtext_many(images)
+            
+            results = [None] * len(images)
+            for i, detections in zip(large, self.region_reader.readtext_many([images[i] for i in large])):
+                results[i] = detections
+            small = [i for i in range(len(images)) if results[i] is None]
+            for i, detections in zip(small, self.batched_reader.readtext_many([images[i] for i in small])):
+                results[i] = detections
+            return results
+    
+    def close(self):
+        """Encerra a thread do OCR em lotes (se foi criada)."""
+        if self._micro_batcher is not None:
+            self._micro_batcher.close()
+            self._micro_batcher = None
+    
+    def warm_up(self, include_probe=False):
+        """Garante que os leitores usados pelo extrator já estão carregados."""
+        self.reader  # carrega (ou reaproveita) o leitor do registro
+        print(f"EasyOCR carregado! Idiomas: {self.languages}")
+        if include_probe:
+            get_reader(PROBE_LANGUAGES, gpu=PROBE_GPU)
+        return self
     
     def create_default_extractor():
         """Função fábrica que retorna um extrator com configurações padrão"""
@@ -38,23 +175,310 @@ class EasyOCRExtractor:
     def extract_text_raw(self, image_path=None, confidence_threshold=None):
         """
         Extrai texto bruto da imagem, sem censura.
+        `image_path` aceita qualquer fonte de image_io (caminho, np.ndarray, bytes, mmap...).
+        """
+        return self.process(image_path, confidence_threshold).raw_text
+    
+    def process(self, image_path=None, confidence_threshold=None):
+        """
+        Roda o OCR uma única vez e devolve um DocumentResult, do qual texto bruto,
+        texto censurado, trechos sensíveis e imagem censurada são derivados.
+        
+        Args:
+            image_path: Caminho da imagem, ou a imagem em memória (np.ndarray decodificado,
+                        bytes/memoryview/mmap codificados, ou (nome, conteúdo); ver image_io)
+            confidence_threshold (float): Confiança mínima (0.0 a 1.0)
+            
+        Returns:
+            DocumentResult: Detecções do documento e saídas derivadas
+                            (a imagem censurada sai como array ou bytes: redacted_image / redacted_bytes)
+        """
+        confidence_threshold = confidence_threshold if confidence_threshold is not None else 0.5
+        image_path, img, processed_image, preprocessed = self.prepare(image_path)
+        
+        # Cada resultado: ([coordenadas], texto, confiança)
+        results = self.read_detections(processed_image, img, preprocessed)
+        
+        return DocumentResult(
+            results,
+            processed_image,
+            confidence_threshold=confidence_threshold,
+            image_path=image_path,
+            preprocessed=preprocessed,
+            redaction_style=self.redaction_style,
+        )
+    
+    def prepare(self, source):
+        """
+        Etapa anterior ao OCR: decodifica a imagem (uma única leitura do disco),
+        estima a qualidade e pré-processa se necessário.
+        
+        Args:
+            source: Caminho, imagem em memória ou (nome, conteúdo); ver image_io.decode_source
+        
+        Returns:
+            tuple: (nome da fonte, imagem original, imagem que vai para o OCR, se foi pré-processada)
+        """
+        image_path, img = decode_source(source)
+        instrumentation.count('documentos')
+        
+        # A decisão de pré-processar vem do estimador barato de qualidade,
+        # então o OCR roda uma única vez, já na imagem final
+        with instrumentation.span('qualidade'):
+            metrics = estimate_quality(img)
+            preprocessed = needs_preprocessing(metrics, self.quality_thresholds)
+        if not preprocessed:
+            print("Imagem considerada BOA — não será pré-processada.")
+            return image_path, img, img, False
+        print("Imagem considerada RUIM — será pré-processada se detectado alterações possíveis.")
+        with instrumentation.span('preprocessamento'):
+            processed = self.preprocess_image(image_path, img, metrics)
+        return image_path, img, processed, True
+    
+    def iter_extract(self, sources, confidence_threshold=None, max_in_flight=8, save=True,
+                     output_dir="censored_images", ordered=True, **stage_options):
+        """
+        Processa uma sequência (possivelmente enorme) de documentos e devolve cada
+        resultado assim que fica pronto, sem acumular nada em memória.
+        
+        As fontes são consumidas aos poucos: no máximo `max_in_flight` documentos
+        ficam entre a leitura e a entrega, e as imagens decodificadas são liberadas
+        ao fim de cada documento (o resultado não guarda imagens).
+        
+        Args:
+            sources (iterable): Caminhos, imagens em memória ou pares (nome, conteúdo); pode ser um gerador
+            confidence_threshold (float): Confiança mínima (0.0 a 1.0)
+            max_in_flight (int): Máximo de documentos em processamento ao mesmo tempo
+            save (bool): Grava a imagem censurada dos documentos que têm nome
+            output_dir (str): Pasta das imagens censuradas
+            ordered (bool): True devolve na ordem de entrada; False, conforme terminam
+            **stage_options: Threads e filas dos estágios (ver pipeline.document_pipeline)
+        
+        Yields:
+            dict: Resumo de cada documento (DocumentResult.to_dict() mais 'output_path'),
+                  ou {'image_path', 'stage', 'error'} se o documento falhou
+        """
+        from .pipeline import document_pipeline
+        
+        if is_source(sources):
+            sources = [sources]
+        stage_options.setdefault('queue_size', max(1, max_in_flight // 4))
+        pipeline = document_pipeline(
+            self,
+            confidence_threshold=confidence_threshold,
+            save=save,
+            output_dir=output_dir,
+            ordered=ordered,
+            max_in_flight=max_in_flight,
+            **stage_options,
+        )
+        yield from pipeline.run(sources)
+    
+    def iter_extract_pages(self, path, output_path=None, dpi=DEFAULT_DPI, confidence_threshold=None,
+                           max_in_flight=4, **stage_options):
+        """
+        Processa um documento de várias páginas (PDF ou TIFF) página a página e grava
+        a versão censurada incrementalmente, no mesmo formato (ou no de `output_path`).
+        
+        As páginas são decodificadas/rasterizadas sob demanda e passam pelo mesmo
+        OCR e censura das imagens avulsas; no máximo `max_in_flight` páginas ficam
+        em memória ao mesmo tempo, qualquer que seja o tamanho do arquivo.
+        
+        Args:
+            path (str): Arquivo .pdf, .tif ou .tiff (PDF exige o PyMuPDF; ver multipage)
+            output_path (str): Arquivo censurado (padrão: censored_images/censored_<nome>)
+            dpi (int): Resolução da rasterização do PDF e da saída
+            confidence_threshold (float): Confiança mínima (0.0 a 1.0)
+            max_in_flight (int): Máximo de páginas em processamento ao mesmo tempo
+            **stage_options: Threads e filas dos estágios (ver pipeline.document_pipeline)
+        
+        Yields:
+            dict: Resumo de cada página (como em iter_extract, com 'page' a partir de 1 e
+                  'source'), ou {'image_path', 'stage', 'error', ...} se a página falhou
+                  (a página sai toda em branco no arquivo censurado)
+        """
+        from .pipeline import document_pipeline
+        
+        output_path = output_path or redacted_output_path(path)
+        shapes = {}  # nome da página -> formato, para gravar em branco uma página que falhar
+        
+        def pages():
+            for index, image in iter_pages(path, dpi):
+                name = page_name(path, index)
+                shapes[name] = image.shape
+                yield name, image
+        
+        stage_options.setdefault('queue_size', max(1, max_in_flight // 4))
+        pipeline = document_pipeline(
+            self,
+            confidence_threshold=confidence_threshold,
+            save=False,
+            ordered=True,  # a saída precisa das páginas na ordem original
+            max_in_flight=max_in_flight,
+            keep_image=True,
+            **stage_options,
+        )
+        with MultipageWriter(output_path, dpi) as writer:
+            for number, result in enumerate(pipeline.run(pages()), start=1):
+                image = result.pop('redacted_image', None)
+                shape = shapes.pop(page_name(path, number - 1), None)
+                if image is None and shape is not None:
+                    # Uma página que falhou não vai para a saída sem censura: entra toda
+                    # em branco, para as páginas seguintes manterem a numeração original
+                    print(f"[x] Página {number} de {path} gravada em branco: {result.get('error')}")
+                    image = np.zeros(shape, dtype=np.uint8)
+                if image is None:
+                    # Nem chegou a ser lida (arquivo ilegível, PyMuPDF ausente...)
+                    print(f"[x] Página {number} de {path} não foi lida: {result.get('error')}")
+                    result.update(page=number, source=path)
+                    yield result
+                    continue
+                writer.write(image)
+                result.update(page=number, source=path, output_path=output_path)
+                yield result
+        if writer.pages:
+            print(f"{writer.pages} página(s) censurada(s) gravada(s) em {output_path}")
+
+    def extract_multipage(self, path, output_path=None, dpi=DEFAULT_DPI, confidence_threshold=None):
+        """
+        Processa um PDF/TIFF inteiro (ver iter_extract_pages) e resume o documento
+        no mesmo formato de `DocumentResult.to_dict()`, como no modo em lote.
+
+        Returns:
+            dict: Resumo do documento, com 'pages' e 'output_path'; com 'error' se
+                  alguma página falhou (ela sai em branco na saída censurada), ou
+                  {'image_path', 'error'} se o arquivo não pôde ser lido
+        """
+        summary = {
+            'image_path': path,
+            'preprocessed': False,
+            'raw_text': [],
+            'filtered_text': [],
+            'sensitive_count': 0,
+            'sensitive_categories': set(),
+            'detections': 0,
+            'low_confidence_ratio': 0.0,
+        }
+        failed, low = [], 0.0
+        for page in self.iter_extract_pages(path, output_path=output_path, dpi=dpi,
+                                            confidence_threshold=confidence_threshold):
+            summary['pages'] = page['page']
+            if 'output_path' in page:
+                summary['output_path'] = page['output_path']
+            if 'error' in page:
+                failed.append(page['page'])
+                error = page['error']
+                continue
+            header = f"[página {page['page']}]"
+            summary['raw_text'].append(f"{header}\n{page['raw_text']}")
+            summary['filtered_text'].append(f"{header}\n{page['filtered_text']}")
+            summary['preprocessed'] |= page['preprocessed']
+            summary['sensitive_count'] += page['sensitive_count']
+            summary['sensitive_categories'].update(page['sensitive_categories'])
+            summary['detections'] += page['detections']
+            low += page['low_confidence_ratio'] * page['detections']
+        if 'output_path' not in summary:
+            # Nenhuma página foi lida (arquivo ilegível, PyMuPDF ausente...): não há saída censurada
+            return {'image_path': path, 'error': error if failed else "documento sem páginas"}
+        summary['raw_text'] = "\n\n".join(summary['raw_text'])
+        summary['filtered_text'] = "\n\n".join(summary['filtered_text'])
+        summary['sensitive_categories'] = sorted(summary['sensitive_categories'])
+        if summary['detections']:
+            summary['low_confidence_ratio'] = low / summary['detections']
+        if failed:
+            summary['error'] = f"página(s) {', '.join(map(str, failed))} falharam: {error}"
+        return summary
+
+    def read_detections(self, image, original=None, preprocessed=False):
+        """
+        Roda o OCR, consultando antes o cache persistente (se configurado).
+        
+        Args:
+            image (np.ndarray): Imagem que vai para o OCR
+            original (np.ndarray): Imagem decodificada antes do pré-processamento (base da chave do cache)
+            preprocessed (bool): Decisão de pré-processamento (faz parte da chave)
+        
+        Returns:
+            list: [(bbox, text, confidence), ...]
+        """
+        if self.cache is None:
+            return self._timed_readtext(image)
+        
+        key = self.cache.make_key(original if original is not None else image, self.languages, preprocessed, self.model_version)
+        results = self.cache.get(key)
+        if results is None:
+            instrumentation.count('cache_ocr_faltas')
+            results = self._timed_readtext(image)
+            self.cache.put(key, results)
+        else:
+            instrumentation.count('cache_ocr_acertos')
+        return results
+    
+    def _timed_readtext(self, image):
+        with instrumentation.span('ocr'), self._inference():
+            results = self._readtext(image)
+        instrumentation.count('deteccoes', len(results))
+        return results
+    
+    def read_detections_many(self, images, originals=None, preprocessed=None):
+        """
+        Versão em lote de `read_detections`: as imagens que não estão no cache
+        passam juntas pelo OCR em lotes.
+        
+        Returns:
+            list: Para cada imagem, [(bbox, text, confidence), ...]
+        """
+        originals = originals or [None] * len(images)
+        preprocessed = preprocessed or [False] * len(images)
+        results = [None] * len(images)
+        keys = [None] * len(images)
+        if self.cache is not None:
+            for i, (image, original, flag) in enumerate(zip(images, originals, preprocessed)):
+                keys[i] = self.cache.make_key(original if original is not None else image, self.languages, flag, self.model_version)
+                results[i] = self.cache.get(keys[i])
+        
+        missing = [i for i, result in enumerate(results) if result is None]
+        if self.cache is not None:
+            instrumentation.count('cache_ocr_acertos', len(images) - len(missing))
+            instrumentation.count('cache_ocr_faltas', len(missing))
+        with instrumentation.span('ocr'):
+            detected = self.readtext_many([images[i] for i in missing])
+        for i, detections in zip(missing, detected):
+            instrumentation.count('deteccoes', len(detections))
+            results[i] = detections
+            if self.cache is not None:
+                self.cache.put(keys[i], detections)
+        return results
+    
+    def process_many(self, sources, confidence_threshold=None):
+        """
+        Como `process`, para várias fontes de uma vez, com o OCR em lotes.
+        Todas as imagens ficam em memória: para sequências longas, use `iter_extract`.
+        
+        Returns:
+            list: Um DocumentResult por fonte
         """
         confidence_threshold = confidence_threshold if confidence_threshold is not None else 0.5
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
-        results = self.reader.readtext(img)
-        filtered_texts = []
-        for (bbox, text, confidence) in results:
-            if confidence >= confidence_threshold:
-                filtered_texts.append(text)
-        return ' '.join(filtered_texts).strip()
+        prepared = [self.prepare(source) for source in sources]
+        detections = self.read_detections_many(
+            [image for (_, _, image, _) in prepared],
+            [original for (_, original, _, _) in prepared],
+            [flag for (_, _, _, flag) in prepared],
+        )
+        return [
+            DocumentResult(results, image, confidence_threshold=confidence_threshold,
+                           image_path=name, preprocessed=flag, redaction_style=self.redaction_style)
+            for (name, _, image, flag), results in zip(prepared, detections)
+        ]
     
-    def extract_text(self, image_path=None, confidence_threshold=None):
+    def extract_text(self, image_path=None, confidence_threshold=None, output_dir="censored_images"):
         """
         Extrai texto de uma imagem
         
         Args:
-            image_path (str): Caminho para a imagem
+            image_path: Caminho para a imagem, ou a imagem em memória (ver `process`)
             confidence_threshold (float): Confiança mínima (0.0 a 1.0)
+            output_dir (str): Pasta da imagem censurada (None não grava nada em disco)
             
         Returns:
             str: Texto extraído da imagem
@@ -62,33 +486,10 @@ class EasyOCRExtractor:
         """
         self.image_path = image_path
         self.confidence_threshold = confidence_threshold if confidence_threshold is not None else 0.5
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
         try:
-            # pré-processamento da imagem se detectar ruído:
-            if not self.should_preprocess(img):
-                print("Imagem considerada BOA — não será pré-processada.")
-                processed_image = img
-            else:
-                print("Imagem considerada RUIM — será pré-processada se detectado alterações possíveis.")
-                processed_image = self.preprocess_image(image_path)
-            
-            # EasyOCR processa a imagem e retorna lista de resultados
-            # Cada resultado: ([coordenadas], texto, confiança)
-            results = self.reader.readtext(processed_image)
-            
-            censurado = censor_sensitive_data(results, processed_image.copy(), image_path)
-            
-            # Filtra por confiança e extrai apenas o texto
-            filtered_texts = []
-            for (bbox, text, confidence) in censurado:
-                if confidence >= confidence_threshold:
-                    filtered_texts.append(text)
-                    
-            
-            # Junta todos os textos encontrados
-            final_text = ' '.join(filtered_texts)
-            
-            return final_text.strip()
+            document = self.process(image_path, self.confidence_threshold)
+            document.save_redacted(output_dir)
+            return document.filtered_text
             
         except Exception as e:
             return f"Erro ao processar imagem: {str(e)}"
@@ -115,9 +516,20 @@ class EasyOCRExtractor:
     #     except Exception as e:
     #         return [{'error': str(e)}]
     
-    def should_preprocess(self, img):
-        reader = easyocr.Reader(['pt'], gpu=False)
-        results = reader.readtext(img, detail=1, paragraph=False)
+    def should_preprocess(self, img, results=None):
+        """
+        Decide pelo OCR se a imagem precisa de pré-processamento.
+        É a heurística original (lenta); o pipeline usa `image_quality.estimate_quality`,
+        calibrado contra esta função por `quality_calibration.py`.
+        
+        Args:
+            img (np.ndarray): Imagem em tons de cinza
+            results (list): Detecções já calculadas para a imagem; se omitidas,
+                            roda a sonda com o leitor de PROBE_LANGUAGES
+        """
+        if results is None:
+            reader = get_reader(PROBE_LANGUAGES, gpu=PROBE_GPU)
+            results = reader.readtext(img, detail=1, paragraph=False)
 
         confidences = [conf for (_, _, conf) in results]  
 
@@ -126,36 +538,54 @@ class EasyOCRExtractor:
 
         return media < 0.56  # Ajustado com testes
     
-    def adjust_contrast_if_needed(self, img: np.ndarray) -> np.ndarray:
+    def adjust_contrast_if_needed(self, img: np.ndarray, std: float = None) -> np.ndarray:
         """Aumenta o contraste se a variação for muito baixa (lavadassa)."""
-        if np.std(img) < 20:
+        std = std if std is not None else np.std(img)
+        if std < 20:
             print("detectada imagem lavada, aumentando contraste...")
             return cv2.convertScaleAbs(img, alpha=1.5, beta=0)
         return img
 
-    def denoise_if_noisy(self, img: np.ndarray) -> np.ndarray:
+    def denoise_if_noisy(self, img: np.ndarray, std: float = None) -> np.ndarray:
         """Aplica blur leve se a variação for muito alta."""
-        if np.std(img) > 70:
+        std = std if std is not None else np.std(img)
+        if std > 70:
             print("detectada imagem ruidosa, aplicando desfoque...")
             return cv2.GaussianBlur(img, (3, 3), 0)
         return img
     
-    def preprocess_image(self, image_path):
+    def preprocess_image(self, image_path, img=None, metrics=None):
         """
         Pré-processamento adaptativo baseado na análise da imagem.
         Não aplica transformações destrutivas em imagens que já estão boas.
+        
+        Args:
+            image_path: Caminho da imagem (também nomeia a saída em processed_images/),
+                        ou a imagem em memória (ver image_io; sem nome, nada é gravado)
+            img (np.ndarray): Imagem já carregada em tons de cinza, evita reler o arquivo
+            metrics (QualityMetrics): Métricas já calculadas, evita recalcular o desvio padrão
         """
-        img = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if img is None:
+            image_path, img = decode_source(image_path)
+        elif not isinstance(image_path, (str, os.PathLike)):
+            image_path = image_path[0] if isinstance(image_path, tuple) else None
+        if metrics is None:
+            metrics = estimate_quality(img)
         
         # possível ideia de corrigir se ela tiver rotada em uns 90° mas foi-se umas 3 horas tentando fazer isso funcionar sem falso positivo,
         # quem sabe um dia. Por enquanto fica só comentado ai pra voltar na ideia depois
         # img = self.correct_rotation(img)
 
         # por alguns testes, agora ele só aplica esses role quando algum deles de fato melhora o resultado do easyocr, mas é bom testar mais dps
-        img = self.adjust_contrast_if_needed(img)
-        img = self.denoise_if_noisy(img)
+        # Se o contraste for aumentado o desvio fica < 30, longe do limiar de ruído,
+        # então o desvio original serve para as duas decisões
+        img = self.adjust_contrast_if_needed(img, metrics.contrast)
+        img = self.denoise_if_noisy(img, metrics.contrast)
 
         
+        if not image_path:
+            # Fonte em memória: não há nome para a cópia em disco
+            return img
         output_directory = "processed_images"
         os.makedirs(output_directory, exist_ok=True)
         output_filename = f"processed_{os.path.basename(image_path)}"
@@ -164,22 +594,16 @@ class EasyOCRExtractor:
         
         return img
     
-    # def extract_from_multiple_images(self, image_folder):
-    #     """
-    #     Processa todas as imagens de uma pasta
-    #     """
-    #     results = {}
-        
-    #     # Extensões de imagem suportadas
-    #     extensions = ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']
+    def extract_from_multiple_images(self, image_folder, confidence_threshold=None):
+        """
+        Processa todas as imagens de uma pasta, em sequência, neste processo.
+        Para usar vários núcleos, veja `batch.process_folder`.
+        """
+        results = {}
         
-    #     for filename in os.listdir(image_folder):
-    #         if any(filename.lower().endswith(ext) for ext in extensions):
-    #             image_path = os.path.join(image_folder, filename)
-    #             print(f"Processando: {filename}")
-    #             results[filename] = self.extract_text(image_path)
+        for image_path in list_images(image_folder):
+            filename = os.path.basename(image_path)
+            print(f"Processando: {filename}")
+            results[filename] = self.extract_text(image_path, confidence_threshold)
         
-    #     return results
-
-
-
+        return results
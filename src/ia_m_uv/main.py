@@ -1,8 +1,20 @@
+import itertools
+import json
 import sys
 
 from .utils import parse_args
 from .algoritmos.text_extraction import EasyOCRExtractor
-from .algoritmos.gemini_censor import gemini_censor_text
+from .algoritmos import instrumentation
+from .algoritmos.batch import list_documents, process_batch
+from .algoritmos.censor_policy import TieredCensor
+from .algoritmos.job_manifest import JobManifest, rules_version, settings_version
+from .algoritmos.jsonl_sink import JSONLSink
+from .algoritmos.multipage import is_multipage, page_count, redacted_output_path
+from .algoritmos.ocr_cache import OCRCache
+from .algoritmos.pipeline import document_pipeline
+from .algoritmos.server import CensorClient, CensorService, serve
+# O SDK do Gemini (google.generativeai) só é importado quando há --gemini-key
+from .algoritmos.gemini_errors import GeminiError
 
 """
   Exemplo de utilização:
@@ -14,45 +26,390 @@ from .algoritmos.gemini_censor import gemini_censor_text
 """
 
 
+def avaliar_documento(documento, args, politica):
+    """
+    Aplica a política em camadas: o Gemini só é chamado se as regras locais
+    deixarem o documento na faixa incerta (ou sempre, com --gemini-sempre).
+    `documento` pode ser um DocumentResult ou o dict do modo em lote.
+    """
+    texto = documento['raw_text'] if isinstance(documento, dict) else documento.gemini_input
+    alvo = None if isinstance(documento, dict) else documento
+    if args.gemini_sempre:
+        return interpretar_com_gemini(texto, args, alvo)
+
+    avaliacao = politica.assess_document(documento)
+    if not avaliacao.escalate:
+        return avaliacao.local_verdict()
+    resultado = interpretar_com_gemini(texto, args, alvo)
+    resultado.update(tier=avaliacao.tier, score=round(avaliacao.score, 3))
+    return resultado
+
+
+def interpretar_com_gemini(texto, args, documento=None):
+    """
+    Envia o texto ao Gemini no modo escolhido. No modo estruturado, os trechos
+    apontados pelo modelo também são censurados na imagem do documento.
+    """
+    from .algoritmos.gemini_censor import gemini_censor_structured, gemini_censor_text
+    
+    if not args.gemini_estruturado:
+        return gemini_censor_text(texto, args.gemini_key)
+    
+    veredito = gemini_censor_structured(texto, args.gemini_key)
+    if documento is not None and veredito.spans:
+        documento.add_external_spans(veredito.span_pairs())
+    return veredito.as_dict()
+
+
+def interpretar_lote_com_gemini(pendentes, args):
+    """
+    Envia ao Gemini, em poucas requisições, os documentos do modo em lote que
+    precisam de avaliação (vários documentos por prompt, um veredito por documento).
+
+    Args:
+        pendentes (list): [(resultado, avaliacao ou None), ...]
+    """
+    if not pendentes:
+        return
+    from .algoritmos.gemini_batch import GeminiBatcher
+    from .algoritmos.gemini_censor import get_shared_client
+    
+    batcher = GeminiBatcher(get_shared_client(args.gemini_key), max_batch_docs=args.gemini_lote)
+    vereditos = batcher.censor_many(
+        [resultado['raw_text'] for resultado, _ in pendentes],
+        ids=[f"d{i}" for i in range(len(pendentes))],
+    )
+    for (resultado, avaliacao), veredito in zip(pendentes, vereditos):
+        if isinstance(veredito, GeminiError):
+            print(f"[x] Gemini falhou para {resultado['image_path']}: {veredito}")
+            continue
+        interpretado = veredito.as_dict()
+        if avaliacao is not None:
+            interpretado.update(tier=avaliacao.tier, score=round(avaliacao.score, 3))
+        print(f"\n[{resultado['image_path']}] Resultado interpretado pelo Gemini:")
+        print(interpretado)
+    print(f"\nGemini em lote: {batcher.stats}")
+
+
+def abrir_manifesto(args, opcoes_ocr):
+    """Manifesto do modo --pasta, com as versões de regras e configuração desta execução."""
+    # Extrator só para calcular a versão do modelo: lazy, nada é carregado
+    referencia = EasyOCRExtractor(
+        languages=args.ocr_idiomas,
+        use_gpu=args.ocr_gpu,
+        quality_thresholds=args.qualidade_limiares,
+        lazy=True,
+        **opcoes_ocr
+    )
+    return JobManifest(args.manifesto, rules_version(), settings_version(referencia, args.ocr_confianca))
+
+
+def censurar_multipagina(extractor, caminho, args):
+    """PDF/TIFF da --pasta no modo em estágios; uma falha vira {'image_path', 'error'}, como no lote."""
+    try:
+        return extractor.extract_multipage(
+            caminho,
+            output_path=redacted_output_path(caminho, args.pasta_saida),
+            dpi=args.dpi,
+            confidence_threshold=args.ocr_confianca,
+        )
+    except Exception as e:
+        return {'image_path': caminho, 'error': str(e)}
+
+
+def servir(args, politica, opcoes_ocr):
+    """Modo servidor: o modelo (e o cliente do Gemini) ficam carregados entre os documentos."""
+    cache = OCRCache(args.ocr_cache, args.ocr_cache_max_mb * 1024 * 1024) if args.ocr_cache else None
+    extractor = EasyOCRExtractor(
+        languages=args.ocr_idiomas,
+        use_gpu=args.ocr_gpu,
+        quality_thresholds=args.qualidade_limiares,
+        cache=cache,
+        lazy=True,  # carregado em segundo plano pelo servidor (/readyz avisa quando terminar)
+        # Requisições simultâneas viram lotes do OCR
+        ocr_batch_size=args.ocr_lote or 8,
+        ocr_max_wait=args.ocr_espera_ms / 1000,
+        **opcoes_ocr
+    )
+    
+    avaliar = None
+    if args.gemini_key:
+        from .algoritmos.gemini_censor import get_shared_client
+        
+        # Importa o SDK e cria o cliente agora, e não na primeira requisição
+        get_shared_client(args.gemini_key)
+        
+        def avaliar(documento):
+            try:
+                return avaliar_documento(documento, args, politica)
+            except GeminiError as e:
+                # O documento sai censurado pelas regras locais, só sem o veredito do Gemini
+                return {'error': f"Gemini falhou: {e}"}
+    
+    service = CensorService(
+        extractor,
+        evaluate=avaliar,
+        confidence_threshold=args.ocr_confianca,
+        max_pending=args.max_pendentes,
+    )
+    serve(service, host=args.host, port=args.porta, socket_path=args.socket)
+    return 0
+
+
+def varias_paginas(caminho):
+    """Se o arquivo tem mais de uma página (o servidor só recebe imagens de uma página)."""
+    if not is_multipage(caminho):
+        return False
+    if caminho.lower().endswith('.pdf'):
+        return True
+    try:
+        return page_count(caminho) > 1
+    except Exception:
+        # Arquivo ilegível: o servidor devolve o erro do documento
+        return False
+
+
+def executar_como_cliente(args):
+    """Envia --imagem/--pasta ao servidor em execução e mostra os resultados (sem carregar modelos)."""
+    cliente = CensorClient(args.servidor)
+    if not cliente.wait_ready(timeout=120):
+        print(f"Erro: servidor {args.servidor} não está pronto")
+        return 1
+    
+    caminhos = [args.imagem] if args.imagem else list_documents(args.pasta)
+    # TIFF de uma página é uma imagem comum; só os de várias páginas ficam de fora
+    recusados = [caminho for caminho in caminhos if varias_paginas(caminho)]
+    resultados = itertools.chain(
+        (
+            {'image_path': caminho, 'error': "PDF/TIFF de várias páginas não é aceito pelo servidor; rode sem --servidor"}
+            for caminho in recusados
+        ),
+        cliente.censor_many([caminho for caminho in caminhos if caminho not in recusados],
+                            workers=args.workers or 8, confidence_threshold=args.ocr_confianca,
+                            output_dir=args.pasta_saida),
+    )
+    
+    saida = JSONLSink(args.saida_jsonl) if args.saida_jsonl else None
+    for resultado in resultados:
+        if saida is not None:
+            saida.write(resultado)
+        if 'error' in resultado:
+            print(f"[x] {resultado['image_path']}: {resultado['error']}")
+            continue
+        print(f"\n[{resultado['image_path']}]\n{resultado['filtered_text']}")
+        if 'veredito' in resultado:
+            print("Resultado interpretado:")
+            print(resultado['veredito'])
+    if saida is not None:
+        saida.close()
+        print(f"\n{saida.count} resultado(s) gravado(s) em {saida.path}")
+    return 0
+
+
+def exportar_metricas(metricas, args):
+    """Encerra o perfil (se ligado) e mostra/grava as métricas da execução."""
+    relatorio = metricas.stop_profile(args.perfil)
+    if relatorio:
+        print(f"\nPerfil gravado em {args.perfil}:\n{relatorio}")
+    if args.metricas and args.metricas != '-':
+        metricas.write_json(args.metricas)
+        print(f"\nMétricas gravadas em {args.metricas}")
+    elif args.metricas or args.perfil_memoria:
+        print(f"\nMétricas: {json.dumps(metricas.to_dict(), ensure_ascii=False, indent=2)}")
+    if args.metricas_prometheus:
+        metricas.write_prometheus(args.metricas_prometheus)
+        print(f"Métricas (Prometheus) gravadas em {args.metricas_prometheus}")
+
+
 def main() -> None:
     print("Meu projeto!")
     args = parse_args()
 
+    metricas = None
+    if args.metricas or args.metricas_prometheus or args.perfil or args.perfil_memoria:
+        metricas = instrumentation.enable()
+        metricas.start_profile(cpu=args.perfil is not None, memory_top=args.perfil_memoria)
+
     try:
+        politica = TieredCensor(*args.faixa_incerta)
+        # Estilo da censura, modo por regiões e modo de CPU (repassados a todos os extratores)
+        opcoes_ocr = {'redaction_style': args.censura_estilo}
+        if args.ocr_regioes:
+            opcoes_ocr.update(region_ocr=True, detect_max_side=args.ocr_regioes)
+        if args.ocr_cpu or args.ocr_threads or args.ocr_threads_interop:
+            opcoes_ocr.update(cpu_mode=args.ocr_cpu, threads=args.ocr_threads, interop_threads=args.ocr_threads_interop)
+        
+        if args.servir:
+            return servir(args, politica, opcoes_ocr)
+        if args.servidor:
+            return executar_como_cliente(args)
+        
         # Se uma imagem foi fornecida, processe com OCR
         if args.imagem:
             print("\n--- Processando imagem com OCR ---")
             
+            cache = OCRCache(args.ocr_cache, args.ocr_cache_max_mb * 1024 * 1024) if args.ocr_cache else None
             extractor = EasyOCRExtractor(
                 languages=args.ocr_idiomas,
-                use_gpu=args.ocr_gpu
+                use_gpu=args.ocr_gpu,
+                quality_thresholds=args.qualidade_limiares,
+                cache=cache,
+                # Com cache, o modelo só é carregado se a imagem ainda não foi vista
+                lazy=cache is not None,
+                **opcoes_ocr
             )
             
-            if args.gemini_key:
-                texto_bruto = extractor.extract_text_raw(
+            if is_multipage(args.imagem):
+                # PDF/TIFF: uma página por vez, com a saída censurada gravada conforme avança
+                for pagina in extractor.iter_extract_pages(
+                    args.imagem,
+                    dpi=args.dpi,
+                    confidence_threshold=args.ocr_confianca,
+                ):
+                    if 'error' in pagina:
+                        continue
+                    print(f"\n[página {pagina['page']}]\n{pagina['filtered_text']}")
+                    if args.gemini_key:
+                        try:
+                            print(avaliar_documento(pagina, args, politica))
+                        except GeminiError as e:
+                            print(f"[x] Gemini falhou para a página {pagina['page']}: {e}")
+            else:
+                # Uma única passada de OCR: texto bruto, texto censurado e imagem
+                # censurada saem todos do mesmo documento
+                documento = extractor.process(
                     image_path=args.imagem,
                     confidence_threshold=args.ocr_confianca
                 )
-                # print(f"Texto bruto extraído da imagem:\n{texto_bruto}\n")
-                resultado_interpretado = gemini_censor_text(texto_bruto, args.gemini_key)
-                print("\nResultado interpretado pelo Gemini:\n")
-                print(resultado_interpretado)
-                texto_extraido = extractor.extract_text(
-                    image_path=args.imagem,
-                    confidence_threshold=args.ocr_confianca
+                
+                # A censura local é gravada antes do Gemini: uma falha da API não pode deixá-la sem saída
+                documento.save_redacted()
+                if args.gemini_key:
+                    # print(f"Texto bruto extraído da imagem:\n{documento.raw_text}\n")
+                    trechos_locais = len(documento.sensitive_spans)
+                    try:
+                        resultado_interpretado = avaliar_documento(documento, args, politica)
+                    except GeminiError as e:
+                        resultado_interpretado = f"[x] Gemini falhou: {e}"
+                    if len(documento.sensitive_spans) > trechos_locais:
+                        # O modo estruturado apontou trechos a mais: grava de novo com eles
+                        documento.save_redacted()
+                    print("\nResultado interpretado pelo Gemini:\n")
+                    print(resultado_interpretado)
+                    print(f"\nTexto da imagem censurado pelo pacote:\n{documento.filtered_text}\n")
+                else:
+                    print(f"\nTexto extraído da imagem:\n{documento.filtered_text}\n")
+            
+            if cache is not None:
+                print(f"Cache de OCR: {cache.stats()}")
+        
+        # Se uma pasta foi fornecida, processe em lote com vários processos
+        if args.pasta:
+            print(f"\n--- Processando pasta em lote: {args.pasta} ---")
+            
+            caminhos = list_documents(args.pasta)
+            manifesto = None
+            if args.manifesto:
+                # Só o que mudou desde a última execução (ou ficou pela metade)
+                manifesto = abrir_manifesto(args, opcoes_ocr)
+                caminhos = manifesto.plan(caminhos, force=args.reprocessar)
+                print(f"Manifesto: {manifesto.skipped} documento(s) sem mudança ({manifesto.rules_unaffected} com regras"
+                      f" novas que não mudam a censura), {len(caminhos)} a processar {manifesto.reasons}")
+            
+            pipeline = None
+            if args.estagios:
+                # Um único processo, com decodificação e gravação sobrepostas ao OCR
+                cache = OCRCache(args.ocr_cache, args.ocr_cache_max_mb * 1024 * 1024) if args.ocr_cache else None
+                extractor = EasyOCRExtractor(
+                    languages=args.ocr_idiomas,
+                    use_gpu=args.ocr_gpu,
+                    quality_thresholds=args.qualidade_limiares,
+                    cache=cache,
+                    lazy=cache is not None,
+                    ocr_batch_size=args.ocr_lote,
+                    ocr_max_wait=args.ocr_espera_ms / 1000,
+                    **opcoes_ocr
+                )
+                pipeline = document_pipeline(
+                    extractor,
+                    confidence_threshold=args.ocr_confianca,
+                    output_dir=args.pasta_saida,
+                    ordered=not args.fora_de_ordem,
+                    keep_detections=manifesto is not None,
+                )
+                # PDF/TIFF não passam pelo pipeline de imagens avulsas: página a página, depois das imagens
+                multipaginas = [caminho for caminho in caminhos if is_multipage(caminho)]
+                resultados = itertools.chain(
+                    pipeline.run([caminho for caminho in caminhos if not is_multipage(caminho)]),
+                    (censurar_multipagina(extractor, caminho, args) for caminho in multipaginas),
                 )
-                print(f"\nTexto da imagem censurado pelo pacote:\n{texto_extraido}\n")
             else:
-                texto_extraido = extractor.extract_text(
-                    image_path=args.imagem,
-                    confidence_threshold=args.ocr_confianca
+                resultados = process_batch(
+                    caminhos,
+                    workers=args.workers,
+                    languages=args.ocr_idiomas,
+                    use_gpu=args.ocr_gpu,
+                    quality_thresholds=args.qualidade_limiares,
+                    cache_path=args.ocr_cache,
+                    cache_max_bytes=args.ocr_cache_max_mb * 1024 * 1024,
+                    confidence_threshold=args.ocr_confianca,
+                    output_dir=args.pasta_saida,
+                    ordered=not args.fora_de_ordem,
+                    dpi=args.dpi,
+                    keep_detections=manifesto is not None,
+                    **opcoes_ocr
                 )
-                print(f"\nTexto extraído da imagem:\n{texto_extraido}\n")
+            pendentes = []  # documentos à espera do Gemini em lote
+            # Com manifesto, as execuções incrementais acrescentam ao mesmo arquivo
+            saida = JSONLSink(args.saida_jsonl, append=manifesto is not None) if args.saida_jsonl else None
+            for resultado in resultados:
+                if manifesto is not None:
+                    # Antes do JSONL: as detecções do OCR ficam só no manifesto
+                    manifesto.record(resultado)
+                if saida is not None:
+                    saida.write(resultado)
+                if 'error' in resultado:
+                    print(f"[x] {resultado['image_path']}: {resultado['error']}")
+                    continue
+                print(f"\n[{resultado['image_path']}]\n{resultado['filtered_text']}")
+                if args.gemini_key and args.gemini_lote > 1:
+                    avaliacao = None if args.gemini_sempre else politica.assess_document(resultado)
+                    if avaliacao is None or avaliacao.escalate:
+                        pendentes.append((resultado, avaliacao))
+                    else:
+                        print("Resultado das regras locais:")
+                        print(avaliacao.local_verdict())
+                elif args.gemini_key:
+                    try:
+                        interpretado = avaliar_documento(resultado, args, politica)
+                    except GeminiError as e:
+                        # Uma falha da API não derruba o lote; o documento fica sem veredito
+                        print(f"[x] Gemini falhou para {resultado['image_path']}: {e}")
+                        continue
+                    print("Resultado interpretado pelo Gemini:")
+                    print(interpretado)
+            
+            if saida is not None:
+                saida.close()
+                print(f"\n{saida.count} resultado(s) gravado(s) em {saida.path}")
+            interpretar_lote_com_gemini(pendentes, args)
+            if manifesto is not None:
+                print(f"\nManifesto: {manifesto.stats()}")
+                manifesto.close()
+            if pipeline is not None:
+                extractor.close()
+                print(f"\nUtilização por estágio: {pipeline.stats()}")
+        
+        if args.gemini_key and not args.gemini_sempre:
+            print(f"\nPolítica em camadas: {politica.stats()}")
         
         return 0
     except Exception as e:
         print(f"Erro: {e}")
         return 1
+    finally:
+        if metricas is not None:
+            exportar_metricas(metricas, args)
 
 
 if __name__ == "__main__":
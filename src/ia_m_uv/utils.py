@@ -34,17 +34,86 @@ def parse_args():
     #     nargs='?'
     # )
         # Argumentos do OCR (EasyExtractor)
-    parser.add_argument('--imagem', required=True, help="Caminho da imagem para OCR")
+    entrada = parser.add_mutually_exclusive_group()
+    entrada.add_argument('--imagem', help="Caminho da imagem para OCR (PDF e TIFF são processados página a página)")
+    entrada.add_argument('--pasta', help="Pasta com imagens para processar em lote")
     parser.add_argument('--ocr-idiomas', nargs='+', default=['pt', 'en'], 
                        help="Idiomas para o OCR (ex: 'pt en')")
     parser.add_argument('--ocr-gpu', action='store_true', 
                        help="Usar GPU para o OCR (se disponível)")
     parser.add_argument('--ocr-confianca', type=float, default=0.7,
                        help="Limite de confiança do OCR (0.0 a 1.0)")
+    parser.add_argument('--ocr-regioes', type=int, nargs='?', const=1600, default=None, metavar='LADO_MAX',
+                       help="Para digitalizações grandes: detecta o texto numa cópia reduzida (até LADO_MAX px, em blocos se preciso) e reconhece só os recortes, em resolução original")
+    parser.add_argument('--ocr-cpu', choices=['padrao', 'fp32'],
+                       help="Modo de desempenho em CPU: threads fixas e inference_mode, com as redes do EasyOCR como vêm (padrao, reconhecedor em int8) ou sem quantização (fp32, mais lento; ver benchmark --modos-cpu)")
+    parser.add_argument('--ocr-threads', type=int,
+                       help="Threads intra-op do torch no OCR")
+    parser.add_argument('--ocr-threads-interop', type=int,
+                       help="Threads inter-op do torch no OCR (padrão no modo de CPU: 1)")
+    parser.add_argument('--censura-estilo', choices=['fill', 'pixelate', 'blur', 'mask'], default='fill',
+                       help="Como cobrir os dados sensíveis na imagem: preencher (fill), pixelar, desfocar, ou gravar só a máscara (mask)")
+    parser.add_argument('--dpi', type=int, default=200,
+                       help="Resolução usada para rasterizar as páginas de PDF e gravar o documento censurado")
+    parser.add_argument('--qualidade-limiares',
+                       help="JSON de limiares do estimador de qualidade (gerado por quality_calibration)")
+    parser.add_argument('--ocr-cache',
+                       help="Arquivo SQLite para guardar as detecções do OCR entre execuções")
+    parser.add_argument('--ocr-cache-max-mb', type=int, default=512,
+                       help="Tamanho máximo do cache de OCR em MB (descarta os menos usados)")
+    parser.add_argument('--workers', type=int, default=None,
+                       help="Processos paralelos no modo --pasta (padrão: número de núcleos)")
+    parser.add_argument('--estagios', action='store_true',
+                       help="No modo --pasta, usa um único processo com estágios em paralelo (decodificação, OCR, censura, gravação) em vez de vários processos")
+    parser.add_argument('--ocr-lote', type=int, default=None,
+                       help="Com --estagios, junta o OCR de até N páginas por passada da rede (lotes de recortes de texto)")
+    parser.add_argument('--ocr-espera-ms', type=float, default=50,
+                       help="Com --ocr-lote, quanto esperar (ms) para encher um lote antes de processá-lo")
+    parser.add_argument('--fora-de-ordem', action='store_true',
+                       help="No modo --pasta, mostra os resultados conforme terminam")
+    parser.add_argument('--pasta-saida', default='censored_images',
+                       help="No modo --pasta, pasta das imagens censuradas")
+    parser.add_argument('--manifesto', metavar='ARQUIVO_SQLITE',
+                       help="No modo --pasta, registra o que já foi processado e, nas próximas execuções, só processa documentos novos, alterados, interrompidos ou afetados por mudança de regras/configuração")
+    parser.add_argument('--reprocessar', action='store_true',
+                       help="Com --manifesto, processa todos os documentos de novo (e atualiza o manifesto)")
+    parser.add_argument('--saida-jsonl',
+                       help="No modo --pasta, grava o resumo de cada documento neste arquivo JSON Lines, conforme terminam")
     parser.add_argument('--gemini-key', help="Chave de API do Gemini para uso opcional de interpretação do texto extraído")
+    parser.add_argument('--gemini-estruturado', action='store_true',
+                       help="Detecção e reescrita do Gemini em uma única chamada com resposta JSON (os trechos apontados também são censurados na imagem)")
+    parser.add_argument('--gemini-sempre', action='store_true',
+                       help="Envia todo documento ao Gemini (por padrão, só os que as regras locais deixam em dúvida)")
+    parser.add_argument('--gemini-lote', type=int, default=1,
+                       help="No modo --pasta, quantos documentos enviar ao Gemini por requisição (1 = um por vez)")
+    parser.add_argument('--faixa-incerta', nargs=2, type=float, default=[0.25, 0.8], metavar=('MIN', 'MAX'),
+                       help="Faixa da pontuação local (0 a 1) em que o documento é escalado para o Gemini")
+    parser.add_argument('--servir', action='store_true',
+                       help="Modo servidor: carrega o modelo uma vez e atende documentos por HTTP (ver --porta/--socket)")
+    parser.add_argument('--host', default='127.0.0.1',
+                       help="Com --servir, endereço em que o servidor escuta")
+    parser.add_argument('--porta', type=int, default=8765,
+                       help="Com --servir, porta HTTP do servidor")
+    parser.add_argument('--socket', metavar='CAMINHO',
+                       help="Com --servir, escuta num socket Unix em vez da porta")
+    parser.add_argument('--max-pendentes', type=int, default=64,
+                       help="Com --servir, documentos em andamento antes de responder 503 (fila cheia)")
+    parser.add_argument('--servidor', metavar='URL',
+                       help="Envia --imagem/--pasta a um servidor já em execução (http://host:porta ou unix:/caminho)")
+    parser.add_argument('--metricas', nargs='?', const='-', default=None, metavar='ARQUIVO_JSON',
+                       help="Mede o tempo de cada etapa e conta eventos; mostra o resumo ao final (ou grava em ARQUIVO_JSON)")
+    parser.add_argument('--metricas-prometheus', metavar='ARQUIVO',
+                       help="Grava as métricas no formato texto do Prometheus")
+    parser.add_argument('--perfil', metavar='ARQUIVO_PROF',
+                       help="Roda com cProfile e grava o perfil (abrir com pstats ou snakeviz)")
+    parser.add_argument('--perfil-memoria', type=int, nargs='?', const=10, default=0, metavar='N',
+                       help="Roda com tracemalloc e mostra o pico e as N linhas que mais alocaram")
 
     # Argumentos do Gemini (agora o usuario escolhe o token)
     # parser.add_argument('--gemini-token', required=True,
     #                    help="API Key do Gemini")
 
-    return parser.parse_args()
+    args = parser.parse_args()
+    if not (args.imagem or args.pasta or args.servir):
+        parser.error("informe --imagem, --pasta ou --servir")
+    return args
@@ -0,0 +1,173 @@
+import asyncio
+import time
+
+import pytest
+
+from ia_m_uv.algoritmos.gemini_async import (
+    AsyncGeminiClient,
+    FakeGeminiBackend,
+    FakeServerError,
+    TokenBucket,
+)
+from ia_m_uv.algoritmos.gemini_errors import (
+    GeminiError,
+    GeminiRateLimitError,
+    GeminiRequestError,
+    GeminiServerError,
+    GeminiTimeoutError,
+    classify_error,
+)
+
+
+def _client(backend, **options):
+    # Sem espera real entre as tentativas
+    options.setdefault('backoff_base', 0.0)
+    return AsyncGeminiClient(backend=backend, **options)
+
+
+def test_server_errors_are_retried_until_success():
+    backend = FakeGeminiBackend(latency=0.0, failure_rate=0.5, seed=1)
+    client = _client(backend, max_retries=20)
+
+    results = asyncio.run(client.generate_many([f"doc {i}" for i in range(20)]))
+
+    assert results == ["OK"] * 20
+    assert backend.failures > 0
+    assert client.stats['retries'] == backend.failures
+    assert client.stats['attempts'] == 20 + backend.failures
+    assert client.stats['errors'] == 0
+
+
+def test_server_error_is_raised_after_exhausting_retries():
+    backend = FakeGeminiBackend(latency=0.0, failure_rate=1.0)
+    client = _client(backend, max_retries=3)
+
+    with pytest.raises(GeminiServerError) as info:
+        asyncio.run(client.generate_response_instructed("doc"))
+
+    assert info.value.status == 503
+    assert isinstance(info.value.__cause__, FakeServerError)
+    assert backend.requests == 4
+    assert client.stats == {'calls': 1, 'attempts': 4, 'retries': 3, 'errors': 1}
+
+
+def test_rate_limit_is_retried_after_the_quota_window():
+    backend = FakeGeminiBackend(latency=0.0, server_rpm=1)
+    client = _client(backend, max_retries=2)
+    # A janela de 60s da cota "passa" durante o backoff
+    client._backoff = lambda attempt: backend._window.clear() or 0.0
+
+    async def run():
+        return [await client.generate_response_instructed(f"doc {i}") for i in range(3)]
+
+    assert asyncio.run(run()) == ["OK"] * 3
+    assert backend.rate_limited == 2
+    assert client.stats['retries'] == 2
+
+
+def test_rate_limit_failures_stay_in_their_position():
+    backend = FakeGeminiBackend(latency=0.0, server_rpm=2)
+    client = _client(backend, max_retries=1)
+
+    results = asyncio.run(client.generate_many([f"doc {i}" for i in range(4)]))
+
+    assert results[:2] == ["OK", "OK"]
+    assert all(isinstance(r, GeminiRateLimitError) and r.status == 429 for r in results[2:])
+    assert backend.rate_limited == 4  # 2 prompts x (1 tentativa + 1 repetição)
+
+
+def test_request_errors_are_not_retried():
+    def responder(prompt, instruction):
+        raise FakeServerError(400, "API key not valid")
+
+    backend = FakeGeminiBackend(responder=responder, latency=0.0)
+    client = _client(backend, max_retries=5)
+
+    with pytest.raises(GeminiRequestError):
+        asyncio.run(client.generate_response_instructed("doc"))
+    assert backend.requests == 1
+    assert client.stats['retries'] == 0
+
+
+def test_timeout_is_retried_then_raised():
+    backend = FakeGeminiBackend(latency=0.5)
+    client = _client(backend, max_retries=1, timeout=0.01)
+
+    with pytest.raises(GeminiTimeoutError):
+        asyncio.run(client.generate_response_instructed("doc"))
+    assert backend.requests == 2
+
+
+def test_concurrency_limit():
+    backend = FakeGeminiBackend(latency=0.02)
+    client = _client(backend, max_concurrency=3)
+
+    asyncio.run(client.generate_many([f"doc {i}" for i in range(12)]))
+
+    assert backend.max_concurrent == 3
+
+
+def test_token_bucket_rate():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=6000, capacity=1)  # 100 fichas/s, sem rajada
+        start = time.monotonic()
+        for _ in range(21):
+            await bucket.acquire()
+        return time.monotonic() - start
+
+    # A primeira ficha já está no balde; as outras 20 chegam a cada 10 ms
+    assert 0.19 <= asyncio.run(run()) < 0.6
+
+
+def test_token_bucket_allows_burst_up_to_capacity():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=60, capacity=5)
+        waits = [await bucket.acquire() for _ in range(5)]
+        return waits, bucket.tokens
+
+    waits, left = asyncio.run(run())
+    assert waits == [0.0] * 5
+    assert left < 1
+
+
+def test_token_bucket_caps_requests_larger_than_capacity():
+    async def run():
+        bucket = TokenBucket(rate_per_minute=60000, capacity=10)
+        return await bucket.acquire(1000)
+
+    assert asyncio.run(run()) == 0.0
+
+
+def test_client_requests_per_minute_limit():
+    backend = FakeGeminiBackend(latency=0.0)
+    client = _client(backend)
+    client.limiter.requests = TokenBucket(rate_per_minute=1200, capacity=1)  # 20 req/s
+
+    start = time.monotonic()
+    asyncio.run(client.generate_many([f"doc {i}" for i in range(5)]))
+
+    assert time.monotonic() - start >= 0.19
+    assert client.limiter.waited > 0
+
+
+@pytest.mark.parametrize("exc, expected, status", [
+    (FakeServerError(429, "Resource has been exhausted"), GeminiRateLimitError, 429),
+    (FakeServerError(500, "Internal"), GeminiServerError, 500),
+    (FakeServerError(503, "Unavailable"), GeminiServerError, 503),
+    (FakeServerError(408, "Request Timeout"), GeminiTimeoutError, 408),
+    (FakeServerError(400, "Bad Request"), GeminiRequestError, 400),
+    (FakeServerError(403, "Permission denied"), GeminiRequestError, 403),
+    (asyncio.TimeoutError(), GeminiTimeoutError, None),
+    (ValueError("sem código"), GeminiRequestError, None),
+])
+def test_classify_error(exc, expected, status):
+    error = classify_error(exc)
+    assert type(error) is expected
+    assert error.status == status
+    assert error.retryable == (expected in (GeminiRateLimitError, GeminiServerError, GeminiTimeoutError))
+
+
+def test_classify_error_keeps_typed_errors():
+    error = GeminiServerError("já tipado", 502)
+    assert classify_error(error) is error
+    assert isinstance(classify_error(RuntimeError()), GeminiError)
@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from ia_m_uv.algoritmos.benchmark import HEAVY_MODULES, IMPORT_BUDGET_MS, IMPORT_MODULE, measure_import
+
+
+def test_cli_import_is_within_budget():
+    # `python -X importtime -c "import ia_m_uv.main"` em processos novos (o menor tempo de 3)
+    result = measure_import(IMPORT_MODULE)
+    assert result['ms'] <= IMPORT_BUDGET_MS, result['slowest']
+
+
+def test_cli_import_does_not_load_heavy_modules():
+    assert measure_import(IMPORT_MODULE, repeats=1)['heavy'] == []
+
+    # Conferência direta em sys.modules, incluindo submódulos (torch.nn, easyocr.utils...)
+    code = (
+        f"import sys, {IMPORT_MODULE}\n"
+        f"heavy = {HEAVY_MODULES!r}\n"
+        "print(sorted(m for m in sys.modules if any(m == h or m.startswith(h + '.') for h in heavy)))"
+    )
+    proc = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True)
+    assert proc.stdout.strip() == '[]'
@@ -0,0 +1,212 @@
+import os
+
+import pytest
+
+from ia_m_uv.algoritmos.job_manifest import STATUS_DONE, STATUS_PENDING, JobManifest
+from ia_m_uv.algoritmos.sensitive_matcher import (
+    DEFAULT_PATTERNS,
+    PatternRegistry,
+    SensitiveMatcher,
+    SensitivePattern,
+    default_matcher,
+    match_signature,
+)
+
+DETECTIONS = [
+    ([[0, 0], [100, 0], [100, 20], [0, 20]], "Fulano de Tal", 0.9),
+    ([[0, 30], [140, 30], [140, 50], [0, 50]], "529.982.247-25", 0.9),
+]
+
+
+@pytest.fixture
+def folder(tmp_path):
+    paths = []
+    for name in ("a.jpg", "b.jpg"):
+        path = tmp_path / name
+        path.write_bytes(b"conteudo de " + name.encode())
+        paths.append(str(path))
+    return tmp_path, paths
+
+
+def _result(path, out_dir, matcher=None):
+    """Resultado de um documento como o do modo em lote (com keep_detections)."""
+    output = out_dir / f"censored_{os.path.basename(path)}"
+    output.write_bytes(b"saida")
+    matches = (matcher or default_matcher()).match_detections(DETECTIONS)
+    return {
+        'image_path': path,
+        'output_path': str(output),
+        'sensitive_signature': match_signature(matches),
+        'ocr_detections': list(DETECTIONS),
+    }
+
+
+def _run(manifest_path, paths, out_dir, rules="v1", settings="s1", matcher=None, record=True):
+    with JobManifest(manifest_path, rules, settings, matcher=matcher) as manifest:
+        todo = manifest.plan(paths)
+        if record:
+            for path in todo:
+                manifest.record(_result(path, out_dir, matcher))
+        return todo, manifest.stats()
+
+
+def _row(manifest_path, path, columns):
+    with JobManifest(manifest_path) as manifest:
+        return manifest._conn.execute(
+            f"SELECT {columns} FROM documents WHERE path = ?", (os.path.abspath(path),)
+        ).fetchone()
+
+
+def test_new_documents_run_then_are_skipped(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+
+    todo, stats = _run(manifest, paths, tmp)
+    assert todo == paths
+    assert stats['a_processar'] == {'novo': 2}
+    assert stats['processados'] == 2
+
+    todo, stats = _run(manifest, paths, tmp)
+    assert todo == []
+    assert stats['pulados'] == 2
+    assert stats['manifesto'] == {STATUS_DONE: 2}
+
+
+def test_mtime_only_change_is_skipped(folder, monkeypatch):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp)
+
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    todo, stats = _run(manifest, paths, tmp)
+
+    assert todo == []
+    assert stats['pulados'] == 2
+    # O novo mtime fica registrado: a próxima execução nem recalcula o hash
+    assert _row(manifest, paths[0], "mtime_ns")[0] == stat.st_mtime_ns + 10 ** 9
+    monkeypatch.setattr('ia_m_uv.algoritmos.job_manifest.content_hash', pytest.fail)
+    assert _run(manifest, paths, tmp)[0] == []
+
+
+def test_content_change_is_reprocessed(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp)
+
+    with open(paths[1], 'ab') as f:
+        f.write(b" editado")
+    todo, stats = _run(manifest, paths, tmp)
+
+    assert todo == [paths[1]]
+    assert stats['a_processar'] == {'alterado': 1}
+
+
+def test_interrupted_run_is_resumed(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+
+    # Execução que "caiu" depois do plan: nada foi gravado com `record`
+    todo, stats = _run(manifest, paths, tmp, record=False)
+    assert todo == paths
+    assert stats['manifesto'] == {STATUS_PENDING: 2}
+
+    todo, stats = _run(manifest, paths, tmp)
+    assert todo == paths
+    assert stats['a_processar'] == {'retomado': 2}
+    assert _run(manifest, paths, tmp)[0] == []
+
+
+def test_failed_document_is_retried(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    with JobManifest(manifest, "v1", "s1") as m:
+        m.plan(paths)
+        m.record(_result(paths[0], tmp))
+        m.record({'image_path': paths[1], 'error': "OCR falhou"})
+
+    todo, stats = _run(manifest, paths, tmp)
+    assert todo == [paths[1]]
+    assert stats['a_processar'] == {'falhou': 1}
+
+
+def test_rule_change_with_same_redaction_is_skipped(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp, rules="v1")
+
+    # Regra nova que não casa com nada dos documentos
+    registry = PatternRegistry(DEFAULT_PATTERNS)
+    registry.register(SensitivePattern('protocolo', r'PROT-\d{6}'))
+    todo, stats = _run(manifest, paths, tmp, rules=registry.signature(), matcher=SensitiveMatcher(registry))
+
+    assert todo == []
+    assert stats['regras_sem_efeito'] == 2
+    assert _row(manifest, paths[0], "rules_version")[0] == registry.signature()
+
+
+def test_rule_change_that_alters_redaction_is_reprocessed(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp, rules="v1")
+
+    registry = PatternRegistry(DEFAULT_PATTERNS)
+    registry.register(SensitivePattern('nome', r'Fulano de Tal'))
+    todo, stats = _run(manifest, paths, tmp, rules=registry.signature(), matcher=SensitiveMatcher(registry))
+
+    assert todo == paths
+    assert stats['a_processar'] == {'regras': 2}
+
+
+def test_settings_change_is_reprocessed(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp, settings="s1")
+
+    assert _run(manifest, paths, tmp, settings="s2")[1]['a_processar'] == {'configuracao': 2}
+
+
+def test_missing_output_is_reprocessed(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp)
+
+    os.remove(tmp / "censored_a.jpg")
+    todo, stats = _run(manifest, paths, tmp)
+
+    assert todo == [paths[0]]
+    assert stats['a_processar'] == {'saida_ausente': 1}
+
+
+def test_document_deleted_after_listing_is_skipped(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp)
+
+    with open(paths[1], 'ab') as f:
+        f.write(b" editado")
+    os.remove(paths[0])
+    todo, stats = _run(manifest, paths + [str(tmp / "nunca_existiu.jpg")], tmp)
+
+    assert todo == [paths[1]]
+    assert stats['ausentes'] == 2
+
+
+def test_force_reprocesses_everything(folder):
+    tmp, paths = folder
+    manifest = str(tmp / "m.sqlite")
+    _run(manifest, paths, tmp)
+
+    with JobManifest(manifest, "v1", "s1") as m:
+        assert m.plan(paths, force=True) == paths
+        assert m.reasons == {'forcado': 2}
+
+
+def test_detections_stay_out_of_the_result(folder):
+    tmp, paths = folder
+    with JobManifest(str(tmp / "m.sqlite"), "v1", "s1") as manifest:
+        manifest.plan(paths[:1])
+        result = _result(paths[0], tmp)
+        manifest.record(result)
+
+    assert 'ocr_detections' not in result
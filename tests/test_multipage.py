@@ -0,0 +1,92 @@
+import re
+import zlib
+
+import numpy as np
+import pytest
+
+from ia_m_uv.algoritmos.multipage import MultipageWriter, iter_pages, page_count
+
+
+def _pages(n, shape=(100, 200)):
+    rng = np.random.default_rng(0)
+    return [rng.integers(0, 256, shape, dtype=np.uint8) for _ in range(n)]
+
+
+def _pdf_images(data):
+    """Páginas de um PDF gravado pelo MultipageWriter: (largura, altura, pixels) de cada imagem."""
+    images = []
+    for m in re.finditer(rb"/Width (\d+) /Height (\d+) .*?/Length (\d+) >>\nstream\n", data):
+        start = m.end()
+        pixels = zlib.decompress(data[start:start + int(m.group(3))])
+        images.append((int(m.group(1)), int(m.group(2)), pixels))
+    return images
+
+
+def test_pdf_pages_are_written_in_order(tmp_path):
+    pages = _pages(20)
+    path = str(tmp_path / "saida.pdf")
+    with MultipageWriter(path) as writer:
+        for page in pages:
+            writer.write(page)
+
+    data = open(path, 'rb').read()
+    assert data.startswith(b"%PDF-") and data.rstrip().endswith(b"%%EOF")
+    assert b"/Type /Pages /Kids [" in data and b"/Count 20 >>" in data
+    assert _pdf_images(data) == [(200, 100, page.tobytes()) for page in pages]
+
+
+def test_pdf_size_grows_linearly_with_pages(tmp_path):
+    sizes = {}
+    for n in (50, 200):
+        path = str(tmp_path / f"saida_{n}.pdf")
+        with MultipageWriter(path) as writer:
+            for page in _pages(n):
+                writer.write(page)
+        sizes[n] = len(open(path, 'rb').read())
+        assert len(_pdf_images(open(path, 'rb').read())) == n
+
+    # Cada página ocupa o mesmo espaço, qualquer que seja a posição dela no arquivo
+    assert sizes[200] < 4.1 * sizes[50]
+
+
+def test_pdf_xref_points_at_each_object(tmp_path):
+    path = str(tmp_path / "saida.pdf")
+    with MultipageWriter(path) as writer:
+        for page in _pages(3):
+            writer.write(page)
+
+    data = open(path, 'rb').read()
+    xref = int(data.rsplit(b"startxref\n", 1)[1].split()[0])
+    assert data[xref:].startswith(b"xref\n")
+    entries = re.findall(rb"(\d{10}) 00000 n ", data[xref:])
+    for number, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(b"%d 0 obj" % number)
+
+
+def test_pdf_is_read_back_by_pymupdf(tmp_path):
+    pytest.importorskip('fitz')
+    pages = _pages(5)
+    path = str(tmp_path / "saida.pdf")
+    with MultipageWriter(path, dpi=72) as writer:
+        for page in pages:
+            writer.write(page)
+
+    assert page_count(path) == 5
+    assert [image.shape for _, image in iter_pages(path, dpi=72)] == [(100, 200)] * 5
+
+
+def test_tiff_pages_are_read_back(tmp_path):
+    pages = _pages(7)
+    path = str(tmp_path / "saida.tif")
+    with MultipageWriter(path) as writer:
+        for page in pages:
+            writer.write(page)
+
+    assert page_count(path) == 7
+    for (index, image), page in zip(iter_pages(path), pages):
+        assert np.array_equal(image, page)
+
+
+def test_unsupported_output_format(tmp_path):
+    with pytest.raises(ValueError):
+        MultipageWriter(str(tmp_path / "saida.png"))
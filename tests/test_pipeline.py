@@ -0,0 +1,137 @@
+import threading
+import time
+
+import pytest
+
+from ia_m_uv.algoritmos.pipeline import Pipeline, Stage
+
+
+def _pipeline_threads():
+    return [t for t in threading.enumerate() if t.name.startswith('pipeline-')]
+
+
+def _slow_on_even(x):
+    # Itens pares demoram mais: com várias threads, terminam fora de ordem
+    time.sleep(0.02 if x % 2 == 0 else 0.0)
+    return x
+
+
+def test_ordered_output_keeps_input_order():
+    pipe = Pipeline([Stage('a', _slow_on_even, workers=4), Stage('b', lambda x: x * 10, workers=2)])
+
+    assert list(pipe.run(range(30))) == [x * 10 for x in range(30)]
+
+
+def test_unordered_output_yields_as_items_finish():
+    pipe = Pipeline([Stage('a', _slow_on_even, workers=4)], ordered=False)
+
+    results = list(pipe.run(range(30)))
+
+    assert sorted(results) == list(range(30))
+    assert results != list(range(30))
+
+
+def test_failed_item_does_not_stop_the_others():
+    calls = []
+
+    def fail_on_three(x):
+        if x == 3:
+            raise ValueError("ruim")
+        return x
+
+    def record(x):
+        calls.append(x)
+        return x
+
+    pipe = Pipeline([Stage('a', fail_on_three, workers=2), Stage('b', record)])
+    results = list(pipe.run(range(6)))
+
+    assert results[:3] == [0, 1, 2] and results[4:] == [4, 5]
+    assert results[3] == {'source': 3, 'stage': 'a', 'error': "ruim"}
+    # O item com erro pula os estágios seguintes
+    assert sorted(calls) == [0, 1, 2, 4, 5]
+    assert pipe.stats()['a']['errors'] == 1
+    assert pipe.stats()['b']['errors'] == 0
+
+
+def test_custom_on_error():
+    def fail(x):
+        raise RuntimeError(f"falhou {x}")
+
+    pipe = Pipeline([Stage('a', fail)], on_error=lambda source, stage, error: (source, stage, str(error)))
+
+    assert list(pipe.run([1, 2])) == [(1, 'a', "falhou 1"), (2, 'a', "falhou 2")]
+
+
+@pytest.mark.parametrize("ordered", [True, False])
+def test_failing_input_iterator_becomes_the_last_result(ordered):
+    def inputs():
+        yield from range(3)
+        raise OSError("pasta sumiu")
+
+    pipe = Pipeline([Stage('a', lambda x: x, workers=2)], ordered=ordered, max_in_flight=2)
+    results = list(pipe.run(inputs()))
+
+    assert sorted(results[:3]) == [0, 1, 2]
+    assert results[3] == {'source': None, 'stage': 'entrada', 'error': "pasta sumiu"}
+    assert _pipeline_threads() == []
+
+
+def test_early_exit_stops_and_joins_the_threads():
+    consumed = []
+
+    def inputs():
+        for x in range(1000):
+            consumed.append(x)
+            yield x
+
+    pipe = Pipeline([Stage('a', lambda x: x, workers=3, queue_size=2), Stage('b', lambda x: x, workers=2)])
+    results = pipe.run(inputs())
+    assert [next(results) for _ in range(5)] == [0, 1, 2, 3, 4]
+    results.close()
+
+    assert _pipeline_threads() == []
+    # A entrada só foi lida até a capacidade do pipeline
+    assert len(consumed) <= 5 + pipe.capacity + 1
+
+
+def test_backpressure_limits_items_in_flight():
+    inside = []
+    peak = [0]
+    lock = threading.Lock()
+
+    def enter(x):
+        with lock:
+            inside.append(x)
+            peak[0] = max(peak[0], len(inside))
+        return x
+
+    def leave(x):
+        time.sleep(0.005)
+        with lock:
+            inside.remove(x)
+        return x
+
+    pipe = Pipeline([Stage('a', enter, workers=2, queue_size=1), Stage('b', leave, queue_size=1)], max_in_flight=3)
+
+    assert list(pipe.run(range(40))) == list(range(40))
+    assert peak[0] <= 3
+
+
+def test_stage_stats():
+    pipe = Pipeline([Stage('a', lambda x: time.sleep(0.01) or x, workers=2)])
+    assert pipe.stats() == {}
+
+    list(pipe.run(range(10)))
+    stats = pipe.stats()['a']
+
+    assert stats['items'] == 10
+    assert stats['busy_s'] >= 0.09
+    assert 0 < stats['utilisation'] <= 1
+
+
+def test_invalid_configuration():
+    with pytest.raises(ValueError):
+        Pipeline([])
+    with pytest.raises(ValueError):
+        Stage('a', lambda x: x, workers=0)
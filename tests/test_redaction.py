@@ -0,0 +1,137 @@
+import cv2
+import numpy as np
+import pytest
+
+from ia_m_uv.algoritmos.redaction import REDACTION_STYLES, RedactionMask, build_mask
+from ia_m_uv.algoritmos.sensitive_matcher import default_matcher
+
+# Caixa inclinada (losango) e um retângulo comum
+ROTATED = [[60, 20], [100, 60], [60, 100], [20, 60]]
+RECTANGLE = [[120, 30], [170, 30], [170, 50], [120, 50]]
+
+
+def _image(shape=(120, 200), channels=None):
+    rng = np.random.default_rng(0)
+    shape = shape + (channels,) if channels else shape
+    # Valores de 1 a 254: qualquer pixel preenchido com 0 fica visível
+    return rng.integers(1, 255, shape, dtype=np.uint8)
+
+
+def _expected(shape, polygons):
+    expected = np.zeros(shape, dtype=np.uint8)
+    cv2.fillPoly(expected, [np.asarray(p, dtype=np.int32) for p in polygons], 255)
+    return expected
+
+
+def test_rotated_polygon_is_covered_exactly():
+    mask = RedactionMask((120, 200), [ROTATED])
+
+    assert np.array_equal(mask.full(), _expected((120, 200), [ROTATED]))
+    # Nada além do losango: os cantos do retângulo que o envolve ficam de fora
+    x0, y0, x1, y1 = mask.box
+    assert (x0, y0, x1, y1) == (20, 20, 101, 101)
+    for x, y in [(x0, y0), (x1 - 1, y0), (x0, y1 - 1), (x1 - 1, y1 - 1)]:
+        assert mask.full()[y, x] == 0
+    assert mask.area < (x1 - x0) * (y1 - y0) * 0.6
+
+
+def test_several_polygons_share_one_mask():
+    mask = RedactionMask((120, 200), [ROTATED, RECTANGLE])
+
+    assert mask.box == (20, 20, 171, 101)
+    assert np.array_equal(mask.full(), _expected((120, 200), [ROTATED, RECTANGLE]))
+
+
+def test_polygons_outside_the_image_are_clipped():
+    mask = RedactionMask((120, 200), [[[180, 100], [260, 100], [260, 160], [180, 160]]])
+
+    assert mask.box == (180, 100, 200, 120)
+    assert mask.area == 20 * 20
+
+
+@pytest.mark.parametrize("polygons", [[], [[[300, 300], [310, 300], [310, 310], [300, 310]]]])
+def test_nothing_to_redact_is_falsy(polygons):
+    mask = RedactionMask((120, 200), polygons)
+
+    assert not mask
+    assert mask.area == 0
+    assert mask.patch(_image()) is None
+    assert not mask.full().any()
+
+
+def test_empty_match_list_yields_falsy_mask():
+    assert not build_mask((120, 200), [])
+    assert not build_mask((120, 200), default_matcher().match_detections([]))
+
+
+def test_mask_from_matches_covers_the_sensitive_part_only():
+    detections = [([[0, 0], [200, 0], [200, 20], [0, 20]], "CPF 529.982.247-25", 0.9)]
+    mask = build_mask((40, 220), default_matcher().match_detections(detections))
+
+    x0, _, x1, _ = mask.box
+    assert x0 > 20 and x1 == 201  # "CPF " fica visível; o número vai até o fim da caixa
+
+
+@pytest.mark.parametrize("channels", [None, 3])
+@pytest.mark.parametrize("style", REDACTION_STYLES)
+def test_styles_change_only_masked_pixels(style, channels):
+    image = _image(channels=channels)
+    mask = RedactionMask(image.shape, [ROTATED, RECTANGLE])
+    inside = mask.full().astype(bool)
+
+    redacted = mask.apply(image, style, in_place=False)
+
+    assert np.array_equal(redacted[~inside], image[~inside])
+    changed = (redacted != image).reshape(inside.shape + (-1,)).any(axis=-1)
+    assert changed[inside].mean() > 0.9
+
+
+def test_fill_uses_the_given_color():
+    image = _image()
+    mask = RedactionMask(image.shape, [ROTATED])
+
+    redacted = mask.apply(image, 'fill', in_place=False, color=7)
+
+    assert (redacted[mask.full().astype(bool)] == 7).all()
+
+
+def test_apply_in_place_false_leaves_the_input_untouched():
+    image = _image()
+    before = image.copy()
+    mask = RedactionMask(image.shape, [ROTATED])
+
+    for style in REDACTION_STYLES:
+        redacted = mask.apply(image, style, in_place=False)
+        assert redacted is not image
+        assert np.array_equal(image, before)
+
+
+def test_apply_in_place_alters_the_input():
+    image = _image()
+    mask = RedactionMask(image.shape, [ROTATED])
+
+    assert mask.apply(image) is image
+    assert (image[mask.full().astype(bool)] == 0).all()
+
+
+def test_patch_returns_only_the_box_region():
+    image = _image()
+    before = image.copy()
+    mask = RedactionMask(image.shape, [ROTATED, RECTANGLE])
+    x0, y0, x1, y1 = mask.box
+
+    patch = mask.patch(image, 'fill')
+
+    assert patch.shape == (y1 - y0, x1 - x0)
+    assert np.array_equal(image, before)
+    assert np.array_equal(patch, mask.apply(image, 'fill', in_place=False)[y0:y1, x0:x1])
+
+
+def test_unknown_style_raises():
+    image = _image()
+    mask = RedactionMask(image.shape, [ROTATED])
+
+    with pytest.raises(ValueError):
+        mask.apply(image, 'tinta', in_place=False)
+    with pytest.raises(ValueError):
+        mask.patch(image, 'tinta')
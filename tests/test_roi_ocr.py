@@ -0,0 +1,51 @@
+import random
+
+from ia_m_uv.algoritmos.roi_ocr import merge_tiled_boxes, tile_windows
+
+
+def _tiled_page(seed, width=3000, height=4000, tile=1200, overlap=120):
+    """Linhas de texto de uma página e os pedaços que cada bloco sobreposto detectaria delas."""
+    rnd = random.Random(seed)
+    lines, y = [], 50
+    while y < height - 100:
+        h, x = rnd.randint(20, 40), 50
+        while x < width - 800:
+            w = rnd.randint(80, 700)
+            lines.append([x, x + w, y, y + h])
+            x += w + rnd.randint(30, 120)
+        y += h + rnd.randint(15, 40)
+
+    rects, cut = [], []
+    for x0, y0, x1, y1 in tile_windows(height, width, tile, overlap):
+        for r in lines:
+            piece = [max(r[0], x0), min(r[1], x1), max(r[2], y0), min(r[3], y1)]
+            if piece[1] - piece[0] < 5 or piece[3] - piece[2] < 5:
+                continue
+            rects.append(piece)
+            cut.append(
+                (x0 > 0 and piece[0] <= x0 + 3) or (x1 < width and piece[1] >= x1 - 3)
+                or (y0 > 0 and piece[2] <= y0 + 3) or (y1 < height and piece[3] >= y1 - 3)
+            )
+    return lines, rects, cut
+
+
+def test_tiled_pieces_are_merged_back_into_the_original_lines():
+    for seed in range(3):
+        lines, rects, cut = _tiled_page(seed)
+        assert len(rects) > len(lines)
+        assert merge_tiled_boxes(rects, cut) == sorted(lines, key=lambda r: (r[2], r[0]))
+
+
+def test_uncut_boxes_on_the_same_line_are_kept_apart():
+    words = [[0, 100, 0, 20], [100, 200, 0, 20]]
+    assert merge_tiled_boxes(words, [False, False]) == words
+
+
+def test_duplicate_in_the_overlap_is_dropped():
+    line = [0, 500, 0, 30]
+    duplicate = [10, 490, 2, 28]
+    assert merge_tiled_boxes([duplicate, line], [False, False]) == [line]
+
+
+def test_empty():
+    assert merge_tiled_boxes([], []) == []
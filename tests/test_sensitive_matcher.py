@@ -0,0 +1,69 @@
+import pytest
+
+from ia_m_uv.algoritmos.sensitive_matcher import default_matcher
+
+CPF = "529.982.247-25"
+CNPJ = "11.222.333/0001-81"
+
+
+def _boxes(*texts, char_width=10, height=20):
+    """Detecções lado a lado na mesma linha, como o EasyOCR devolve."""
+    detections, x = [], 0
+    for text in texts:
+        width = char_width * len(text)
+        bbox = [[x, 0], [x + width, 0], [x + width, height], [x, height]]
+        detections.append((bbox, text, 0.9))
+        x += width + char_width
+    return detections
+
+
+def _categories(detections):
+    return [match.category for match in default_matcher().match_detections(detections)]
+
+
+@pytest.mark.parametrize("split", range(1, len(CPF)))
+def test_cpf_split_between_two_boxes(split):
+    detections = _boxes(CPF[:split], CPF[split:])
+    matches = default_matcher().match_detections(detections)
+    assert [m.category for m in matches] == ['cpf']
+    # As duas caixas têm a parte que lhes cabe censurada
+    assert sorted(region.index for region in matches[0].regions) == [0, 1]
+
+
+@pytest.mark.parametrize("split", range(1, len(CNPJ)))
+def test_cnpj_split_between_two_boxes(split):
+    assert _categories(_boxes(CNPJ[:split], CNPJ[split:])) == ['cnpj']
+
+
+@pytest.mark.parametrize("parts", [
+    ("529.982", ".247-25"),
+    ("529.982.2", "47-25"),
+    ("529.982.", "247-25"),
+    ("529", ".982.", "247", "-25"),
+])
+def test_cpf_split_reported_cases(parts):
+    assert _categories(_boxes(*parts)) == ['cpf']
+
+
+def test_cpf_with_invalid_check_digits_is_ignored():
+    assert _categories(_boxes("529.982", ".247-26")) == []
+
+
+def test_longer_digit_run_is_not_a_cpf():
+    assert _categories(_boxes("12529.982.247-25")) == []
+
+
+@pytest.mark.parametrize("plate", ["ABC-1234", "ABC1234", "BRA2E19"])
+def test_plate_formats(plate):
+    assert _categories(_boxes(plate)) == ['placa']
+
+
+@pytest.mark.parametrize("parts", [("ABC", "1234"), ("ABC-", "1234"), ("ABC", "-1234"), ("BRA", "2E19")])
+def test_plate_split_between_two_boxes(parts):
+    assert _categories(_boxes(*parts)) == ['placa']
+
+
+@pytest.mark.parametrize("text", ["RUA 1234", "NUM 1234", "SAO 2020", "ANO 1999", "CEP 8000"])
+def test_word_and_number_inside_one_box_is_not_a_plate(text):
+    assert _categories(_boxes(text)) == []
+    assert not default_matcher().is_sensitive(text)